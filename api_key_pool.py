@@ -0,0 +1,317 @@
+import atexit
+import hashlib
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from config import (
+    API_KEY_DAILY_QUOTAS,
+    API_KEY_DEFAULT_DAILY_QUOTA,
+    API_KEY_INVALID_PARK_SECONDS,
+    API_KEY_RATE_LIMIT_PARK_SECONDS,
+    API_KEY_STRATEGY,
+    API_KEY_USAGE_DB_PATH,
+    API_KEY_USAGE_FLUSH_EVERY,
+    EXPLORER_API_KEYS,
+)
+
+# Explorer messages that mean the key itself is unusable
+INVALID_KEY_MARKERS = ("invalid api key", "missing/invalid api key", "api key is invalid")
+
+
+class ApiKeyQuotaExceeded(Exception):
+    """Raised when every key configured for a chain has used up its daily quota."""
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _key_id(api_key: str) -> str:
+    """Stable, non-secret identifier for a key in logs and the usage DB."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class KeyUsageStore:
+    """
+    Persists per-key daily call counts so quotas hold across runs.
+
+    Increments are buffered in memory and written in batches.
+    """
+
+    def __init__(self, db_path: str = API_KEY_USAGE_DB_PATH, flush_every: int = API_KEY_USAGE_FLUSH_EVERY):
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self._pending: Dict[Tuple[str, str], int] = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS api_key_usage ("
+                    "key_id TEXT, "
+                    "day TEXT, "
+                    "calls INTEGER DEFAULT 0, "
+                    "PRIMARY KEY (key_id, day)"
+                    ")"
+                )
+        except Exception as e:
+            logging.warning(f"API key usage store unavailable ({self.db_path}): {e}")
+
+    def load(self, key_id: str, day: str) -> int:
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT calls FROM api_key_usage WHERE key_id = ? AND day = ?", (key_id, day)
+                ).fetchone()
+                return row[0] if row else 0
+        except Exception:
+            return 0
+
+    def record(self, key_id: str, day: str) -> None:
+        with self._lock:
+            self._pending[(key_id, day)] = self._pending.get((key_id, day), 0) + 1
+            self._pending_total += 1
+            if self._pending_total < self.flush_every:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_total = 0
+        if not pending:
+            return
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany(
+                    "INSERT INTO api_key_usage (key_id, day, calls) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key_id, day) DO UPDATE SET calls = calls + excluded.calls",
+                    [(key_id, day, calls) for (key_id, day), calls in pending.items()],
+                )
+        except Exception as e:
+            logging.warning(f"Could not persist API key usage: {e}")
+
+
+class ApiKeyPool:
+    """
+    The API keys configured for one chain.
+
+    Keys are handed out round-robin or least-used-first, skipping keys that are
+    parked (after rate-limit or invalid-key responses) or that have reached
+    their daily quota.
+    """
+
+    def __init__(
+        self,
+        chain: str,
+        keys: List[str],
+        store: KeyUsageStore,
+        daily_quota: int = API_KEY_DEFAULT_DAILY_QUOTA,
+        strategy: str = API_KEY_STRATEGY,
+    ):
+        self.chain = chain
+        self.keys = keys
+        self.store = store
+        self.daily_quota = daily_quota
+        self.strategy = strategy
+        self._cycle = itertools.cycle(range(len(keys)))
+        self._parked_until: Dict[str, float] = {}
+        self._day = _today()
+        self._calls: Dict[str, int] = {key: store.load(_key_id(key), self._day) for key in keys}
+        self._lock = threading.Lock()
+
+    def _roll_day(self) -> None:
+        today = _today()
+        if today != self._day:
+            self._day = today
+            # Other processes sharing the store may already have used today's quota
+            self.store.flush()
+            self._calls = {key: self.store.load(_key_id(key), today) for key in self.keys}
+
+    def _has_quota(self, key: str) -> bool:
+        return self._calls.get(key, 0) < self.daily_quota
+
+    def _is_usable(self, key: str, now: float) -> bool:
+        return self._has_quota(key) and self._parked_until.get(key, 0.0) <= now
+
+    def _choose(self, now: float) -> str:
+        usable = [key for key in self.keys if self._is_usable(key, now)]
+        if not usable:
+            with_quota = [key for key in self.keys if self._has_quota(key)]
+            if not with_quota:
+                raise ApiKeyQuotaExceeded(
+                    f"All {len(self.keys)} API key(s) for {self.chain} reached their daily quota of {self.daily_quota} calls."
+                )
+            # Everything is parked: use the key that becomes available first
+            return min(with_quota, key=lambda key: self._parked_until.get(key, 0.0))
+        if self.strategy == "least_used":
+            return min(usable, key=lambda key: self._calls.get(key, 0))
+        for _ in range(len(self.keys)):
+            key = self.keys[next(self._cycle)]
+            if key in usable:
+                return key
+        return usable[0]
+
+    def next_key(self) -> str:
+        """Picks the key for the next URL to be built."""
+        with self._lock:
+            self._roll_day()
+            return self._choose(time.monotonic())
+
+    def checkout(self, api_key: str) -> str:
+        """
+        Confirms the key for a request about to be sent, swapping it for another
+        one if it was parked or ran out of quota since the URL was built, and
+        counts the call against the key that is actually used.
+        """
+        with self._lock:
+            self._roll_day()
+            now = time.monotonic()
+            if not self._is_usable(api_key, now):
+                api_key = self._choose(now)
+            self._calls[api_key] = self._calls.get(api_key, 0) + 1
+            day = self._day
+        self.store.record(_key_id(api_key), day)
+        return api_key
+
+    def park(self, api_key: str, seconds: float, reason: str) -> bool:
+        """Parks a key; returns True if another key can take over right away."""
+        with self._lock:
+            now = time.monotonic()
+            self._parked_until[api_key] = max(self._parked_until.get(api_key, 0.0), now + seconds)
+            alternative = any(self._is_usable(key, now) for key in self.keys if key != api_key)
+        logging.warning(f"Parking {self.chain} API key {_key_id(api_key)} for {seconds:.0f}s ({reason}).")
+        return alternative
+
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {_key_id(key): self._calls.get(key, 0) for key in self.keys}
+
+
+class ApiKeyManager:
+    """
+    Process-wide registry of API key pools.
+
+    Keys for a chain come from the comma-separated plural variable (e.g.
+    ETHERSCAN_API_KEYS=k1,k2,k3) plus the single-key variable named in
+    config.EXPLORER_API_KEYS.
+    """
+
+    def __init__(self, store: Optional[KeyUsageStore] = None):
+        self._store = store
+        self._pools: Dict[Tuple[str, Tuple[str, ...]], ApiKeyPool] = {}
+        self._pool_by_key: Dict[str, ApiKeyPool] = {}
+        self._lock = threading.Lock()
+
+    def reset(self, store: Optional[KeyUsageStore] = None) -> None:
+        """Drops all pools (and their parked state), optionally switching the usage store."""
+        with self._lock:
+            self._store = store
+            self._pools.clear()
+            self._pool_by_key.clear()
+
+    @property
+    def store(self) -> KeyUsageStore:
+        if self._store is None:
+            self._store = KeyUsageStore()
+        return self._store
+
+    @staticmethod
+    def keys_for_chain(chain: str) -> List[str]:
+        env_var = EXPLORER_API_KEYS.get(chain)
+        if not env_var:
+            return []
+        keys: List[str] = []
+        for raw in (os.getenv(f"{env_var}S", ""), os.getenv(env_var, "")):
+            for key in raw.split(","):
+                key = key.strip()
+                if key and key not in keys:
+                    keys.append(key)
+        return keys
+
+    def get_pool(self, chain: str) -> Optional[ApiKeyPool]:
+        keys = self.keys_for_chain(chain)
+        if not keys:
+            return None
+        pool_id = (chain, tuple(keys))
+        with self._lock:
+            pool = self._pools.get(pool_id)
+            if pool is None:
+                pool = ApiKeyPool(
+                    chain,
+                    keys,
+                    self.store,
+                    daily_quota=API_KEY_DAILY_QUOTAS.get(chain, API_KEY_DEFAULT_DAILY_QUOTA),
+                )
+                self._pools[pool_id] = pool
+                for key in keys:
+                    self._pool_by_key[key] = pool
+            return pool
+
+    def next_key(self, chain: str) -> Optional[str]:
+        pool = self.get_pool(chain)
+        return pool.next_key() if pool else None
+
+    @staticmethod
+    def _endpoint_key(endpoint: str) -> Optional[str]:
+        for name, value in parse_qsl(urlparse(endpoint).query):
+            if name == "apikey":
+                return value
+        return None
+
+    @staticmethod
+    def _with_key(endpoint: str, api_key: str) -> str:
+        parsed = urlparse(endpoint)
+        query = [(name, api_key if name == "apikey" else value) for name, value in parse_qsl(parsed.query)]
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    def prepare(self, endpoint: str) -> str:
+        """
+        Returns the URL to send for an endpoint: unchanged unless its key has
+        been parked or exhausted, in which case the pool's next key is used.
+        """
+        api_key = self._endpoint_key(endpoint)
+        pool = self._pool_by_key.get(api_key) if api_key else None
+        if pool is None:
+            return endpoint
+        chosen = pool.checkout(api_key)
+        return endpoint if chosen == api_key else self._with_key(endpoint, chosen)
+
+    def observe_response(self, request_url: str, status_code: int, data: Any = None) -> bool:
+        """
+        Parks the request's key after a rate-limit or invalid-key response.
+        Returns True if the key was parked and another key can retry the request.
+        """
+        api_key = self._endpoint_key(request_url)
+        pool = self._pool_by_key.get(api_key) if api_key else None
+        if pool is None:
+            return False
+        if status_code == 429:
+            return pool.park(api_key, API_KEY_RATE_LIMIT_PARK_SECONDS, "rate limited")
+        if isinstance(data, dict) and data.get("status") == "0":
+            detail = f"{data.get('message', '')} {data.get('result', '')}".lower()
+            if any(marker in detail for marker in INVALID_KEY_MARKERS):
+                return pool.park(api_key, API_KEY_INVALID_PARK_SECONDS, "invalid key")
+            if "rate limit" in detail:
+                return pool.park(api_key, API_KEY_RATE_LIMIT_PARK_SECONDS, "rate limited")
+        return False
+
+    def flush(self) -> None:
+        if self._store is not None:
+            self._store.flush()
+
+
+# Singleton instance
+api_key_manager = ApiKeyManager()
+atexit.register(api_key_manager.flush)
@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config import BLOCK_INDEX_DB_PATH, BLOCK_INDEX_MAX_GAP, BLOCK_INDEX_SETTLED_SECONDS
+
+# Block number used when no later block is known (matches the explorers' "latest")
+LATEST_BLOCK = 99999999
+
+Anchor = Tuple[int, int]
+
+
+def _is_below(block_timestamp: int, timestamp: int, closest: str) -> bool:
+    """
+    Whether a block lies below the answer's boundary: "before" resolves to the
+    last block at or before the timestamp, "after" to the first block at or
+    after it.
+    """
+    return block_timestamp <= timestamp if closest == "before" else block_timestamp < timestamp
+
+
+def record_anchors(records: Iterable[BaseModel]) -> Dict[int, int]:
+    """The (blockNumber -> timeStamp) pairs carried by fetched records."""
+    anchors = {}
+    for record in records:
+        try:
+            anchors[int(getattr(record, "blockNumber"))] = int(getattr(record, "timeStamp"))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return anchors
+
+
+class BlockIndex:
+    """
+    Persisted block <-> timestamp anchors per chain, used to resolve dates to
+    block numbers with few or no network lookups.
+
+    Anchors are exact (block, timestamp) pairs: every record fetched from an
+    explorer or node carries one, and node searches add the blocks they probe.
+    Block timestamps never decrease, so the nearest anchors on either side of a
+    timestamp bracket the block it resolves to. Settled explorer answers are
+    stored as well, keyed by timestamp.
+    """
+
+    def __init__(self, db_path: str = BLOCK_INDEX_DB_PATH, max_gap: int = BLOCK_INDEX_MAX_GAP):
+        self.db_path = db_path
+        self.max_gap = max_gap
+        self._init_db()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS block_anchors ("
+                "chain TEXT, "
+                "block INTEGER, "
+                "timestamp INTEGER, "
+                "PRIMARY KEY (chain, block)"
+                ")"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_block_anchors_timestamp "
+                "ON block_anchors (chain, timestamp, block)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS block_lookups ("
+                "chain TEXT, "
+                "timestamp INTEGER, "
+                "closest TEXT, "
+                "block INTEGER, "
+                "PRIMARY KEY (chain, timestamp, closest)"
+                ")"
+            )
+
+    @staticmethod
+    def _disabled() -> bool:
+        return os.getenv("DISABLE_CACHE", "").lower() == "true"
+
+    def add_anchors(self, chain: str, anchors: Iterable[Anchor]) -> None:
+        rows = [(chain, block, timestamp) for block, timestamp in anchors]
+        if not rows:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO block_anchors (chain, block, timestamp) VALUES (?, ?, ?)", rows
+            )
+
+    def add_records(self, chain: str, records: Iterable[BaseModel]) -> None:
+        """Indexes the (blockNumber, timeStamp) pair of every fetched record."""
+        self.add_anchors(chain, record_anchors(records).items())
+
+    def last_block_at(self, chain: str, timestamp: int) -> Optional[int]:
+        """The highest block known to have been mined at or before `timestamp`."""
+        if self._disabled():
+            return None
+        with sqlite3.connect(self.db_path) as conn:
+            anchor = conn.execute(
+                "SELECT MAX(block) FROM block_anchors WHERE chain = ? AND timestamp <= ?", (chain, timestamp)
+            ).fetchone()[0]
+            lookup = conn.execute(
+                "SELECT MAX(block) FROM block_lookups WHERE chain = ? AND closest = 'before' AND timestamp <= ?",
+                (chain, timestamp),
+            ).fetchone()[0]
+        known = [block for block in (anchor, lookup) if block is not None]
+        return max(known) if known else None
+
+    def bracket(self, chain: str, timestamp: int, closest: str) -> Tuple[Optional[Anchor], Optional[Anchor]]:
+        """
+        The nearest known anchors below and above the boundary for `timestamp`
+        (see `_is_below`); the answer lies in (below.block, above.block].
+        """
+        if self._disabled():
+            return None, None
+        below_op, above_op = ("<=", ">") if closest == "before" else ("<", ">=")
+        with sqlite3.connect(self.db_path) as conn:
+            below = conn.execute(
+                f"SELECT block, timestamp FROM block_anchors WHERE chain = ? AND timestamp {below_op} ? "
+                "ORDER BY timestamp DESC, block DESC LIMIT 1",
+                (chain, timestamp),
+            ).fetchone()
+            above = conn.execute(
+                f"SELECT block, timestamp FROM block_anchors WHERE chain = ? AND timestamp {above_op} ? "
+                "ORDER BY timestamp ASC, block ASC LIMIT 1",
+                (chain, timestamp),
+            ).fetchone()
+        return (tuple(below) if below else None), (tuple(above) if above else None)
+
+    def resolve(self, chain: str, timestamp: int, closest: str) -> Optional[int]:
+        """
+        Resolves a timestamp without the network, or returns None.
+
+        Within a bracket of at most `max_gap` blocks the result is the
+        conservative edge of the bracket: the earliest possible block for
+        "after" (range starts) and the latest for "before" (range ends), so a
+        block range built from it never misses a record. Exports filter by
+        date afterwards.
+        """
+        if self._disabled():
+            return None
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT block FROM block_lookups WHERE chain = ? AND timestamp = ? AND closest = ?",
+                (chain, timestamp, closest),
+            ).fetchone()
+        if row:
+            return row[0]
+        below, above = self.bracket(chain, timestamp, closest)
+        if below is None or above is None or above[0] - below[0] > self.max_gap:
+            return None
+        return below[0] + 1 if closest == "after" else above[0] - 1
+
+    def bound(self, chain: str, timestamp: int, closest: str) -> int:
+        """The widest safe answer from the anchors, for when a lookup fails."""
+        below, above = self.bracket(chain, timestamp, closest)
+        if closest == "after":
+            return below[0] + 1 if below else 0
+        return above[0] - 1 if above else LATEST_BLOCK
+
+    def set_lookup(self, chain: str, timestamp: int, closest: str, block: int) -> None:
+        """Stores an explorer answer, unless the timestamp is too recent for it to be final."""
+        if timestamp > time.time() - BLOCK_INDEX_SETTLED_SECONDS:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO block_lookups (chain, timestamp, closest, block) VALUES (?, ?, ?, ?)",
+                (chain, timestamp, closest, block),
+            )
+
+    def search(
+        self,
+        chain: str,
+        timestamp: int,
+        closest: str,
+        block_timestamp: Callable[[int], int],
+        head_block: Callable[[], int],
+    ) -> int:
+        """
+        Exact lookup for sources that can read block timestamps (JSON-RPC).
+
+        Searches only between the nearest anchors, alternating interpolation
+        and bisection steps, and indexes every block it reads.
+        """
+        below, above = self.bracket(chain, timestamp, closest)
+        lo, lo_ts = below if below else (-1, None)
+        if above:
+            hi, hi_ts = above
+        else:
+            # One past the head block: nothing mined yet lies below the boundary
+            hi, hi_ts = head_block() + 1, None
+        probed: List[Anchor] = []
+        interpolate = True
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if interpolate and lo_ts is not None and hi_ts is not None and hi_ts > lo_ts:
+                estimate = lo + (hi - lo) * (timestamp - lo_ts) // (hi_ts - lo_ts)
+                mid = min(max(estimate, lo + 1), hi - 1)
+            interpolate = not interpolate
+            mid_ts = block_timestamp(mid)
+            probed.append((mid, mid_ts))
+            if _is_below(mid_ts, timestamp, closest):
+                lo, lo_ts = mid, mid_ts
+            else:
+                hi, hi_ts = mid, mid_ts
+        self.add_anchors(chain, probed)
+        return hi if closest == "after" else max(lo, 0)
+
+
+# Singleton instance
+block_index = BlockIndex()
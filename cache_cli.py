@@ -0,0 +1,50 @@
+import argparse
+
+from cache_manager import cache_manager
+from price_store import price_store
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def print_stats() -> None:
+    report = cache_manager.report()
+    print(f"Cache: {cache_manager.db_path}")
+    print(f"Entries: {report['entries']} ({report['expired']} expired)")
+    print(f"Size: {_format_bytes(report['bytes'])} (cap {_format_bytes(cache_manager.max_bytes)})")
+    if report["hit_ratio"] is None:
+        print("Hit ratio: no reads recorded")
+    else:
+        print(f"Hit ratio: {report['hit_ratio']:.1%} ({report['hits']} hits, {report['misses']} misses)")
+    print("Age: " + ", ".join(f"{label} {count}" for label, count in report["age"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the API response cache.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show entries, size, hit ratio and entry ages.")
+    prune = commands.add_parser("prune", help="Delete expired entries and evict down to the size cap.")
+    prune.add_argument("--max-bytes", type=int, help="Size cap to evict down to (defaults to CACHE_MAX_BYTES).")
+    prune.add_argument("--vacuum", action="store_true", help="Reclaim the freed space on disk.")
+
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print_stats()
+        return
+
+    result = cache_manager.prune(max_bytes=args.max_bytes, vacuum=args.vacuum)
+    print(
+        f"Deleted {result['expired']} expired and {result['evicted']} least recently used entries; "
+        f"{_format_bytes(result['bytes'])} remain."
+    )
+    print(f"Deleted {price_store.prune()} expired price cache entries.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,129 @@
-import sqlite3
-import json
+import atexit
 import hashlib
-from typing import Optional, Any
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import compression
+import json_utils
+from config import (
+    CACHE_ACCESS_FLUSH_EVERY,
+    CACHE_BUSY_TIMEOUT,
+    CACHE_COMPRESSION,
+    CACHE_COMPRESSION_LEVEL,
+    CACHE_DB_PATH,
+    CACHE_EVICT_TARGET,
+    CACHE_MAX_BYTES,
+    CACHE_TTL_BLOCK_LOOKUP,
+    CACHE_TTL_OPEN_ENDED,
+    CACHE_WRITE_BATCH_SIZE,
+    CACHE_WRITE_INTERVAL,
+    CACHE_WRITE_QUEUE_SIZE,
+    CACHE_WRITE_RETRIES,
+)
+
+# End block the adapters use for "up to the latest block"
+OPEN_END_BLOCK = 99999999
+
+# Upper bounds (days) of the age buckets reported by `report`
+AGE_BUCKETS = (("<1h", 1 / 24), ("<1d", 1), ("<7d", 7), ("<30d", 30))
+
+# Queue item that only asks the writer to save buffered access data
+_SAVE_ACCESS = (None, None, None, None)
+
+# Query parameters that authenticate a request rather than select its data
+CREDENTIAL_PARAMS = frozenset({"apikey", "api_key", "x_cg_demo_api_key", "x_cg_pro_api_key"})
+
+
+def _is_locked(error: sqlite3.Error) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error).lower()
+
+
+def endpoint_identity(endpoint: str) -> str:
+    """
+    The endpoint without credential parameters, so the same query signed with
+    any pooled API key shares one cache entry and one in-flight request.
+    """
+    parsed = urlparse(endpoint)
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    kept = [(name, value) for name, value in query if name.lower() not in CREDENTIAL_PARAMS]
+    if len(kept) == len(query):
+        # Left untouched so entries cached before keys were stripped still match
+        return endpoint
+    return urlunparse(parsed._replace(query=urlencode(kept)))
+
+
+def ttl_for(endpoint: str) -> Optional[int]:
+    """
+    Seconds a cached response stays fresh, or None if it never expires.
+
+    Pages bounded by a fixed end block are history and immutable. Open-ended
+    pages (no end block, or the "latest" sentinel) gain records as blocks are
+    mined, and block lookups for recent timestamps move with the chain head.
+    """
+    params = dict(parse_qsl(urlparse(endpoint_identity(endpoint)).query))
+    if params.get("module") == "block":
+        return CACHE_TTL_BLOCK_LOOKUP
+    try:
+        end_block = int(params["endblock"])
+    except (KeyError, ValueError):
+        return CACHE_TTL_OPEN_ENDED
+    return CACHE_TTL_OPEN_ENDED if end_block >= OPEN_END_BLOCK else None
+
 
 class CacheManager:
-    def __init__(self, db_path: str = "cache/api_cache.db"):
+    """
+    Persistent cache of explorer API responses.
+
+    The database runs in WAL mode, so readers do not wait for the writer. Each
+    thread reuses one connection, and writes are queued for a background
+    thread that commits them in batches (write-behind), gathering what
+    arrives within `write_interval` seconds into one transaction; queued
+    writes are served from memory until they are committed.
+
+    Entries expire according to the TTL they were stored with (fetch_data
+    uses finality.page_ttl, other callers `ttl_for`), and once the cache
+    grows past CACHE_MAX_BYTES the least recently read entries are evicted.
+    """
+
+    def __init__(
+        self,
+        db_path: str = CACHE_DB_PATH,
+        max_bytes: int = CACHE_MAX_BYTES,
+        codec: str = CACHE_COMPRESSION,
+        write_interval: float = CACHE_WRITE_INTERVAL,
+    ):
         self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.write_interval = write_interval
+        self.compression = compression.resolve_format(codec)
+        self._local = threading.local()
+        # (db_path, key) -> payload of writes not committed yet
+        self._pending: Dict[Tuple[str, str], bytes] = {}
+        # Reads not saved yet: last access per (db_path, key), hit/miss counts per db_path
+        self._accessed: Dict[Tuple[str, str], float] = {}
+        self._access_counts: Dict[str, Dict[str, int]] = {}
+        self._buffered_reads = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[Any, Any, Any, Any]]" = queue.Queue(maxsize=CACHE_WRITE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        # Running size estimate per database, to know when to evict
+        self._sizes: Dict[str, int] = {}
+        self._counters = {
+            "hits": 0, "misses": 0, "lock_contention": 0, "dropped_writes": 0, "writes": 0, "batches": 0, "evicted": 0,
+        }
         self._init_db()
 
     def _init_db(self):
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, timeout=CACHE_BUSY_TIMEOUT) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute(
                 "CREATE TABLE IF NOT EXISTS api_responses ("
                 "key TEXT PRIMARY KEY, "
@@ -18,35 +131,331 @@ class CacheManager:
                 "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP"
                 ")"
             )
+            # Columns added after the first release; rows from before have NULLs
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(api_responses)")}
+            # format: compression of the response (compression.PLAIN for NULL, e.g. legacy text rows)
+            for column, column_type in (
+                ("expires_at", "REAL"), ("last_access", "REAL"), ("size", "INTEGER"), ("format", "INTEGER"),
+            ):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE api_responses ADD COLUMN {column} {column_type}")
+            if "size" not in columns:
+                conn.execute("UPDATE api_responses SET size = length(CAST(response AS BLOB))")
+            # Covers the size total and the LRU scan without reading the response pages
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_api_responses_lru ON api_responses (last_access, size)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_api_responses_expires_at ON api_responses (expires_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_counters (name TEXT PRIMARY KEY, value INTEGER)")
+
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(db_path, timeout=CACHE_BUSY_TIMEOUT, isolation_level=None)
+        # With WAL, NORMAL only risks the last commits on an OS crash, never corruption
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """The calling thread's connection to the current database."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.db_path != self.db_path:
+            if conn is not None:
+                conn.close()
+            conn = self._connect(self.db_path)
+            self._local.conn, self._local.db_path = conn, self.db_path
+        return conn
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += amount
+
+    def stats(self) -> Dict[str, int]:
+        """This process's hits, misses, lock contention, writes and evictions, and writes still queued."""
+        with self._lock:
+            return dict(self._counters, pending=len(self._pending))
 
     def _get_key(self, endpoint: str) -> str:
-        return hashlib.sha256(endpoint.encode()).hexdigest()
+        return hashlib.sha256(endpoint_identity(endpoint).encode()).hexdigest()
 
-    def get_response(self, endpoint: str) -> Optional[Any]:
+    def _record_access(self, key: str, hit: bool) -> None:
+        with self._lock:
+            self._counters["hits" if hit else "misses"] += 1
+            counts = self._access_counts.setdefault(self.db_path, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+            if hit:
+                self._accessed[(self.db_path, key)] = time.time()
+            self._buffered_reads += 1
+            save = self._buffered_reads == CACHE_ACCESS_FLUSH_EVERY
+        if save:
+            self._ensure_writer()
+            try:
+                self._queue.put_nowait(_SAVE_ACCESS)
+            except queue.Full:
+                # The writer is busy and saves the access data with its next batch anyway
+                pass
+
+    def get_response_bytes(self, endpoint: str) -> Optional[bytes]:
+        """Returns the cached response body exactly as it was stored (decompressed)."""
         if os.getenv("DISABLE_CACHE", "").lower() == "true":
             return None
         key = self._get_key(endpoint)
+        with self._lock:
+            pending = self._pending.get((self.db_path, key))
+        if pending is not None:
+            return pending
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("SELECT response FROM api_responses WHERE key = ?", (key,))
-                row = cursor.fetchone()
-                if row:
-                    return json.loads(row[0])
-        except Exception:
-            pass
+            row = self._connection().execute(
+                "SELECT response, expires_at, format FROM api_responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            if _is_locked(e):
+                self._count("lock_contention")
+            logging.debug(f"Cache read failed for {endpoint}: {e}")
+            return None
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            self._record_access(key, hit=False)
+            return None
+        try:
+            raw = compression.decompress(row[0], row[2])
+        except (ValueError, zlib.error) as e:
+            logging.warning(f"Unreadable cache entry for {endpoint}: {e}")
+            self._record_access(key, hit=False)
+            return None
+        self._record_access(key, hit=True)
+        return raw
+
+    def get_response(self, endpoint: str) -> Optional[Any]:
+        raw = self.get_response_bytes(endpoint)
+        if raw:
+            try:
+                return json_utils.loads(raw)
+            except Exception:
+                pass
         return None
 
-    def set_response(self, endpoint: str, response: Any):
+    def set_response(self, endpoint: str, response: Union[bytes, Any], ttl: Optional[int] = -1):
+        """
+        Caches a response; raw bytes are stored without re-serializing. The
+        write is compressed and committed in the background.
+
+        `ttl` overrides the endpoint's class TTL (`ttl_for`); None never expires.
+        """
         key = self._get_key(endpoint)
+        payload = bytes(response) if isinstance(response, (bytes, bytearray)) else json_utils.dumps(response)
+        if ttl == -1:
+            ttl = ttl_for(endpoint)
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._pending[(self.db_path, key)] = payload
+        self._ensure_writer()
+        # Blocks only when the writer is CACHE_WRITE_QUEUE_SIZE writes behind
+        self._queue.put((self.db_path, key, payload, expires_at))
+
+    def flush(self) -> None:
+        """Waits until every queued write and buffered access has been saved (or dropped)."""
+        if self._writer is None or not self._writer.is_alive():
+            if not self._accessed and not self._access_counts:
+                return
+            self._ensure_writer()
+        self._queue.put(_SAVE_ACCESS)
+        self._queue.join()
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="cache-writer", daemon=True)
+                self._writer.start()
+
+    # Background writer
+
+    def _write_loop(self) -> None:
+        connections: Dict[str, sqlite3.Connection] = {}
+        while True:
+            # Writes arriving within the interval go out together; a flush request commits at once
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.write_interval
+            while len(batch) < CACHE_WRITE_BATCH_SIZE and batch[-1] is not _SAVE_ACCESS:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch([item for item in batch if item[1] is not None], connections)
+                self._save_access(connections)
+            except Exception as e:
+                logging.warning(f"Cache writer error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _run_write(self, connections: Dict[str, sqlite3.Connection], db_path: str, statements: List[Tuple[str, list]]) -> bool:
+        """Runs statements in one transaction, retrying while the database is locked."""
+        for attempt in range(1, CACHE_WRITE_RETRIES + 1):
+            try:
+                if db_path not in connections:
+                    connections[db_path] = self._connect(db_path)
+                conn = connections[db_path]
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for sql, rows in statements:
+                        conn.executemany(sql, rows)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+                return True
+            except sqlite3.Error as e:
+                if _is_locked(e):
+                    self._count("lock_contention")
+                    if attempt < CACHE_WRITE_RETRIES:
+                        time.sleep(0.1 * attempt)
+                        continue
+                logging.warning(f"Cache write to {db_path} failed: {e}")
+                return False
+        return False
+
+    def _write_batch(self, batch: List[Tuple[str, str, bytes, Optional[float]]], connections: Dict[str, sqlite3.Connection]) -> None:
+        rows_by_path: Dict[str, List[tuple]] = {}
+        payloads_by_path: Dict[str, List[Tuple[str, bytes]]] = {}
+        now = time.time()
+        for db_path, key, payload, expires_at in batch:
+            # Compressed here, off the request path
+            stored, fmt = compression.compress(payload, self.compression, CACHE_COMPRESSION_LEVEL)
+            rows_by_path.setdefault(db_path, []).append((key, stored, fmt, expires_at, now, len(stored)))
+            payloads_by_path.setdefault(db_path, []).append((key, payload))
+
+        for db_path, rows in rows_by_path.items():
+            written = self._run_write(connections, db_path, [(
+                "INSERT OR REPLACE INTO api_responses (key, response, format, expires_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )])
+            if written:
+                self._count("writes", len(rows))
+                self._count("batches")
+            else:
+                self._count("dropped_writes", len(rows))
+
+            with self._lock:
+                for key, payload in payloads_by_path[db_path]:
+                    # A newer write of the same key stays pending
+                    if self._pending.get((db_path, key)) is payload:
+                        del self._pending[(db_path, key)]
+
+            if written:
+                self._enforce_size_cap(connections[db_path], db_path, sum(row[5] for row in rows))
+
+    def _save_access(self, connections: Dict[str, sqlite3.Connection]) -> None:
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            counts, self._access_counts = self._access_counts, {}
+            self._buffered_reads = 0
+        touched_by_path: Dict[str, List[Tuple[float, str]]] = {}
+        for (db_path, key), accessed_at in accessed.items():
+            touched_by_path.setdefault(db_path, []).append((accessed_at, key))
+        for db_path in set(touched_by_path) | set(counts):
+            self._run_write(connections, db_path, [
+                ("UPDATE api_responses SET last_access = ? WHERE key = ?", touched_by_path.get(db_path, [])),
+                (
+                    "INSERT INTO cache_counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(counts.get(db_path, {}).items()),
+                ),
+            ])
+
+    def _enforce_size_cap(self, conn: sqlite3.Connection, db_path: str, added: int) -> None:
+        if db_path not in self._sizes:
+            self._sizes[db_path] = _total_bytes(conn)
+        else:
+            # Replaced rows are not subtracted, so this overestimates; eviction recounts
+            self._sizes[db_path] += added
+        if self._sizes[db_path] > self.max_bytes:
+            evicted, self._sizes[db_path] = _evict(conn, int(self.max_bytes * CACHE_EVICT_TARGET))
+            self._count("evicted", evicted)
+            logging.info(f"Cache over {self.max_bytes} bytes: evicted {evicted} least recently used entries.")
+
+    # Maintenance (cache_cli.py)
+
+    def prune(self, max_bytes: Optional[int] = None, vacuum: bool = False) -> Dict[str, int]:
+        """
+        Deletes expired entries, then the least recently read ones while the
+        cache is larger than `max_bytes`; optionally vacuums the file.
+        """
+        self.flush()
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        conn = self._connect(self.db_path)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    "INSERT OR REPLACE INTO api_responses (key, response) VALUES (?, ?)",
-                    (key, json.dumps(response))
-                )
-        except Exception:
-            pass
+            expired = conn.execute(
+                "DELETE FROM api_responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+            evicted, remaining = (0, _total_bytes(conn))
+            if remaining > max_bytes:
+                evicted, remaining = _evict(conn, int(max_bytes * CACHE_EVICT_TARGET))
+            if vacuum:
+                conn.execute("VACUUM")
+        finally:
+            conn.close()
+        self._sizes.pop(self.db_path, None)
+        return {"expired": expired, "evicted": evicted, "bytes": remaining}
+
+    def report(self) -> Dict[str, Any]:
+        """Entries, bytes, expired entries, hit ratio over all runs and entry ages."""
+        self.flush()
+        conn = self._connect(self.db_path)
+        try:
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM api_responses"
+            ).fetchone()
+            expired = conn.execute(
+                "SELECT COUNT(*) FROM api_responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).fetchone()[0]
+            counters = dict(conn.execute("SELECT name, value FROM cache_counters").fetchall())
+            cases = " ".join(f"WHEN age < {limit} THEN '{label}'" for label, limit in AGE_BUCKETS)
+            ages = dict(conn.execute(
+                f"SELECT CASE {cases} ELSE 'older' END AS bucket, COUNT(*) FROM ("
+                "SELECT julianday('now') - julianday(timestamp) AS age FROM api_responses"
+                ") GROUP BY bucket"
+            ).fetchall())
+        finally:
+            conn.close()
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "bytes": total,
+            "expired": expired,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+            "age": {label: ages.get(label, 0) for label in [label for label, _ in AGE_BUCKETS] + ["older"]},
+        }
+
+
+def _total_bytes(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(SUM(size), 0) FROM api_responses").fetchone()[0]
+
+
+def _evict(conn: sqlite3.Connection, target_bytes: int) -> Tuple[int, int]:
+    """Deletes least recently read entries (never-read legacy rows first) until at most target_bytes remain."""
+    total = _total_bytes(conn)
+    evicted = 0
+    while total > target_bytes:
+        rows = conn.execute(
+            "SELECT rowid, size FROM api_responses ORDER BY last_access LIMIT 500"
+        ).fetchall()
+        if not rows:
+            break
+        victims = []
+        for rowid, size in rows:
+            if total <= target_bytes:
+                break
+            victims.append((rowid,))
+            total -= size or 0
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("DELETE FROM api_responses WHERE rowid = ?", victims)
+        conn.execute("COMMIT")
+        evicted += len(victims)
+    return evicted, total
+
 
-import os
 # Singleton instance
 cache_manager = CacheManager()
+atexit.register(cache_manager.flush)
@@ -0,0 +1,174 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    CACHE_BUSY_TIMEOUT,
+    COINGECKO_BASE_URL,
+    COIN_INDEX_DB_PATH,
+    COIN_INDEX_RETRY_AFTER,
+    COIN_INDEX_TTL,
+    TIMEOUT,
+)
+from http_sessions import PRICES, session_registry
+
+
+class CoinIndexUnavailable(Exception):
+    """The coin list could not be downloaded and no stored copy exists."""
+
+
+class CoinIndex:
+    """
+    Local copy of CoinGecko's coin list (/coins/list?include_platform=true).
+
+    Maps (platform, contract address) to a coin ID and a symbol to its
+    candidate coin IDs, both in memory. The list is persisted with the time it
+    was downloaded and downloaded again once older than COIN_INDEX_TTL; if that
+    fails, the stored copy is used; without one, lookups raise
+    CoinIndexUnavailable without downloading again for `retry_after` seconds.
+    One download serves every lookup, so resolving IDs costs no requests.
+    """
+
+    def __init__(
+        self, db_path: str = COIN_INDEX_DB_PATH, ttl: float = COIN_INDEX_TTL, retry_after: float = COIN_INDEX_RETRY_AFTER
+    ):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.retry_after = retry_after
+        # (time before which lookups fail fast, reason) after a failed download with no stored copy
+        self._unavailable: Optional[Tuple[float, str]] = None
+        self._by_contract: Dict[Tuple[str, str], str] = {}
+        self._by_symbol: Dict[str, List[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with sqlite3.connect(self.db_path, timeout=CACHE_BUSY_TIMEOUT) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coin_platforms ("
+                "platform TEXT, "
+                "contract TEXT, "
+                "coin_id TEXT, "
+                "PRIMARY KEY (platform, contract)"
+                ")"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS coin_symbols (symbol TEXT, coin_id TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS coin_index_meta (name TEXT PRIMARY KEY, value REAL)")
+
+    @staticmethod
+    def _disabled() -> bool:
+        return os.getenv("DISABLE_CACHE", "").lower() == "true"
+
+    def coin_id_for_contract(self, platform: str, contract_address: str) -> Optional[str]:
+        self._ensure_loaded()
+        return self._by_contract.get((platform, contract_address.lower()))
+
+    def candidates_for_symbol(self, symbol: str) -> List[str]:
+        """Coin IDs listed under a symbol (case-insensitive), in list order."""
+        self._ensure_loaded()
+        return list(self._by_symbol.get(symbol.lower(), ()))
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded_at is not None and time.time() - self._loaded_at < self.ttl:
+            return
+        self._check_unavailable()
+        with self._lock:
+            if self._loaded_at is not None and time.time() - self._loaded_at < self.ttl:
+                return
+            self._check_unavailable()
+            stored_at = self._load_stored()
+            if stored_at is not None and time.time() - stored_at < self.ttl:
+                return
+            try:
+                coins = self._download()
+            except Exception as e:
+                if stored_at is None:
+                    logging.warning(
+                        f"Downloading the Coingecko coin list failed; not retrying for {self.retry_after:.0f}s: {e}"
+                    )
+                    self._unavailable = (time.time() + self.retry_after, str(e))
+                    raise CoinIndexUnavailable(str(e)) from e
+                logging.warning(f"Refreshing the Coingecko coin list failed, using the stored copy: {e}")
+                # Retry after another TTL rather than on every lookup
+                self._loaded_at = time.time()
+                return
+            self._unavailable = None
+            self._store(coins)
+
+    def _check_unavailable(self) -> None:
+        unavailable = self._unavailable
+        if unavailable is not None and time.time() < unavailable[0]:
+            raise CoinIndexUnavailable(unavailable[1])
+
+    def _load_stored(self) -> Optional[float]:
+        """Loads the persisted list into memory; returns when it was downloaded, or None."""
+        if self._disabled():
+            return None
+        with sqlite3.connect(self.db_path, timeout=CACHE_BUSY_TIMEOUT) as conn:
+            row = conn.execute("SELECT value FROM coin_index_meta WHERE name = 'refreshed_at'").fetchone()
+            if row is None:
+                return None
+            platforms = conn.execute("SELECT platform, contract, coin_id FROM coin_platforms").fetchall()
+            symbols = conn.execute("SELECT symbol, coin_id FROM coin_symbols ORDER BY rowid").fetchall()
+        self._set(platforms, symbols)
+        self._loaded_at = row[0]
+        return row[0]
+
+    @staticmethod
+    def _download() -> List[dict]:
+        url = f"{COINGECKO_BASE_URL}/coins/list"
+        api_key = os.getenv("COINGECKO_API_KEY")
+        headers = {"x-cg-demo-api-key": api_key} if api_key else {}
+        session = session_registry.get(PRICES)
+        for _ in range(3):
+            response = session.get(url, params={"include_platform": "true"}, headers=headers, timeout=TIMEOUT)
+            if response.status_code != 429:
+                break
+            logging.warning("Coingecko rate limit exceeded. Sleeping for 30 seconds.")
+            time.sleep(30)
+        response.raise_for_status()
+        return response.json()
+
+    def _store(self, coins: List[dict]) -> None:
+        platforms = {}
+        symbols = []
+        for coin in coins:
+            coin_id = coin.get("id")
+            if not coin_id:
+                continue
+            if coin.get("symbol"):
+                symbols.append((coin["symbol"].lower(), coin_id))
+            for platform, contract in (coin.get("platforms") or {}).items():
+                if platform and contract:
+                    # First listing wins, like CoinGecko's own contract lookup
+                    platforms.setdefault((platform, contract.lower()), coin_id)
+        platform_rows = [(platform, contract, coin_id) for (platform, contract), coin_id in platforms.items()]
+        now = time.time()
+        try:
+            with sqlite3.connect(self.db_path, timeout=CACHE_BUSY_TIMEOUT) as conn:
+                conn.execute("DELETE FROM coin_platforms")
+                conn.execute("DELETE FROM coin_symbols")
+                conn.executemany("INSERT INTO coin_platforms (platform, contract, coin_id) VALUES (?, ?, ?)", platform_rows)
+                conn.executemany("INSERT INTO coin_symbols (symbol, coin_id) VALUES (?, ?)", symbols)
+                conn.execute("INSERT OR REPLACE INTO coin_index_meta (name, value) VALUES ('refreshed_at', ?)", (now,))
+        except sqlite3.Error as e:
+            logging.warning(f"Could not persist the Coingecko coin list: {e}")
+        self._set(platform_rows, symbols)
+        self._loaded_at = now
+        logging.info(f"Coingecko coin list: {len(coins)} coins, {len(platform_rows)} contracts")
+
+    def _set(self, platform_rows, symbol_rows) -> None:
+        by_symbol: Dict[str, List[str]] = {}
+        for symbol, coin_id in symbol_rows:
+            by_symbol.setdefault(symbol, []).append(coin_id)
+        self._by_contract = {(platform, contract): coin_id for platform, contract, coin_id in platform_rows}
+        self._by_symbol = by_symbol
+
+
+# Singleton instance
+coin_index = CoinIndex()
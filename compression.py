@@ -0,0 +1,51 @@
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional; zlib is the fallback
+    zstandard = None
+
+# Payload formats stored next to compressed data; rows without one are plain
+PLAIN = 0
+ZLIB = 1
+ZSTD = 2
+
+CODECS = {"none": PLAIN, "zlib": ZLIB, "zstd": ZSTD}
+
+
+def default_format() -> int:
+    """zstd when installed, zlib otherwise."""
+    return ZSTD if zstandard is not None else ZLIB
+
+
+def resolve_format(name: str) -> int:
+    """Maps a configured codec name ("auto", "zstd", "zlib", "none") to a format."""
+    if name == "auto":
+        return default_format()
+    if name not in CODECS:
+        raise ValueError(f"Unknown compression codec: {name}")
+    if CODECS[name] == ZSTD and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+    return CODECS[name]
+
+
+def compress(data: bytes, fmt: int, level: Optional[int] = None) -> Tuple[bytes, int]:
+    """Compresses data; `level` None uses the codec's default. Returns the payload and its format."""
+    if fmt == ZSTD:
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return compressor.compress(data), ZSTD
+    if fmt == ZLIB:
+        return zlib.compress(data, -1 if level is None else level), ZLIB
+    return data, PLAIN
+
+
+def decompress(data: bytes, fmt: Optional[int]) -> bytes:
+    if fmt == ZSTD:
+        if zstandard is None:
+            raise ValueError("payload is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if fmt == ZLIB:
+        return zlib.decompress(data)
+    # Plain payloads, including text rows written before formats existed
+    return data.encode() if isinstance(data, str) else data
@@ -8,6 +8,12 @@ EXPLORER_URLS = {
     'polygon': 'https://api.polygonscan.com/api',
 }
 
+# Equivalent Etherscan-compatible endpoints per chain, used after EXPLORER_URLS[chain]
+# for failover and hedged requests (API keys are only sent to the primary endpoint)
+EXPLORER_FALLBACK_URLS = {
+    'mintchain': ['https://explorer.mintchain.io/api'],
+}
+
 # Explorer API keys
 EXPLORER_API_KEYS = {
     'etherscan': 'ETHERSCAN_API_KEY',
@@ -58,9 +64,184 @@ DEFILLAMA_PLATFORM_MAP = {
     "mintchain": "mint-blockchain",
 }
 
+# CoinGecko lookups: "history" (one /coins/{id}/history call per coin and day) or "range" (one
+# /coins/{id}/market_chart/range call per coin and window, answered locally by binary search).
+# The COINGECKO_PRICE_MODE environment variable overrides it.
+COINGECKO_PRICE_MODE: str = "history"
+# Range mode bucket: "day" (one window per calendar year) or "hour" (90-day windows, the longest served hourly)
+COINGECKO_RANGE_GRANULARITY: str = "day"
+
+# DefiLlama batchHistorical: (coin, timestamp) pairs per request, requests in flight at once,
+# and how far (seconds) from a timestamp a price point may lie
+DEFILLAMA_BATCH_SIZE: int = 100
+DEFILLAMA_BATCH_WORKERS: int = 4
+DEFILLAMA_SEARCH_WIDTH: int = 21600
+
+# Price source used for net worth: "coingecko" or "defillama" (the PRICE_SOURCE environment variable overrides it)
+PRICE_SOURCE: str = "coingecko"
+
+# Persistent price cache shared by runs and worker processes (SQLite, WAL mode)
+PRICE_CACHE_DB_PATH: str = "cache/prices.db"
+# Seconds a "no price" answer is kept before the source is asked again
+PRICE_NEGATIVE_TTL: int = 86400
+# Seconds a price for a bucket that has not ended yet (e.g. today) stays fresh
+PRICE_OPEN_BUCKET_TTL: int = 3600
+# Local copy of CoinGecko's coin list (contract -> coin ID), kept in the price cache database
+COIN_INDEX_DB_PATH: str = PRICE_CACHE_DB_PATH
+# Seconds before the coin list is downloaded again
+COIN_INDEX_TTL: int = 7 * 86400
+# Seconds lookups fail fast after a coin-list download failed with no stored copy
+COIN_INDEX_RETRY_AFTER: int = 600
+
 # Timeout value (in seconds)
 TIMEOUT: int = 10
 
 # Custom RPC URLs (optional, override default explorer URLs)
 # Format: {"chain_name": "https://custom-rpc-url.com"}
 # Can also be set via RPC_URL_{CHAIN_NAME} environment variable
+
+# Worker threads for the default (thread pool) engine
+MAX_WORKERS: int = 10
+
+# Async engine: cap on in-flight requests per explorer host
+MAX_CONCURRENT_REQUESTS_PER_HOST: int = 8
+
+# Async engine: cap on wallets processed concurrently on the event loop
+ASYNC_MAX_CONCURRENT_WALLETS: int = 200
+
+# Async engine: threads for blocking work (block and price lookups, writers; all HTTP calls without aiohttp)
+ASYNC_IO_WORKERS: int = 64
+
+# Shared explorer rate limiter (per chain and API key, across all workers)
+RATE_LIMIT_REQUESTS_PER_SECOND: float = 5.0
+RATE_LIMIT_BURST: int = 5
+# Pause applied to all workers when a rate-limit response carries no Retry-After
+RATE_LIMIT_COOLDOWN: float = 1.0
+
+# Block-range sharded fetching (--sharded)
+# Explorer result window: page * offset may not exceed this
+RESULT_WINDOW: int = 10000
+# Initial number of block-range shards per endpoint and threads fetching them
+SHARD_COUNT: int = 8
+SHARD_WORKERS: int = 8
+# Page size used when a single block holds more rows than one page
+SINGLE_BLOCK_PAGE_SIZE: int = 1000
+
+# API key pools: ETHERSCAN_API_KEYS=k1,k2,k3 (plural of the variable above) adds keys
+# Key selection: "round_robin" or "least_used"
+API_KEY_STRATEGY: str = "round_robin"
+# Daily call quota per key (free explorer tiers allow 100k calls/day)
+API_KEY_DEFAULT_DAILY_QUOTA: int = 100000
+API_KEY_DAILY_QUOTAS: dict = {}
+# How long a key is parked after a rate-limit or invalid-key response (seconds)
+API_KEY_RATE_LIMIT_PARK_SECONDS: float = 60.0
+API_KEY_INVALID_PARK_SECONDS: float = 86400.0
+# Persisted per-key daily usage (keys are stored hashed)
+API_KEY_USAGE_DB_PATH: str = "cache/api_key_usage.db"
+API_KEY_USAGE_FLUSH_EVERY: int = 25
+
+# HTTP connection pools (one keep-alive pool per host, per session)
+# Number of per-host pools each adapter keeps
+HTTP_POOL_CONNECTIONS: int = 16
+# Connections per explorer host: enough for every thread that can call it at once
+EXPLORER_POOL_MAXSIZE: int = max(MAX_WORKERS, ASYNC_IO_WORKERS) + SHARD_WORKERS
+# Connections per price API host (CoinGecko, DefiLlama)
+PRICE_POOL_MAXSIZE: int = MAX_WORKERS
+
+# Adaptive page size for paginated explorer queries
+# Per-chain (min, max) page size; other chains use (MIN_PAGE_SIZE, 10000)
+MIN_PAGE_SIZE: int = 100
+PAGE_SIZE_BOUNDS = {
+    'mintchain': (500, 10000),
+}
+# A page slower than this shrinks the next page; one faster than FAST grows it
+SLOW_PAGE_SECONDS: float = TIMEOUT * 0.5
+FAST_PAGE_SECONDS: float = TIMEOUT * 0.1
+
+# Incremental sync (--incremental): per-wallet high-water marks; the records live in the record store
+SYNC_STATE_DB_PATH: str = "cache/sync_state.db"
+# Blocks below the high-water mark that are refetched each run, in case of reorgs
+SYNC_REORG_MARGIN: int = 64
+
+# Finality: seconds until a block can no longer be reorged, per chain (others use FINALITY_DEFAULT_SECONDS)
+# Ethereum finalizes after two epochs (~13 minutes); rollup blocks once their batch is finalized on L1
+FINALITY_SECONDS = {
+    'etherscan': 900,
+    'polygon': 1800,
+    'basescan': 1800,
+    'arbiscan': 1800,
+    'optimism': 1800,
+    'mintchain': 1800,
+}
+FINALITY_DEFAULT_SECONDS: int = 3600
+# Safety margin added on top of the finality delay
+FINALITY_MARGIN_SECONDS: int = 600
+
+# Record store: explorer records per (chain, wallet, endpoint, block) and the block ranges already fetched
+RECORD_STORE_DB_PATH: str = "cache/records.db"
+
+# API response cache (SQLite, WAL mode)
+CACHE_DB_PATH: str = "cache/api_cache.db"
+# Seconds a connection waits on a locked database before giving up
+CACHE_BUSY_TIMEOUT: float = 10.0
+# Write-behind: inserts are committed in batches by a background thread, each
+# batch gathering up to CACHE_WRITE_BATCH_SIZE writes over CACHE_WRITE_INTERVAL seconds
+CACHE_WRITE_BATCH_SIZE: int = 200
+CACHE_WRITE_INTERVAL: float = 0.5
+CACHE_WRITE_QUEUE_SIZE: int = 1000
+# Attempts per batch when the database is locked, before its writes are dropped
+CACHE_WRITE_RETRIES: int = 3
+# Payload compression: "auto" (zstd when the zstandard package is installed, else zlib), "zstd", "zlib" or "none"
+CACHE_COMPRESSION: str = "auto"
+# Codec level; None uses the codec's default (zlib 6, zstd 3)
+CACHE_COMPRESSION_LEVEL = None
+# Freshness (seconds) of pages that reach past the finalized head; pages of final blocks never expire
+CACHE_TTL_OPEN_ENDED: int = 600
+CACHE_TTL_BLOCK_LOOKUP: int = 3600
+# Size cap; past it the least recently read entries are evicted down to CACHE_EVICT_TARGET of the cap
+CACHE_MAX_BYTES: int = 5 * 1024 ** 3
+CACHE_EVICT_TARGET: float = 0.9
+# Cache reads whose last-access times and hit counts are buffered before being written
+CACHE_ACCESS_FLUSH_EVERY: int = 500
+
+# Date-to-block resolution: block <-> timestamp anchors, kept in the API cache database
+BLOCK_INDEX_DB_PATH: str = CACHE_DB_PATH
+# Widest anchor bracket (in blocks) answered from the index instead of the network
+BLOCK_INDEX_MAX_GAP: int = 1000
+# Explorer answers are only persisted for timestamps at least this old
+BLOCK_INDEX_SETTLED_SECONDS: int = 3600
+
+# JSON-RPC backend (--backend rpc): node used when neither --rpc-url nor RPC_URL_<CHAIN> is set;
+# --receipts also reads these unless RECEIPT_NODE_URL_<CHAIN> is set
+RPC_NODE_URLS = {
+    'mintchain': 'https://rpc.mintchain.io',
+    'etherscan': 'https://ethereum-rpc.publicnode.com',
+    'basescan': 'https://mainnet.base.org',
+    'arbiscan': 'https://arb1.arbitrum.io/rpc',
+    'optimism': 'https://mainnet.optimism.io',
+    'polygon': 'https://polygon-rpc.com',
+}
+# Requests per JSON-RPC batch
+RPC_BATCH_SIZE: int = 100
+# Initial eth_getLogs block span; ranges the node rejects as too large are halved
+RPC_LOG_BLOCK_RANGE: int = 10000
+# Widest block range scanned for native transfers, which costs one eth_getBlockByNumber per block
+# (about a year of 2-second blocks); a wider range fails the wallet, so narrow it with --start-date/--end-date
+RPC_MAX_NATIVE_SCAN_BLOCKS: int = 20000000
+
+# Receipt enrichment (--receipts): exact gasUsed, effectiveGasPrice and OP-stack l1Fee
+# Receipts are immutable, so they are cached permanently
+RECEIPT_CACHE_DB_PATH: str = "cache/receipts.db"
+# JSON-RPC batches of receipts in flight at once
+RECEIPT_WORKERS: int = 4
+
+# Explorer endpoint health (chains with EXPLORER_FALLBACK_URLS)
+# Consecutive failures that open an endpoint's circuit, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD: int = 5
+CIRCUIT_RESET_SECONDS: float = 30.0
+# A duplicate request goes to the next endpoint once the first exceeds its p95 latency
+HEDGE_MIN_SAMPLES: int = 20
+# Hedge delay until an endpoint has HEDGE_MIN_SAMPLES latency samples
+HEDGE_DEFAULT_DELAY: float = TIMEOUT * 0.3
+HEDGE_WORKERS: int = 16
+
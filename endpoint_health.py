@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    EXPLORER_FALLBACK_URLS,
+    EXPLORER_URLS,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MIN_SAMPLES,
+)
+
+# Latency samples kept per endpoint for the p95 estimate
+LATENCY_WINDOW = 200
+
+
+def _base_url(endpoint: str) -> str:
+    parsed = urlparse(endpoint)
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    Opens after `failure_threshold` consecutive failures. Once `reset_seconds`
+    have passed, requests are let through again (half-open): a success closes
+    the circuit, a failure opens it for another `reset_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                # Also re-opens a half-open circuit, whose failure count is still over the threshold
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling latency samples of one endpoint."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class EndpointHealth:
+    """
+    Circuit breakers and latency statistics for the equivalent explorer
+    endpoints of each chain (EXPLORER_URLS plus EXPLORER_FALLBACK_URLS).
+    """
+
+    def __init__(self, endpoints: Optional[Dict[str, List[str]]] = None):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self.set_endpoints(endpoints)
+
+    def set_endpoints(self, endpoints: Optional[Dict[str, List[str]]] = None) -> None:
+        """Replaces the per-chain endpoint lists; defaults to the configured ones."""
+        if endpoints is None:
+            endpoints = {
+                chain: [url, *EXPLORER_FALLBACK_URLS.get(chain, [])] for chain, url in EXPLORER_URLS.items()
+            }
+        # Every endpoint of a chain maps to the chain's full ordered list
+        self._alternatives: Dict[str, List[str]] = {
+            url: urls for urls in endpoints.values() if len(urls) > 1 for url in urls
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+            self._latencies.clear()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        base = _base_url(endpoint)
+        with self._lock:
+            if base not in self._breakers:
+                self._breakers[base] = CircuitBreaker()
+            return self._breakers[base]
+
+    def latency(self, endpoint: str) -> LatencyTracker:
+        base = _base_url(endpoint)
+        with self._lock:
+            if base not in self._latencies:
+                self._latencies[base] = LatencyTracker()
+            return self._latencies[base]
+
+    def record_success(self, endpoint: str, seconds: float) -> None:
+        self.breaker(endpoint).record_success()
+        self.latency(endpoint).record(seconds)
+
+    def record_failure(self, endpoint: str) -> None:
+        self.breaker(endpoint).record_failure()
+
+    def hedge_delay(self, endpoint: str) -> float:
+        p95 = self.latency(endpoint).p95()
+        return HEDGE_DEFAULT_DELAY if p95 is None else p95
+
+    @staticmethod
+    def _rebase(endpoint: str, base: str) -> str:
+        """The same query against another endpoint, without the primary's API key."""
+        parsed = urlparse(endpoint)
+        query = [(name, value) for name, value in parse_qsl(parsed.query) if name != "apikey"]
+        target = urlparse(base)
+        return urlunparse(parsed._replace(scheme=target.scheme, netloc=target.netloc, path=target.path, query=urlencode(query)))
+
+    def has_alternatives(self, endpoint: str) -> bool:
+        return _base_url(endpoint) in self._alternatives
+
+    def candidates(self, endpoint: str) -> List[str]:
+        """
+        The URLs to try for a request, in order: the endpoint itself and its
+        chain's equivalents, skipping endpoints whose circuit is open. If every
+        circuit is open the original endpoint is still returned.
+        """
+        bases = self._alternatives.get(_base_url(endpoint))
+        if not bases:
+            return [endpoint]
+        own_base = _base_url(endpoint)
+        ordered = [endpoint] + [self._rebase(endpoint, base) for base in bases if base != own_base]
+        allowed = [url for url in ordered if self.breaker(url).allow()]
+        return allowed or [endpoint]
+
+
+# Singleton instance
+endpoint_health = EndpointHealth()
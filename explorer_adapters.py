@@ -1,173 +1,465 @@
+import asyncio
+import logging
 import os
+import time
 import requests
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Type, TypeVar
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
 from urllib.parse import urlencode
 
 from pydantic import BaseModel
 
-from config import EXPLORER_API_KEYS, EXPLORER_URLS, TIMEOUT
-from fetch_blockchain_data import fetch_data, session
+from api_key_pool import api_key_manager
+from block_index import block_index
+from config import (
+    EXPLORER_URLS,
+    FAST_PAGE_SECONDS,
+    MIN_PAGE_SIZE,
+    PAGE_SIZE_BOUNDS,
+    RESULT_WINDOW,
+    SHARD_COUNT,
+    SHARD_WORKERS,
+    SINGLE_BLOCK_PAGE_SIZE,
+    SLOW_PAGE_SECONDS,
+)
+from fetch_blockchain_data import (
+    HostConcurrencyLimiter,
+    async_fetch_data,
+    async_fetch_data_once,
+    failed_fetch_count,
+    fetch_data,
+    fetch_data_once,
+    send_explorer_request,
+    session,
+)
+from single_flight import SingleFlight
 from models import Raw1155Transfer, RawNFTTransfer, RawTokenTransfer, RawTransaction
+from record_store import record_store
+
+if TYPE_CHECKING:
+    import aiohttp
 
 T = TypeVar("T", bound=BaseModel)
 
+# Default max per page for Etherscan-like APIs
+DEFAULT_PAGE_SIZE = 10000
+
+# Page sizes the adaptive controller moves between. Each one divides the one
+# before it, so the rows already fetched always map onto whole pages.
+PAGE_SIZE_LADDER = (10000, 5000, 1000, 500, 100)
+
+# Threads fetching block-range shards (separate from the wallet/task pool to avoid nested waits)
+SHARD_EXECUTOR = ThreadPoolExecutor(max_workers=SHARD_WORKERS)
+
+
+def _record_block(record: BaseModel) -> int:
+    return int(getattr(record, "blockNumber"))
+
+
+def _record_key(record: BaseModel) -> Any:
+    """Identity of a record for de-duplication: (hash, log index) for log-based records."""
+    log_index = getattr(record, "logIndex", None)
+    if log_index is not None:
+        return (getattr(record, "hash"), str(log_index))
+    # Internal transactions share their parent hash, so only drop exact duplicates
+    return record.model_dump_json()
+
+
+class AdaptivePageSize:
+    """
+    Picks the page size for each request of a paginated query.
+
+    Shrinks after a timeout or a slow page and grows back after fast pages,
+    within the chain's bounds. Etherscan-style APIs address rows as
+    (page - 1) * offset, so the size only grows when the rows fetched so far
+    are a whole number of larger pages.
+    """
+
+    def __init__(self, min_size: int, max_size: int):
+        self.sizes = [size for size in PAGE_SIZE_LADDER if min_size <= size <= max_size] or [max_size]
+        self.index = 0
+        # Smallest index (largest size) still allowed; raised when a size times out
+        self.ceiling = 0
+
+    @property
+    def size(self) -> int:
+        return self.sizes[self.index]
+
+    def can_shrink(self) -> bool:
+        return self.index < len(self.sizes) - 1
+
+    def shrink(self) -> None:
+        if self.can_shrink():
+            self.index += 1
+
+    def timed_out(self) -> None:
+        """Shrinks after a timeout and never grows back to the size that timed out."""
+        self.shrink()
+        self.ceiling = self.index
+
+    def record(self, elapsed: float, rows_fetched: int) -> None:
+        """Adjusts the size after a page that took `elapsed` seconds."""
+        if elapsed >= SLOW_PAGE_SECONDS:
+            self.shrink()
+        elif elapsed <= FAST_PAGE_SECONDS and self.index > self.ceiling:
+            if rows_fetched % self.sizes[self.index - 1] == 0:
+                self.index -= 1
+
 
 class ExplorerAdapter(ABC):
-    def __init__(self, chain: str, rpc_url: Optional[str] = None):
+    # Records come from Etherscan-style paginated account queries
+    paginated = True
+
+    def __init__(self, chain: str, rpc_url: Optional[str] = None, sharded: bool = False):
         self.chain = chain
         self.rpc_url = rpc_url or self._get_rpc_url_from_env()
+        self.sharded = sharded
 
     def _get_rpc_url_from_env(self) -> Optional[str]:
         """Check for RPC URL in environment variable."""
         env_var = f"RPC_URL_{self.chain.upper()}"
         return os.getenv(env_var)
 
-    def _get_explorer_api_url(self, params: Dict[str, Any]) -> str:
-        """Constructs the full API URL for a given chain and parameters."""
+    def _get_base_url(self) -> str:
+        """Returns the explorer API base URL for the chain."""
         base_url = self.rpc_url or EXPLORER_URLS.get(self.chain)
         if not base_url:
             raise ValueError(f"Unsupported chain: {self.chain}")
+        return base_url
+
+    def _get_explorer_api_url(self, params: Dict[str, Any]) -> str:
+        """Constructs the full API URL for a given chain and parameters."""
+        base_url = self._get_base_url()
 
         # Create a copy to avoid mutating the original params dictionary
         query_params = params.copy()
 
-        api_key_env_var = EXPLORER_API_KEYS.get(self.chain)
-        if api_key_env_var:
-            api_key = os.getenv(api_key_env_var)
-            if api_key:
-                query_params["apikey"] = api_key
+        api_key = api_key_manager.next_key(self.chain)
+        if api_key:
+            query_params["apikey"] = api_key
 
         encoded_params = urlencode(query_params)
         return f"{base_url}?{encoded_params}"
 
-    def _fetch_all_pages(self, params: Dict[str, Any], model: Type[T]) -> List[T]:
-        """Fetches all pages of data from the API."""
-        all_data: List[T] = []
-        page = 1
-        offset = 10000  # Default max per page for Etherscan-like APIs
+    def _page_size_controller(self) -> AdaptivePageSize:
+        min_size, max_size = PAGE_SIZE_BOUNDS.get(self.chain, (MIN_PAGE_SIZE, DEFAULT_PAGE_SIZE))
+        max_size = min(max_size, DEFAULT_PAGE_SIZE)
+        return AdaptivePageSize(min(min_size, max_size), max_size)
+
+    def _iter_pages(self, params: Dict[str, Any], model: Type[T]) -> Iterator[T]:
+        """Yields the validated records of every page, one page at a time."""
+        controller = self._page_size_controller()
+        rows_fetched = 0
 
         while True:
+            offset = controller.size
             # Create a copy of params for this specific page request
             page_params = params.copy()
-            page_params["page"] = page
+            page_params["page"] = rows_fetched // offset + 1
             page_params["offset"] = offset
 
             url = self._get_explorer_api_url(page_params)
-            data = fetch_data(url, model)
-            all_data.extend(data)
+            started = time.monotonic()
+            try:
+                data = fetch_data_once(url, model)
+            except requests.exceptions.Timeout:
+                if controller.can_shrink():
+                    controller.timed_out()
+                    logging.info(
+                        f"Page of {offset} rows timed out on {self.chain}; retrying with {controller.size}."
+                    )
+                    continue
+                data = fetch_data(url, model)
+            except requests.exceptions.RequestException:
+                # Not a size problem: hand over to the regular retry/backoff path
+                data = fetch_data(url, model)
+            else:
+                controller.record(time.monotonic() - started, rows_fetched + len(data))
+
+            rows_fetched += len(data)
+            yield from data
 
             # If we fetched fewer items than the offset, it means we've reached the end
             if len(data) < offset:
                 break
-            page += 1
 
-        return all_data
+    def _fetch_all_pages(self, params: Dict[str, Any], model: Type[T]) -> List[T]:
+        """Fetches all pages of data from the API."""
+        return list(self._iter_pages(params, model))
+
+    def _iter_records(self, params: Dict[str, Any], model: Type[T]) -> Iterator[T]:
+        """Streams every record for the query using the adapter's fetch mode."""
+        if self.sharded:
+            return self._iter_block_sharded(params, model)
+        return self._iter_pages(params, model)
+
+    def _fetch_block_range(
+        self,
+        params: Dict[str, Any],
+        model: Type[T],
+        startblock: int,
+        endblock: int,
+        page: int = 1,
+        offset: Optional[int] = None,
+        sort: str = "asc",
+    ) -> List[T]:
+        """Fetches a single page of the query restricted to [startblock, endblock]."""
+        range_params = params.copy()
+        range_params.update(
+            startblock=startblock,
+            endblock=endblock,
+            page=page,
+            offset=offset or DEFAULT_PAGE_SIZE,
+            sort=sort,
+        )
+        return fetch_data(self._get_explorer_api_url(range_params), model)
+
+    def _fetch_single_block(self, params: Dict[str, Any], model: Type[T], block: int) -> List[T]:
+        """Pages through one block whose records do not fit in a single page."""
+        records: List[T] = []
+        max_pages = max(1, RESULT_WINDOW // SINGLE_BLOCK_PAGE_SIZE)
+        for page in range(1, max_pages + 1):
+            data = self._fetch_block_range(params, model, block, block, page, SINGLE_BLOCK_PAGE_SIZE)
+            records.extend(data)
+            if len(data) < SINGLE_BLOCK_PAGE_SIZE:
+                return records
+        logging.warning(
+            f"Block {block} holds more than {RESULT_WINDOW} records for "
+            f"{params.get('action')} on {self.chain}; results beyond the explorer window are missing."
+        )
+        return records
+
+    @staticmethod
+    def _split_block_range(startblock: int, endblock: int, parts: int) -> List[Tuple[int, int]]:
+        """Splits an inclusive block range into at most `parts` contiguous shards."""
+        span = endblock - startblock + 1
+        parts = max(1, min(parts, span))
+        step, remainder = divmod(span, parts)
+        shards = []
+        lo = startblock
+        for i in range(parts):
+            hi = lo + step - 1 + (1 if i < remainder else 0)
+            shards.append((lo, hi))
+            lo = hi + 1
+        return shards
+
+    def _iter_block_sharded(self, params: Dict[str, Any], model: Type[T]) -> Iterator[T]:
+        """
+        Streams the query as concurrent block-range shards instead of page after page.
+
+        Cheap single-row probes find the wallet's first and last active blocks, that
+        span is split into SHARD_COUNT shards, and any shard that comes back full is
+        split in half again so no request exceeds the explorer's result window.
+        Shards are yielded in block order as soon as every earlier shard is done,
+        de-duplicated on (hash, log index).
+        """
+        startblock = int(params.get("startblock", 0))
+        endblock = int(params.get("endblock", 99999999))
+
+        first = self._fetch_block_range(params, model, startblock, endblock, offset=1, sort="asc")
+        if not first:
+            return
+        last = self._fetch_block_range(params, model, startblock, endblock, offset=1, sort="desc")
+        if getattr(first[0], "blockNumber", None) is None or not last or getattr(last[0], "blockNumber", None) is None:
+            # Without block numbers there is nothing to shard on
+            yield from self._iter_pages(params, model)
+            return
+
+        pending: Dict[Future, Tuple[int, int, bool]] = {}
+
+        def submit(lo: int, hi: int) -> None:
+            if lo == hi:
+                future = SHARD_EXECUTOR.submit(self._fetch_single_block, params, model, lo)
+                pending[future] = (lo, hi, True)
+            else:
+                future = SHARD_EXECUTOR.submit(self._fetch_block_range, params, model, lo, hi)
+                pending[future] = (lo, hi, False)
+
+        first_block = _record_block(first[0])
+        for lo, hi in self._split_block_range(first_block, _record_block(last[0]), SHARD_COUNT):
+            submit(lo, hi)
+
+        # Finished shards keyed by their first block, waiting for the contiguous prefix
+        finished: Dict[int, Tuple[int, List[T]]] = {}
+        next_block = first_block
+        seen = set()
+        try:
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    lo, hi, final = pending.pop(future)
+                    data = future.result()
+                    if not final and len(data) >= DEFAULT_PAGE_SIZE:
+                        # A full shard may have been truncated: split it and refetch the halves
+                        mid = (lo + hi) // 2
+                        submit(lo, mid)
+                        submit(mid + 1, hi)
+                        continue
+                    finished[lo] = (hi, data)
+
+                while next_block in finished:
+                    hi, data = finished.pop(next_block)
+                    # Each shard is already in ascending block order (sort=asc)
+                    for record in data:
+                        key = _record_key(record)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        yield record
+                    next_block = hi + 1
+        finally:
+            # The consumer may stop early; don't leave queued shards behind
+            for future in pending:
+                future.cancel()
+
+    def _fetch_block_sharded(self, params: Dict[str, Any], model: Type[T]) -> List[T]:
+        """Fetches the query as concurrent block-range shards (see _iter_block_sharded)."""
+        return list(self._iter_block_sharded(params, model))
+
+    def _account_params(
+        self, action: str, wallet_address: str, startblock: int, endblock: int
+    ) -> Dict[str, Any]:
+        """Builds the query parameters for an Etherscan-style account endpoint."""
+        return {
+            "module": "account",
+            "action": action,
+            "address": wallet_address,
+            "startblock": startblock,
+            "endblock": endblock,
+            "sort": "asc",
+        }
 
     @abstractmethod
-    def get_transactions(
+    def iter_transactions(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
-    ) -> List[RawTransaction]:
+    ) -> Iterator[RawTransaction]:
         pass
 
     @abstractmethod
-    def get_token_transfers(
+    def iter_token_transfers(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
-    ) -> List[RawTokenTransfer]:
+    ) -> Iterator[RawTokenTransfer]:
         pass
 
     @abstractmethod
-    def get_internal_transactions(
+    def iter_internal_transactions(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
-    ) -> List[RawTransaction]:
+    ) -> Iterator[RawTransaction]:
         pass
 
     @abstractmethod
-    def get_nft_transfers(
+    def iter_nft_transfers(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
-    ) -> List[RawNFTTransfer]:
+    ) -> Iterator[RawNFTTransfer]:
         pass
 
     @abstractmethod
-    def get_1155_transfers(
+    def iter_1155_transfers(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
-    ) -> List[Raw1155Transfer]:
-        pass
-
-    @abstractmethod
-    def get_block_number_by_timestamp(
-        self, timestamp: int, closest: str = "before"
-    ) -> int:
+    ) -> Iterator[Raw1155Transfer]:
         pass
 
-
-class EtherscanAdapter(ExplorerAdapter):
-    _block_cache: Dict[str, int] = {}
+    def _get_stored(
+        self,
+        endpoint: str,
+        model: Type[T],
+        wallet_address: str,
+        startblock: int,
+        endblock: int,
+        iterate: Callable[[str, int, int], Iterator[T]],
+    ) -> List[T]:
+        """
+        Answers a block-range query from the record store, fetching only the
+        block intervals no earlier query covered.
+        """
+        if not (self.paginated and record_store.enabled()):
+            return list(iterate(wallet_address, startblock, endblock))
+        for lo, hi in record_store.missing(self.chain, wallet_address, endpoint, startblock, endblock):
+            failures = failed_fetch_count()
+            records = list(iterate(wallet_address, lo, hi))
+            record_store.save(
+                self.chain, wallet_address, endpoint, lo, hi, records, complete=failed_fetch_count() == failures
+            )
+        return record_store.load(self.chain, wallet_address, endpoint, startblock, endblock, model)
 
     def get_transactions(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
     ) -> List[RawTransaction]:
-        params = {
-            "module": "account",
-            "action": "txlist",
-            "address": wallet_address,
-            "startblock": startblock,
-            "endblock": endblock,
-            "sort": "asc",
-        }
-        return self._fetch_all_pages(params, RawTransaction)
+        return self._get_stored(
+            "transactions", RawTransaction, wallet_address, startblock, endblock, self.iter_transactions
+        )
 
     def get_token_transfers(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
     ) -> List[RawTokenTransfer]:
-        params = {
-            "module": "account",
-            "action": "tokentx",
-            "address": wallet_address,
-            "startblock": startblock,
-            "endblock": endblock,
-            "sort": "asc",
-        }
-        return self._fetch_all_pages(params, RawTokenTransfer)
+        return self._get_stored(
+            "token_transfers", RawTokenTransfer, wallet_address, startblock, endblock, self.iter_token_transfers
+        )
 
     def get_internal_transactions(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
     ) -> List[RawTransaction]:
-        params = {
-            "module": "account",
-            "action": "txlistinternal",
-            "address": wallet_address,
-            "startblock": startblock,
-            "endblock": endblock,
-            "sort": "asc",
-        }
-        return self._fetch_all_pages(params, RawTransaction)
+        return self._get_stored(
+            "internal_transactions", RawTransaction, wallet_address, startblock, endblock,
+            self.iter_internal_transactions,
+        )
 
     def get_nft_transfers(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
     ) -> List[RawNFTTransfer]:
-        params = {
-            "module": "account",
-            "action": "tokennfttx",
-            "address": wallet_address,
-            "startblock": startblock,
-            "endblock": endblock,
-            "sort": "asc",
-        }
-        return self._fetch_all_pages(params, RawNFTTransfer)
+        return self._get_stored(
+            "nft_transfers", RawNFTTransfer, wallet_address, startblock, endblock, self.iter_nft_transfers
+        )
 
     def get_1155_transfers(
         self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
     ) -> List[Raw1155Transfer]:
-        params = {
-            "module": "account",
-            "action": "token1155tx",
-            "address": wallet_address,
-            "startblock": startblock,
-            "endblock": endblock,
-            "sort": "asc",
-        }
-        return self._fetch_all_pages(params, Raw1155Transfer)
+        return self._get_stored(
+            "1155_transfers", Raw1155Transfer, wallet_address, startblock, endblock, self.iter_1155_transfers
+        )
+
+    @abstractmethod
+    def get_block_number_by_timestamp(
+        self, timestamp: int, closest: str = "before"
+    ) -> int:
+        pass
+
+
+class EtherscanAdapter(ExplorerAdapter):
+    _block_cache: Dict[str, int] = {}
+    # Concurrent lookups of the same block (e.g. a --year bound shared by every wallet) share one request
+    _block_inflight = SingleFlight()
+
+    def iter_transactions(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawTransaction]:
+        params = self._account_params("txlist", wallet_address, startblock, endblock)
+        return self._iter_records(params, RawTransaction)
+
+    def iter_token_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawTokenTransfer]:
+        params = self._account_params("tokentx", wallet_address, startblock, endblock)
+        return self._iter_records(params, RawTokenTransfer)
+
+    def iter_internal_transactions(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawTransaction]:
+        params = self._account_params("txlistinternal", wallet_address, startblock, endblock)
+        return self._iter_records(params, RawTransaction)
+
+    def iter_nft_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawNFTTransfer]:
+        params = self._account_params("tokennfttx", wallet_address, startblock, endblock)
+        return self._iter_records(params, RawNFTTransfer)
+
+    def iter_1155_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[Raw1155Transfer]:
+        params = self._account_params("token1155tx", wallet_address, startblock, endblock)
+        return self._iter_records(params, Raw1155Transfer)
 
     def get_block_number_by_timestamp(
         self, timestamp: int, closest: str = "before"
@@ -175,6 +467,16 @@ class EtherscanAdapter(ExplorerAdapter):
         cache_key = f"{self.chain}_{timestamp}_{closest}"
         if cache_key in self._block_cache:
             return self._block_cache[cache_key]
+        return self._block_inflight.do(cache_key, self._fetch_block_number, cache_key, timestamp, closest)
+
+    def _fetch_block_number(self, cache_key: str, timestamp: int, closest: str) -> int:
+        if cache_key in self._block_cache:
+            # Stored by a lookup that finished between the caller's check and this one
+            return self._block_cache[cache_key]
+        known = block_index.resolve(self.chain, timestamp, closest)
+        if known is not None:
+            self._block_cache[cache_key] = known
+            return known
 
         params = {
             "module": "block",
@@ -185,17 +487,21 @@ class EtherscanAdapter(ExplorerAdapter):
         url = self._get_explorer_api_url(params)
         try:
             # Using a raw fetch here as we just want the block number string
-            response = session.get(url, timeout=TIMEOUT)
+            url, response = send_explorer_request(url)
             response.raise_for_status()
             data = response.json()
+            api_key_manager.observe_response(url, response.status_code, data)
             if data.get("status") == "1":
                 block_number = int(data.get("result"))
                 self._block_cache[cache_key] = block_number
+                block_index.set_lookup(self.chain, timestamp, closest, block_number)
                 return block_number
-        except Exception:
-            # Silently fall back to default block numbers on any error to ensure reliability
-            pass
-        return 0 if closest == "before" else 99999999
+        except Exception as e:
+            logging.debug(f"Block lookup for {timestamp} failed on {self.chain}: {e}")
+        # Fall back to the widest range the known anchors allow (the full history without any)
+        fallback = block_index.bound(self.chain, timestamp, closest)
+        logging.warning(f"Could not resolve timestamp {timestamp} to a block on {self.chain}; using block {fallback}.")
+        return fallback
 
 
 class BasescanAdapter(EtherscanAdapter):
@@ -217,3 +523,146 @@ class OptimismAdapter(EtherscanAdapter):
 
 class PolygonAdapter(EtherscanAdapter):
     pass
+
+
+class AsyncExplorerAdapter:
+    """
+    Asyncio front-end for an ExplorerAdapter.
+
+    Reuses the wrapped adapter's URL building and routes every page request
+    through async_fetch_data, so many wallets can share one event loop while
+    in-flight requests stay capped per explorer host. Pages are sent on
+    `client` (an aiohttp session) when one is given, from threads otherwise.
+    """
+
+    def __init__(
+        self,
+        adapter: ExplorerAdapter,
+        limiter: HostConcurrencyLimiter,
+        client: Optional["aiohttp.ClientSession"] = None,
+    ):
+        self.adapter = adapter
+        self.chain = adapter.chain
+        self.limiter = limiter
+        self.client = client
+
+    async def _fetch_page_once(self, url: str, model: Type[T]) -> List[T]:
+        """One attempt at a page; RequestExceptions propagate like fetch_data_once."""
+        if self.client is None:
+            async with self.limiter.limit(url):
+                return await asyncio.to_thread(fetch_data_once, url, model)
+        return await async_fetch_data_once(url, model, self.limiter, self.client)
+
+    async def _fetch_all_pages(self, params: Dict[str, Any], model: Type[T]) -> List[T]:
+        """
+        Fetches all pages of data from the API without blocking the event loop,
+        sizing pages with the same AdaptivePageSize ladder as the sync pager.
+        """
+        controller = self.adapter._page_size_controller()
+        all_data: List[T] = []
+
+        while True:
+            offset = controller.size
+            page_params = params.copy()
+            page_params["page"] = len(all_data) // offset + 1
+            page_params["offset"] = offset
+
+            url = self.adapter._get_explorer_api_url(page_params)
+            started = time.monotonic()
+            try:
+                data = await self._fetch_page_once(url, model)
+            except requests.exceptions.Timeout:
+                if controller.can_shrink():
+                    controller.timed_out()
+                    logging.info(
+                        f"Page of {offset} rows timed out on {self.chain}; retrying with {controller.size}."
+                    )
+                    continue
+                data = await async_fetch_data(url, model, self.limiter, self.client)
+            except requests.exceptions.RequestException:
+                # Not a size problem: hand over to the regular retry/backoff path
+                data = await async_fetch_data(url, model, self.limiter, self.client)
+            else:
+                controller.record(time.monotonic() - started, len(all_data) + len(data))
+            all_data.extend(data)
+
+            if len(data) < offset:
+                break
+
+        return all_data
+
+    async def _fetch_records(self, params: Dict[str, Any], model: Type[T]) -> List[T]:
+        if self.adapter.sharded:
+            # Shards already run concurrently on SHARD_EXECUTOR
+            return await asyncio.to_thread(self.adapter._fetch_block_sharded, params, model)
+        return await self._fetch_all_pages(params, model)
+
+    async def _get_stored(
+        self, endpoint: str, action: str, model: Type[T], wallet_address: str, startblock: int, endblock: int
+    ) -> List[T]:
+        """Async counterpart of ExplorerAdapter._get_stored for paginated adapters."""
+
+        def fetch(lo: int, hi: int) -> Awaitable[List[T]]:
+            return self._fetch_records(self.adapter._account_params(action, wallet_address, lo, hi), model)
+
+        if not record_store.enabled():
+            return await fetch(startblock, endblock)
+        chain = self.chain
+        # The store is sqlite: keep its reads and writes off the event loop
+        missing = await asyncio.to_thread(record_store.missing, chain, wallet_address, endpoint, startblock, endblock)
+        for lo, hi in missing:
+            failures = failed_fetch_count()
+            records = await fetch(lo, hi)
+            await asyncio.to_thread(
+                record_store.save, chain, wallet_address, endpoint, lo, hi, records,
+                complete=failed_fetch_count() == failures,
+            )
+        return await asyncio.to_thread(record_store.load, chain, wallet_address, endpoint, startblock, endblock, model)
+
+    async def _fetch_in_thread(self, method: str, wallet_address: str, startblock: int, endblock: int) -> List[Any]:
+        """Runs a non-paginated adapter's blocking getter on the I/O executor."""
+        async with self.limiter.limit(self.adapter._get_base_url()):
+            return await asyncio.to_thread(getattr(self.adapter, method), wallet_address, startblock, endblock)
+
+    async def get_transactions(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> List[RawTransaction]:
+        if not self.adapter.paginated:
+            return await self._fetch_in_thread("get_transactions", wallet_address, startblock, endblock)
+        return await self._get_stored("transactions", "txlist", RawTransaction, wallet_address, startblock, endblock)
+
+    async def get_token_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> List[RawTokenTransfer]:
+        if not self.adapter.paginated:
+            return await self._fetch_in_thread("get_token_transfers", wallet_address, startblock, endblock)
+        return await self._get_stored("token_transfers", "tokentx", RawTokenTransfer, wallet_address, startblock, endblock)
+
+    async def get_internal_transactions(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> List[RawTransaction]:
+        if not self.adapter.paginated:
+            return await self._fetch_in_thread("get_internal_transactions", wallet_address, startblock, endblock)
+        return await self._get_stored("internal_transactions", "txlistinternal", RawTransaction, wallet_address, startblock, endblock)
+
+    async def get_nft_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> List[RawNFTTransfer]:
+        if not self.adapter.paginated:
+            return await self._fetch_in_thread("get_nft_transfers", wallet_address, startblock, endblock)
+        return await self._get_stored("nft_transfers", "tokennfttx", RawNFTTransfer, wallet_address, startblock, endblock)
+
+    async def get_1155_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> List[Raw1155Transfer]:
+        if not self.adapter.paginated:
+            return await self._fetch_in_thread("get_1155_transfers", wallet_address, startblock, endblock)
+        return await self._get_stored("1155_transfers", "token1155tx", Raw1155Transfer, wallet_address, startblock, endblock)
+
+    async def get_block_number_by_timestamp(
+        self, timestamp: int, closest: str = "before"
+    ) -> int:
+        async with self.limiter.limit(self.adapter._get_base_url()):
+            return await asyncio.to_thread(
+                self.adapter.get_block_number_by_timestamp, timestamp, closest
+            )
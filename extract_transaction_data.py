@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Sequence, Union
+from typing import Iterable, Optional, Union
 from tqdm import tqdm
 from config import NATIVE_CURRENCIES
 from models import (
@@ -12,7 +12,7 @@ from models import (
     Transaction,
 )
 from transaction_categorization import categorize_transaction
-from price_service import get_token_price
+from price_service import get_token_price, resolve_prices
 
 AnyRawTransaction = Union[
     RawTransaction, RawTokenTransfer, RawNFTTransfer, Raw1155Transfer
@@ -38,18 +38,24 @@ def format_timestamp(ts: str) -> str:
 
 
 def extract_transaction_data(
-    transaction_data: Sequence[AnyRawTransaction],
+    transaction_data: Iterable[AnyRawTransaction],
     transaction_type: str,
     wallet_address: str,
     chain: str,
     fees_only: bool = False,
 ) -> list[Transaction]:
     extracted_data: list[Transaction] = []
+    # (row, (amount, currency, contract address) to value or None), valued after the loop
+    rows: list[tuple[dict, Optional[tuple]]] = []
+    # Token contracts whose decimals are unknown; their amounts are scaled by 18
+    unknown_decimals: set[str] = set()
+    # Record addresses are stored lowercased
+    wallet_address = wallet_address.lower()
 
     for trx in tqdm(transaction_data, desc=f"Extracting {transaction_type} data", leave=False):
         try:
-            is_sender = trx.from_address.hash.lower() == wallet_address.lower()
-            is_receiver = trx.to_address.hash.lower() == wallet_address.lower()
+            is_sender = trx.from_address.hash == wallet_address
+            is_receiver = trx.to_address.hash == wallet_address
 
             data = {
                 "Date": format_timestamp(trx.timeStamp),
@@ -77,9 +83,11 @@ def extract_transaction_data(
                 if is_sender:
                     data["Sent Amount"] = scale_amount(trx.value, 18)
                     data["Sent Currency"] = native_currency
-                    if trx.gasPrice and trx.gasUsed:
+                    gas_price = trx.effectiveGasPrice or trx.gasPrice
+                    if gas_price and trx.gasUsed:
                         try:
-                            fee_value = str(int(trx.gasUsed) * int(trx.gasPrice))
+                            # OP-stack chains add an L1 data fee on top of execution gas
+                            fee_value = str(int(trx.gasUsed) * int(gas_price) + int(trx.l1Fee or 0))
                             data["Fee Amount"] = scale_amount(fee_value, 18)
                             data["Fee Currency"] = native_currency
                         except (ValueError, TypeError):
@@ -90,7 +98,11 @@ def extract_transaction_data(
 
             elif isinstance(trx, RawTokenTransfer):
                 data["Description"] = "token_transfer"
-                decimals = int(trx.tokenDecimal) if trx.tokenDecimal.isdigit() else 18
+                if trx.tokenDecimal.isdigit():
+                    decimals = int(trx.tokenDecimal)
+                else:
+                    decimals = 18
+                    unknown_decimals.add(f"{trx.token.symbol} ({trx.contractAddress})")
                 if is_sender:
                     data["Sent Amount"] = scale_amount(trx.total.value, decimals)
                     data["Sent Currency"] = trx.token.symbol
@@ -116,32 +128,15 @@ def extract_transaction_data(
                     data["Received Amount"] = trx.tokenValue
                     data["Received Currency"] = trx.tokenSymbol
 
-            # Fetch and calculate net worth
-            price = None
-            amount_to_value = None
-            currency_to_value = None
-
-            if data["Sent Amount"] and data["Sent Currency"]:
-                amount_to_value = data["Sent Amount"]
-                currency_to_value = data["Sent Currency"]
-                contract_address = trx.contractAddress if isinstance(trx, RawTokenTransfer) else None
-                price = get_token_price(chain, data["timestamp"], contract_address, currency_to_value)
-            elif data["Received Amount"] and data["Received Currency"]:
-                amount_to_value = data["Received Amount"]
-                currency_to_value = data["Received Currency"]
+            # Net worth is filled in once every price the rows need has been resolved.
+            # NFT and ERC-1155 rows carry a collection symbol, not a fungible coin, so they stay unvalued.
+            valuation = None
+            if isinstance(trx, (RawTransaction, RawTokenTransfer)):
                 contract_address = trx.contractAddress if isinstance(trx, RawTokenTransfer) else None
-                price = get_token_price(chain, data["timestamp"], contract_address, currency_to_value)
-
-            if price is not None and amount_to_value:
-                try:
-                    net_worth = Decimal(amount_to_value) * price
-                    formatted_net_worth = format(net_worth, "f")
-                    if "." in formatted_net_worth:
-                        formatted_net_worth = formatted_net_worth.rstrip("0").rstrip(".")
-                    data["Net Worth Amount"] = formatted_net_worth if formatted_net_worth != "" else "0"
-                    data["Net Worth Currency"] = "USD"
-                except (ValueError, ArithmeticError):
-                    pass
+                if data["Sent Amount"] and data["Sent Currency"]:
+                    valuation = (data["Sent Amount"], data["Sent Currency"], contract_address)
+                elif data["Received Amount"] and data["Received Currency"]:
+                    valuation = (data["Received Amount"], data["Received Currency"], contract_address)
 
         except Exception as e:
             logging.exception(f"Error extracting data for transaction {getattr(trx, 'hash', 'unknown')}: {e}")
@@ -160,7 +155,41 @@ def extract_transaction_data(
             data["Net Worth Currency"] = ""
             data["Description"] = f"Gas Fee ({data['Description']})"
             data["Label"] = "cost"
+            # Amounts are cleared, so there is nothing to value
+            valuation = None
+
+        rows.append((data, valuation))
+
+    if unknown_decimals:
+        logging.warning(
+            f"Unknown decimals for {len(unknown_decimals)} token(s) on {chain}, amounts assume 18: "
+            + ", ".join(sorted(unknown_decimals))
+        )
 
+    # Price-resolution stage: every (asset, timestamp) the rows need, in as few requests as the source allows
+    resolve_prices(
+        (chain, data["timestamp"], valuation[2], valuation[1]) for data, valuation in rows if valuation is not None
+    )
+
+    for data, valuation in rows:
+        if valuation is not None:
+            _add_net_worth(data, chain, *valuation)
         extracted_data.append(Transaction.model_validate(data))
 
     return extracted_data
+
+
+def _add_net_worth(data: dict, chain: str, amount: str, currency: str, contract_address: Optional[str]) -> None:
+    """Values a row's amount in USD at its timestamp."""
+    price = get_token_price(chain, data["timestamp"], contract_address, currency)
+    if price is None:
+        return
+    try:
+        net_worth = Decimal(amount) * price
+        formatted_net_worth = format(net_worth, "f")
+        if "." in formatted_net_worth:
+            formatted_net_worth = formatted_net_worth.rstrip("0").rstrip(".")
+        data["Net Worth Amount"] = formatted_net_worth if formatted_net_worth != "" else "0"
+        data["Net Worth Currency"] = "USD"
+    except (ValueError, ArithmeticError):
+        pass
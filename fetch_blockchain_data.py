@@ -1,10 +1,17 @@
+import asyncio
 import logging
 import os
-from typing import List, Type, TypeVar, Any, Sequence, Dict
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Generic, List, Type, TypeVar, Any, Sequence, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 import requests
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from requests.exceptions import HTTPError, RequestException
+from requests.structures import CaseInsensitiveDict
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -12,12 +19,31 @@ from tenacity import (
     wait_exponential,
 )
 
-from config import TIMEOUT
-from cache_manager import cache_manager
+from config import HEDGE_WORKERS, MAX_CONCURRENT_REQUESTS_PER_HOST, RATE_LIMIT_COOLDOWN, TIMEOUT
+from api_key_pool import ApiKeyQuotaExceeded, api_key_manager
+from cache_manager import cache_manager, endpoint_identity
+from http_sessions import EXPLORER, session_registry
+import json_utils
+from endpoint_health import endpoint_health
+from finality import page_ttl
+from rate_limiter import rate_limiter
+from single_flight import AsyncSingleFlight, SingleFlight
 
-# Initialize a global session for connection pooling
-session = requests.Session()
-from models import RawTokenTransfer, RawTransaction
+try:
+    import aiohttp
+except ImportError:  # Optional; async_fetch_data falls back to threads without it
+    aiohttp = None
+
+# Explorer session from the shared registry (per-host connection pools)
+session = session_registry.get(EXPLORER)
+
+# Identical in-flight requests from concurrent wallets are coalesced
+_inflight = SingleFlight()
+_async_inflight = AsyncSingleFlight()
+
+# Threads sending requests to chains with several equivalent endpoints (hedging)
+HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=HEDGE_WORKERS)
+from models import RawRecord, RawTokenTransfer, RawTransaction
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -45,10 +71,31 @@ def wait_retry_after_or_exponential(retry_state):
     return wait_exponential(multiplier=1, min=4, max=60)(retry_state)
 
 
+_failures_lock = threading.Lock()
+_failed_fetches = 0
+
+
+def _note_failure() -> None:
+    global _failed_fetches
+    with _failures_lock:
+        _failed_fetches += 1
+
+
+def failed_fetch_count() -> int:
+    """
+    Number of fetches that gave up and returned an empty list so far.
+
+    fetch_data reports failures as empty results; callers that persist what a
+    fetch covered compare this count before and after to tell the two apart.
+    """
+    return _failed_fetches
+
+
 def _log_and_return_empty(retry_state):
     logging.error(
         f"An error occurred while fetching data after multiple retries: {retry_state.outcome.exception()}"
     )
+    _note_failure()
     return []
 
 
@@ -65,6 +112,7 @@ def _process_response_data(data: Dict[str, Any], model: Type[T], endpoint: str)
             return []
         if "rate limit" in str(data.get("result", "")).lower() or "rate limit" in str(message).lower():
             logging.warning(f"API rate limit reached for {endpoint}. Triggering retry...")
+            rate_limiter.pause(endpoint, RATE_LIMIT_COOLDOWN, owned=True)
             raise RequestException("API rate limit reached")
 
     # Check for data in 'result' (standard Etherscan) or 'items' (Routescan V2/Blockscout).
@@ -78,8 +126,15 @@ def _process_response_data(data: Dict[str, Any], model: Type[T], endpoint: str)
             logging.error(
                 f"API response for {endpoint} does not contain a list in 'result' or 'items': {data}"
             )
+            _note_failure()
         return []
 
+    try:
+        # One call validates the whole page; only a page with bad rows pays for the per-item loop
+        return _list_adapter(model).validate_python(result_list)
+    except ValidationError:
+        pass
+
     validated_data: List[T] = []
     for item in result_list:
         try:
@@ -93,39 +148,429 @@ def _process_response_data(data: Dict[str, Any], model: Type[T], endpoint: str)
     return validated_data
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_retry_after_or_exponential,
-    retry_error_callback=_log_and_return_empty,
-    retry=retry_if_exception_type(RequestException),
-)
-def fetch_data(endpoint: str, model: Type[T]) -> List[T]:
-    # Check cache first
-    cached_data = cache_manager.get_response(endpoint)
+class _ExplorerPage(BaseModel, Generic[T]):
+    """A page whose records all validate, read straight from the response bytes."""
+
+    status: Any = None
+    message: Any = None
+    result: Optional[List[T]] = None
+    items: Optional[List[T]] = None
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[T]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def _validate_page(raw: Any, model: Type[T]) -> Optional[Tuple[Dict[str, Any], List[T]]]:
+    """
+    Validates a whole page from its raw bytes in one pass, without building
+    the intermediate dicts.
+
+    Returns the page's status fields and records, or None when the body is not
+    bytes or anything in it does not fit (an error result, a malformed row);
+    the caller then decodes it and validates row by row, so bad rows are
+    isolated and logged.
+    """
+    if not isinstance(raw, (bytes, bytearray)):
+        return None
+    try:
+        page = _ExplorerPage[model].model_validate_json(raw)
+    except ValidationError:
+        return None
+    # Status "0" pages (no results, rate limits, bad keys) keep the detailed handling
+    records = page.result if page.result is not None else page.items
+    if records is None or page.status == "0":
+        return None
+    return {"status": page.status, "message": page.message}, records
+
+
+def _read_json(response) -> Tuple[Any, Optional[bytes]]:
+    """
+    Decodes a response body straight from its bytes with the fast JSON decoder.
+
+    Returns the parsed payload and the original bytes, so a cacheable response
+    can be stored without re-serializing it.
+    """
+    raw = response.content
+    if isinstance(raw, (bytes, bytearray)):
+        return json_utils.loads(raw), bytes(raw)
+    return response.json(), None
+
+
+def _decode_cached(raw: bytes) -> Optional[Any]:
+    try:
+        return json_utils.loads(raw)
+    except ValueError:
+        logging.debug("Ignoring undecodable cached response")
+        return None
+
+
+def _get(endpoint: str) -> Tuple[str, requests.Response]:
+    """Sends one explorer GET through the API key pool and the rate limiter."""
+    # The key in the URL may have been parked since it was built; swap it if so
+    request_url = api_key_manager.prepare(endpoint)
+    rate_limiter.acquire(request_url)
+    response = session.get(request_url, timeout=TIMEOUT)
+    rate_limiter.observe_response(request_url, response.status_code, response.headers)
+    api_key_manager.observe_response(request_url, response.status_code)
+    return request_url, response
+
+
+def _timed_get(endpoint: str) -> Tuple[str, requests.Response]:
+    started = time.monotonic()
+    try:
+        request_url, response = _get(endpoint)
+    except RequestException:
+        endpoint_health.record_failure(endpoint)
+        raise
+    if response.status_code >= 500:
+        endpoint_health.record_failure(endpoint)
+    else:
+        endpoint_health.record_success(endpoint, time.monotonic() - started)
+    return request_url, response
+
+
+def _hedged_get(urls: List[str]) -> Tuple[str, requests.Response]:
+    """
+    Sends the request to urls[0] and, if it has not answered within that
+    endpoint's p95 latency or has failed, a duplicate to the next URL. The
+    first usable response wins; slower duplicates are left to finish unread.
+    """
+    remaining = list(urls)
+    in_flight: Dict[Future, str] = {}
+    fallback: Optional[Tuple[str, requests.Response]] = None
+    error: Optional[RequestException] = None
+
+    def launch() -> None:
+        url = remaining.pop(0)
+        in_flight[HEDGE_EXECUTOR.submit(_timed_get, url)] = url
+
+    launch()
+    while in_flight:
+        delay = endpoint_health.hedge_delay(urls[0]) if remaining else None
+        done, _ = wait(list(in_flight), timeout=delay, return_when=FIRST_COMPLETED)
+        if not done:
+            logging.debug(f"Hedging slow request to {urls[0]} with {remaining[0]}")
+            launch()
+            continue
+        for future in done:
+            in_flight.pop(future)
+            try:
+                request_url, response = future.result()
+            except RequestException as e:
+                error = e
+            else:
+                if response.status_code < 500:
+                    return request_url, response
+                fallback = (request_url, response)
+            # Fail over right away instead of waiting for the hedge delay
+            if remaining and not in_flight:
+                launch()
+    if fallback is not None:
+        return fallback
+    raise error if error is not None else RequestException("No explorer endpoint answered")
+
+
+def send_explorer_request(endpoint: str) -> Tuple[str, requests.Response]:
+    """
+    Sends an explorer API request and returns the URL actually requested with
+    its response.
+
+    Chains with equivalent endpoints (EXPLORER_FALLBACK_URLS) get circuit
+    breakers, failover and hedged requests; others are requested directly.
+    """
+    if not endpoint_health.has_alternatives(endpoint):
+        return _get(endpoint)
+    return _hedged_get(endpoint_health.candidates(endpoint))
+
+
+def _cached_records(endpoint: str, model: Type[T]) -> Optional[List[T]]:
+    """The endpoint's records from the response cache, or None on a miss."""
+    # The stored bytes are decoded exactly once
+    cached_raw = cache_manager.get_response_bytes(endpoint)
+    cached_data = _decode_cached(cached_raw) if cached_raw else None
     if cached_data:
         logging.debug(f"Using cached response for {endpoint}")
+        if cached_data.get("trusted") and issubclass(model, RawRecord):
+            # Rows were validated before they were cached
+            return [model.trusted(row) for row in cached_data.get("result") or []]
         try:
             return _process_response_data(cached_data, model, endpoint)
         except RequestException:
             # If cached data somehow triggers a rate limit exception (unlikely), 
             # treat it as a cache miss or error.
             pass
+    return None
+
+
+def _handle_response(endpoint: str, model: Type[T], request_url: str, response: requests.Response) -> List[T]:
+    """Validates an explorer response and caches it for as long as it cannot change."""
+    response.raise_for_status()
+    page = _validate_page(response.content, model)
+    if page is not None:
+        (data, records), raw = page, bytes(response.content)
+    else:
+        (data, raw), records = _read_json(response), None
+
+    if api_key_manager.observe_response(request_url, response.status_code, data):
+        # The key was parked and another one is available: retry with it
+        raise RequestException("API key unusable; retrying with another key")
+
+    if records is None:
+        records = _process_response_data(data, model, endpoint)
+
+    # Only cache successful "OK" responses with actual results, for as long as they cannot change
+    if data.get("status") == "1":
+        cache_manager.set_response(endpoint, _cache_payload(model, data, raw, records), ttl=page_ttl(endpoint, records))
+    return records
 
-    try:
-        response = session.get(endpoint, timeout=TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
 
-        # Only cache successful "OK" responses with actual results
-        if data.get("status") == "1":
-            cache_manager.set_response(endpoint, data)
+def _cache_payload(model: Type[T], data: Dict[str, Any], raw: Optional[bytes], records: List[T]) -> Any:
+    """
+    What a successful page is cached as: the dumps of its validated records
+    when the model can rebuild them without validation (RawRecord.trusted),
+    else the response as received.
+    """
+    if issubclass(model, RawRecord):
+        return {
+            "trusted": True,
+            "status": data.get("status"),
+            "message": data.get("message"),
+            "result": [record.model_dump(by_alias=True) for record in records],
+        }
+    return raw if raw is not None else data
+
 
-        return _process_response_data(data, model, endpoint)
+def _fetch_data_attempt(endpoint: str, model: Type[T]) -> List[T]:
+    cached = _cached_records(endpoint, model)
+    if cached is not None:
+        return cached
+
+    try:
+        request_url, response = send_explorer_request(endpoint)
+        return _handle_response(endpoint, model, request_url, response)
 
+    except ApiKeyQuotaExceeded:
+        # Not transient: every later request would fail the same way
+        raise
     except Exception as e:
         if isinstance(e, RequestException):
             raise  # Reraise RequestException to be handled by tenacity
         logging.error(f"An unexpected error occurred: {str(e)}")
+        _note_failure()
         return []
 
+
+def fetch_data_once(endpoint: str, model: Type[T]) -> List[T]:
+    """
+    Single attempt of fetch_data, without retries.
+
+    RequestExceptions (timeouts, HTTP errors, rate limits) propagate to the
+    caller, which lets callers such as the adaptive page-size controller react
+    to a timeout before falling back to the retrying fetch_data. Concurrent
+    attempts at the same endpoint and model share one request, like fetch_data;
+    they are keyed apart from it so a retrying caller never receives an
+    attempt's exception.
+    """
+    return list(_inflight.do((endpoint_identity(endpoint), model, "once"), _fetch_data_attempt, endpoint, model))
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_retry_after_or_exponential,
+    retry_error_callback=_log_and_return_empty,
+    retry=retry_if_exception_type(RequestException),
+)
+def _fetch_data_with_retry(endpoint: str, model: Type[T]) -> List[T]:
+    return _fetch_data_attempt(endpoint, model)
+
+
+def fetch_data(endpoint: str, model: Type[T]) -> List[T]:
+    """
+    Fetches and validates an endpoint, retrying transient failures.
+
+    Concurrent calls for the same endpoint and model share one request,
+    whichever API key each of them was signed with.
+    """
+    return list(_inflight.do((endpoint_identity(endpoint), model), _fetch_data_with_retry, endpoint, model))
+
+class JsonRpcError(Exception):
+    """An error object a JSON-RPC node returned for one request."""
+
+    def __init__(self, code: Optional[int], message: str):
+        super().__init__(f"JSON-RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_retry_after_or_exponential,
+    retry=retry_if_exception_type(RequestException),
+    reraise=True,
+)
+def post_json_rpc(url: str, payload: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Any:
+    """
+    POSTs a JSON-RPC request (or batch) to a node and returns the decoded body.
+
+    Transport errors are retried like fetch_data, but re-raised once retries
+    are exhausted: an empty answer from a node would be indistinguishable
+    from "no matching logs".
+    """
+    response = session.post(
+        url,
+        data=json_utils.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=TIMEOUT,
+    )
+    response.raise_for_status()
+    return json_utils.loads(response.content)
+
+
 from typing import Dict
+
+
+class HostConcurrencyLimiter:
+    """
+    Caps the number of in-flight async requests per explorer host.
+
+    Semaphores are created lazily, so the limiter must be used from within
+    the event loop that owns it.
+    """
+
+    def __init__(self, max_per_host: int = MAX_CONCURRENT_REQUESTS_PER_HOST):
+        self.max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def limit(self, endpoint: str) -> asyncio.Semaphore:
+        host = urlparse(endpoint).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            self._semaphores[host] = semaphore
+        return semaphore
+
+
+def _as_response(request_url: str, status: int, reason: Optional[str], headers: Any, body: bytes) -> requests.Response:
+    """Wraps an aiohttp reply in a requests.Response, so both engines share the response handling."""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = request_url
+    response._content = body
+    return response
+
+
+async def _async_get(
+    endpoint: str, limiter: HostConcurrencyLimiter, client: "aiohttp.ClientSession"
+) -> Tuple[str, requests.Response]:
+    """Sends one explorer GET on the event loop through the API key pool, rate limiter and host cap."""
+    request_url = api_key_manager.prepare(endpoint)
+    await rate_limiter.acquire_async(request_url)
+    async with limiter.limit(request_url):
+        try:
+            async with client.get(request_url, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as reply:
+                body = await reply.read()
+                response = _as_response(request_url, reply.status, reply.reason, reply.headers, body)
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"Timed out after {TIMEOUT}s: {endpoint}") from e
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+    rate_limiter.observe_response(request_url, response.status_code, response.headers)
+    api_key_manager.observe_response(request_url, response.status_code)
+    return request_url, response
+
+
+async def async_send_explorer_request(
+    endpoint: str, limiter: HostConcurrencyLimiter, client: "aiohttp.ClientSession"
+) -> Tuple[str, requests.Response]:
+    """
+    Async counterpart of send_explorer_request. Chains with equivalent
+    endpoints get circuit breakers and failover, but no hedged duplicates.
+    """
+    if not endpoint_health.has_alternatives(endpoint):
+        return await _async_get(endpoint, limiter, client)
+    fallback: Optional[Tuple[str, requests.Response]] = None
+    error: Optional[RequestException] = None
+    for url in endpoint_health.candidates(endpoint):
+        started = time.monotonic()
+        try:
+            request_url, response = await _async_get(url, limiter, client)
+        except RequestException as e:
+            endpoint_health.record_failure(url)
+            error = e
+            continue
+        if response.status_code >= 500:
+            endpoint_health.record_failure(url)
+            fallback = (request_url, response)
+            continue
+        endpoint_health.record_success(url, time.monotonic() - started)
+        return request_url, response
+    if fallback is not None:
+        return fallback
+    raise error if error is not None else RequestException("No explorer endpoint answered")
+
+
+async def _async_fetch_data_attempt(
+    endpoint: str, model: Type[T], limiter: HostConcurrencyLimiter, client: "aiohttp.ClientSession"
+) -> List[T]:
+    cached = _cached_records(endpoint, model)
+    if cached is not None:
+        return cached
+
+    try:
+        request_url, response = await async_send_explorer_request(endpoint, limiter, client)
+        return _handle_response(endpoint, model, request_url, response)
+
+    except ApiKeyQuotaExceeded:
+        # Not transient: every later request would fail the same way
+        raise
+    except Exception as e:
+        if isinstance(e, RequestException):
+            raise  # Reraise RequestException to be handled by tenacity
+        logging.error(f"An unexpected error occurred: {str(e)}")
+        _note_failure()
+        return []
+
+
+async def async_fetch_data_once(
+    endpoint: str, model: Type[T], limiter: HostConcurrencyLimiter, client: "aiohttp.ClientSession"
+) -> List[T]:
+    """Single attempt of async_fetch_data; shared and propagating RequestExceptions like fetch_data_once."""
+    key = (endpoint_identity(endpoint), model, "once")
+    return list(await _async_inflight.do(key, _async_fetch_data_attempt, endpoint, model, limiter, client))
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_retry_after_or_exponential,
+    retry_error_callback=_log_and_return_empty,
+    retry=retry_if_exception_type(RequestException),
+)
+async def _async_fetch_data_with_retry(
+    endpoint: str, model: Type[T], limiter: HostConcurrencyLimiter, client: "aiohttp.ClientSession"
+) -> List[T]:
+    return await _async_fetch_data_attempt(endpoint, model, limiter, client)
+
+
+async def async_fetch_data(
+    endpoint: str,
+    model: Type[T],
+    limiter: HostConcurrencyLimiter,
+    client: Optional["aiohttp.ClientSession"] = None,
+) -> List[T]:
+    """
+    Awaitable variant of fetch_data for the asyncio engine.
+
+    With an aiohttp session the request is sent from the event loop, so the
+    number in flight is bounded only by the per-host limiter; cache, retries
+    and validation are shared with fetch_data. Without one (aiohttp not
+    installed) fetch_data runs on the loop's I/O executor instead.
+    """
+    if client is None:
+        async with limiter.limit(endpoint):
+            return await asyncio.to_thread(fetch_data, endpoint, model)
+    key = (endpoint_identity(endpoint), model)
+    return list(await _async_inflight.do(key, _async_fetch_data_with_retry, endpoint, model, limiter, client))
@@ -0,0 +1,76 @@
+import time
+from typing import Optional, Sequence
+from urllib.parse import parse_qsl, urlparse
+
+from pydantic import BaseModel
+
+from block_index import block_index, record_anchors
+from cache_manager import OPEN_END_BLOCK, endpoint_identity, ttl_for
+from config import (
+    CACHE_TTL_OPEN_ENDED,
+    EXPLORER_FALLBACK_URLS,
+    EXPLORER_URLS,
+    FINALITY_DEFAULT_SECONDS,
+    FINALITY_MARGIN_SECONDS,
+    FINALITY_SECONDS,
+)
+
+
+def chain_for_endpoint(endpoint: str) -> Optional[str]:
+    """The chain whose explorer (primary or fallback) serves `endpoint`."""
+    base = endpoint.split("?", 1)[0]
+    for chain, url in EXPLORER_URLS.items():
+        if base == url or base in EXPLORER_FALLBACK_URLS.get(chain, ()):
+            return chain
+    return None
+
+
+def finality_cutoff(chain: Optional[str]) -> int:
+    """Blocks mined at or before this timestamp are treated as final (safety margin included)."""
+    seconds = FINALITY_SECONDS.get(chain, FINALITY_DEFAULT_SECONDS)
+    return int(time.time()) - seconds - FINALITY_MARGIN_SECONDS
+
+
+def finalized_block(chain: Optional[str], records: Sequence[BaseModel] = ()) -> Optional[int]:
+    """
+    A lower bound on the chain's finalized head: the highest block known to
+    be older than the finality cutoff, from `records` and the block index.
+    None when no such block is known.
+    """
+    cutoff = finality_cutoff(chain)
+    known = [block for block, timestamp in record_anchors(records).items() if timestamp <= cutoff]
+    if chain is not None:
+        indexed = block_index.last_block_at(chain, cutoff)
+        if indexed is not None:
+            known.append(indexed)
+    return max(known) if known else None
+
+
+def page_ttl(endpoint: str, records: Sequence[BaseModel]) -> Optional[int]:
+    """
+    Seconds a fetched account page stays fresh, or None if it never changes.
+
+    A page is immutable once nothing can be added to it: either its whole
+    block range is final, or it is a full ascending page whose last record is
+    final (new records only land after it). Pages that reach past the
+    finalized head get the short open-ended TTL. Other endpoints keep their
+    class TTL (`ttl_for`).
+    """
+    params = dict(parse_qsl(urlparse(endpoint_identity(endpoint)).query))
+    if params.get("module") != "account":
+        return ttl_for(endpoint)
+    final = finalized_block(chain_for_endpoint(endpoint), records)
+    if final is None:
+        return CACHE_TTL_OPEN_ENDED
+    try:
+        end_block = int(params.get("endblock", OPEN_END_BLOCK))
+        offset = int(params["offset"])
+    except (KeyError, ValueError):
+        end_block, offset = OPEN_END_BLOCK, None
+    if end_block <= final:
+        return None
+    blocks = record_anchors(records)
+    full_page = offset is not None and len(records) >= offset and params.get("sort", "asc") == "asc"
+    if full_page and blocks and max(blocks) <= final:
+        return None
+    return CACHE_TTL_OPEN_ENDED
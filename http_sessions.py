@@ -0,0 +1,96 @@
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # Optional; without it the asyncio engine sends requests from threads
+    aiohttp = None
+
+from config import (
+    COINGECKO_BASE_URL,
+    DEFILLAMA_BASE_URL,
+    EXPLORER_FALLBACK_URLS,
+    EXPLORER_POOL_MAXSIZE,
+    EXPLORER_URLS,
+    HTTP_POOL_CONNECTIONS,
+    MAX_CONCURRENT_REQUESTS_PER_HOST,
+    PRICE_POOL_MAXSIZE,
+)
+
+# Session names
+EXPLORER = "explorer"
+PRICES = "prices"
+
+
+def _host_prefix(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/"
+
+
+class SessionRegistry:
+    """
+    Named requests sessions with connection pools sized per host.
+
+    Explorer and price API traffic use separate sessions so slow price APIs can
+    never hold the connections explorer calls need. Every known host gets its
+    own mounted HTTPAdapter (and so its own keep-alive pool of `pool_maxsize`
+    connections); other hosts share the session's default adapter.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_adapter(pool_maxsize: int) -> HTTPAdapter:
+        return HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=pool_maxsize)
+
+    def register(self, name: str, hosts: Iterable[str], pool_maxsize: int) -> requests.Session:
+        """Creates (or returns) the named session with one adapter per host."""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is not None:
+                return session
+            session = requests.Session()
+            for scheme in ("https://", "http://"):
+                session.mount(scheme, self._new_adapter(pool_maxsize))
+            for host in set(_host_prefix(url) for url in hosts):
+                session.mount(host, self._new_adapter(pool_maxsize))
+            self._sessions[name] = session
+            return session
+
+    def get(self, name: str) -> requests.Session:
+        with self._lock:
+            return self._sessions[name]
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+def async_explorer_session() -> Optional["aiohttp.ClientSession"]:
+    """
+    A non-blocking explorer session for the asyncio engine, or None when
+    aiohttp is not installed. Must be created (and closed) inside the event
+    loop that uses it; keep-alive connections are pooled per host.
+    """
+    if aiohttp is None:
+        return None
+    connector = aiohttp.TCPConnector(limit=0, limit_per_host=MAX_CONCURRENT_REQUESTS_PER_HOST)
+    return aiohttp.ClientSession(connector=connector)
+
+
+# Singleton instance
+session_registry = SessionRegistry()
+session_registry.register(
+    EXPLORER,
+    [*EXPLORER_URLS.values(), *(url for urls in EXPLORER_FALLBACK_URLS.values() for url in urls)],
+    EXPLORER_POOL_MAXSIZE,
+)
+session_registry.register(PRICES, (COINGECKO_BASE_URL, DEFILLAMA_BASE_URL), PRICE_POOL_MAXSIZE)
@@ -1,4 +1,5 @@
 import argparse
+import asyncio
 import csv
 import logging
 import os
@@ -7,7 +8,7 @@ import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Dict, List, Optional, Type
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Type
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, ValidationError, field_validator, model_validator
@@ -25,6 +26,7 @@ from extract_transaction_data import extract_transaction_data
 from transaction_categorization import detect_swap_from_transfers
 from explorer_adapters import (
     ArbiscanAdapter,
+    AsyncExplorerAdapter,
     BasescanAdapter,
     EtherscanAdapter,
     ExplorerAdapter,
@@ -32,11 +34,27 @@ from explorer_adapters import (
     OptimismAdapter,
     PolygonAdapter,
 )
-from models import Transaction, TransactionType
-from config import EXPLORER_URLS
+from receipts import enrich_with_receipts
+from rpc_adapter import NativeScanTooWide, RpcAdapter
+from api_key_pool import ApiKeyQuotaExceeded
+from models import Raw1155Transfer, RawNFTTransfer, RawTokenTransfer, RawTransaction, Transaction, TransactionType
+from config import (
+    ASYNC_IO_WORKERS,
+    ASYNC_MAX_CONCURRENT_WALLETS,
+    EXPLORER_URLS,
+    MAX_WORKERS,
+)
+from fetch_blockchain_data import HostConcurrencyLimiter, failed_fetch_count
+from http_sessions import async_explorer_session
+from sync_state import sync_state
+from record_store import record_store
+from block_index import block_index
 from balance_utils import calculate_token_balances, format_balance_summary
 from version_check import print_update_notification
 
+if TYPE_CHECKING:
+    import aiohttp
+
 # Load environment variables (will be handled in main if password provided)
 # load_dotenv()
 
@@ -58,7 +76,25 @@ ADAPTERS: Dict[str, Type[ExplorerAdapter]] = {
 }
 
 # Global ThreadPoolExecutor for concurrent tasks
-GLOBAL_EXECUTOR = ThreadPoolExecutor(max_workers=10)
+GLOBAL_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+# Fetch engines selectable from the CLI
+ENGINES = ("threads", "asyncio")
+
+# Data backends: explorer APIs (ADAPTERS) or a JSON-RPC node (RpcAdapter)
+BACKENDS = ("explorer", "rpc")
+
+# Fetch errors that fail the whole wallet: writing it without the endpoint's records would under-report it
+WALLET_FATAL_ERRORS = (NativeScanTooWide, ApiKeyQuotaExceeded)
+
+# Raw record model of each endpoint task (used to reload incrementally synced records)
+ENDPOINT_MODELS: Dict[str, Type[BaseModel]] = {
+    "transactions": RawTransaction,
+    "token_transfers": RawTokenTransfer,
+    "internal_transactions": RawTransaction,
+    "nft_transfers": RawNFTTransfer,
+    "1155_transfers": Raw1155Transfer,
+}
 
 
 class Args(BaseModel):
@@ -73,6 +109,11 @@ class Args(BaseModel):
     consolidated: bool = False
     run_validation: bool = False
     rpc_url: Optional[str] = None
+    engine: str = "threads"
+    sharded: bool = False
+    incremental: bool = False
+    backend: str = "explorer"
+    receipts: bool = False
 
     @field_validator("start_date", "end_date")
     def validate_date_format(cls, v):
@@ -106,6 +147,14 @@ class Args(BaseModel):
             self.end_date = f"{self.tax_year}-12-31"
         return self
 
+    @model_validator(mode="after")
+    def check_rpc_backend_range(self):
+        # The rpc backend fetches every block for native transfers, so a scan from genesis is never intended;
+        # with --incremental the start date bounds the first run
+        if self.backend == "rpc" and not self.start_date:
+            raise ValueError("--backend rpc scans every block in range; pass --start-date or --year")
+        return self
+
 
 def is_valid_evm_address(address: str) -> bool:
     """
@@ -291,78 +340,88 @@ def get_addresses_from_file(file_path: str) -> List[str]:
     return addresses
 
 
-def process_transactions(
-    wallet_address: str,
-    chain: str,
-    start_date_str: Optional[str] = None,
-    end_date_str: Optional[str] = None,
-    fees_only: bool = False,
-    rpc_url: Optional[str] = None,
-    executor: ThreadPoolExecutor = GLOBAL_EXECUTOR,
-) -> List[Transaction]:
-    # Get the adapter for the selected chain
-    adapter_class = ADAPTERS.get(chain)
-    if not adapter_class:
-        raise ValueError(f"Unsupported chain: {chain}")
-    adapter = adapter_class(chain, rpc_url=rpc_url)
-
-    start_block = 0
-    end_block = 99999999
-
+def _date_range_to_timestamps(
+    start_date_str: Optional[str], end_date_str: Optional[str]
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Converts the inclusive YYYY-MM-DD date range into UTC unix timestamps.
+    """
+    start_ts = end_ts = None
     if start_date_str:
         start_ts = int(
             datetime.strptime(start_date_str, "%Y-%m-%d")
             .replace(tzinfo=timezone.utc)
             .timestamp()
         )
-        start_block = adapter.get_block_number_by_timestamp(start_ts, "after")
-
     if end_date_str:
         end_ts = int(
             datetime.strptime(end_date_str, "%Y-%m-%d")
             .replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
             .timestamp()
         )
-        end_block = adapter.get_block_number_by_timestamp(end_ts, "before")
+    return start_ts, end_ts
 
-    # Fetch transactions concurrently
-    futures = {}
-    # Submit all tasks and map futures to task types
-    futures[executor.submit(adapter.get_transactions, wallet_address, start_block, end_block)] = "transactions"
-    futures[executor.submit(adapter.get_token_transfers, wallet_address, start_block, end_block)] = "token_transfers"
-    futures[executor.submit(adapter.get_internal_transactions, wallet_address, start_block, end_block)] = "internal_transactions"
-    futures[executor.submit(adapter.get_nft_transfers, wallet_address, start_block, end_block)] = "nft_transfers"
-    futures[executor.submit(adapter.get_1155_transfers, wallet_address, start_block, end_block)] = "1155_transfers"
 
-    # Initialize variables
-    transactions = token_transfers = internal_transactions = nft_transfers = _1155_transfers = None
+def _get_adapter(
+    chain: str, rpc_url: Optional[str] = None, sharded: bool = False, backend: str = "explorer"
+) -> ExplorerAdapter:
+    if backend == "rpc":
+        return RpcAdapter(chain, rpc_url=rpc_url)
+    adapter_class = ADAPTERS.get(chain)
+    if not adapter_class:
+        raise ValueError(f"Unsupported chain: {chain}")
+    return adapter_class(chain, rpc_url=rpc_url, sharded=sharded)
 
-    # Track progress with tqdm
-    for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching blockchain data", unit="task", leave=False):
-        task_type = futures[future]
-        try:
-            result = future.result()
-        except Exception as e:
-            logging.error(f"Error fetching {task_type}: {e}")
-            result = []
-        
-        if task_type == "transactions":
-            transactions = result
-        elif task_type == "token_transfers":
-            token_transfers = result
-        elif task_type == "internal_transactions":
-            internal_transactions = result
-        elif task_type == "nft_transfers":
-            nft_transfers = result
-        elif task_type == "1155_transfers":
-            _1155_transfers = result
-
-    # Ensure all variables are set
-    transactions = transactions or []
-    token_transfers = token_transfers or []
-    internal_transactions = internal_transactions or []
-    nft_transfers = nft_transfers or []
-    _1155_transfers = _1155_transfers or []
+
+def _incremental_start_blocks(chain: str, wallet_address: str, first_block: int = 0) -> Dict[str, int]:
+    """Start block of each endpoint task for an incremental run; never-synced tasks start at `first_block`."""
+    return {
+        task_type: max(sync_state.resume_block(chain, wallet_address, task_type), first_block)
+        for task_type in ENDPOINT_MODELS
+    }
+
+
+def _merge_incremental(
+    chain: str,
+    wallet_address: str,
+    adapter: ExplorerAdapter,
+    start_blocks: Dict[str, int],
+    end_block: int,
+    fetched: Dict[str, List],
+    complete: bool,
+) -> Dict[str, List]:
+    """Merges newly fetched records into the stored history of each endpoint task."""
+    # Paginated adapters already saved their fetches to the record store
+    stored = adapter.paginated and record_store.enabled()
+    return {
+        task_type: sync_state.merge(
+            chain, wallet_address, task_type, start_blocks[task_type], end_block,
+            fetched.get(task_type) or [], ENDPOINT_MODELS[task_type], stored=stored, complete=complete,
+        )
+        for task_type in ENDPOINT_MODELS
+    }
+
+
+def build_wallet_transactions(
+    wallet_address: str,
+    chain: str,
+    fetched: Dict[str, List],
+    start_date_str: Optional[str] = None,
+    end_date_str: Optional[str] = None,
+    fees_only: bool = False,
+) -> List[Transaction]:
+    """
+    Turns the raw records fetched per task type into the final, merged list of
+    transactions for a wallet. Shared by the thread pool and asyncio engines.
+    """
+    transactions = fetched.get("transactions") or []
+    token_transfers = fetched.get("token_transfers") or []
+    internal_transactions = fetched.get("internal_transactions") or []
+    nft_transfers = fetched.get("nft_transfers") or []
+    _1155_transfers = fetched.get("1155_transfers") or []
+
+    # Every record pins a block to its timestamp for later date-to-block lookups
+    block_index.add_records(chain, (record for records in fetched.values() for record in records or []))
 
     # Extract transaction data
     extracted_regular_transactions = extract_transaction_data(
@@ -416,6 +475,205 @@ def process_transactions(
     return all_sorted_transactions
 
 
+def process_transactions(
+    wallet_address: str,
+    chain: str,
+    start_date_str: Optional[str] = None,
+    end_date_str: Optional[str] = None,
+    fees_only: bool = False,
+    rpc_url: Optional[str] = None,
+    executor: ThreadPoolExecutor = GLOBAL_EXECUTOR,
+    sharded: bool = False,
+    incremental: bool = False,
+    backend: str = "explorer",
+    receipts: bool = False,
+) -> List[Transaction]:
+    """
+    Fetches and builds a wallet's transactions.
+
+    With `incremental`, each endpoint is fetched only from its stored
+    high-water mark (minus the reorg margin) and merged into the stored
+    history; the date range then only filters the output.
+    """
+    # Get the adapter for the selected chain
+    adapter = _get_adapter(chain, rpc_url, sharded, backend)
+
+    start_block = 0
+    end_block = 99999999
+
+    if incremental and backend != "rpc":
+        start_blocks = _incremental_start_blocks(chain, wallet_address)
+    else:
+        start_ts, end_ts = _date_range_to_timestamps(start_date_str, end_date_str)
+        if start_ts is not None:
+            start_block = adapter.get_block_number_by_timestamp(start_ts, "after")
+        if end_ts is not None and not incremental:
+            end_block = adapter.get_block_number_by_timestamp(end_ts, "before")
+        start_blocks = dict.fromkeys(ENDPOINT_MODELS, start_block)
+        if incremental:
+            # The rpc backend cannot scan from genesis: the first run starts at the start date
+            start_blocks = _incremental_start_blocks(chain, wallet_address, start_block)
+
+    failures = failed_fetch_count()
+    # Fetch transactions concurrently
+    futures = {}
+    # Submit all tasks and map futures to task types
+    futures[executor.submit(adapter.get_transactions, wallet_address, start_blocks["transactions"], end_block)] = "transactions"
+    futures[executor.submit(adapter.get_token_transfers, wallet_address, start_blocks["token_transfers"], end_block)] = "token_transfers"
+    futures[executor.submit(adapter.get_internal_transactions, wallet_address, start_blocks["internal_transactions"], end_block)] = "internal_transactions"
+    futures[executor.submit(adapter.get_nft_transfers, wallet_address, start_blocks["nft_transfers"], end_block)] = "nft_transfers"
+    futures[executor.submit(adapter.get_1155_transfers, wallet_address, start_blocks["1155_transfers"], end_block)] = "1155_transfers"
+
+    fetched: Dict[str, List] = {}
+
+    # Track progress with tqdm
+    for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching blockchain data", unit="task", leave=False):
+        task_type = futures[future]
+        try:
+            fetched[task_type] = future.result()
+        except WALLET_FATAL_ERRORS:
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching {task_type}: {e}")
+            fetched[task_type] = []
+
+    if incremental:
+        fetched = _merge_incremental(
+            chain, wallet_address, adapter, start_blocks, end_block, fetched, failed_fetch_count() == failures
+        )
+
+    if receipts:
+        fetched["transactions"] = enrich_with_receipts(
+            fetched["transactions"], wallet_address, chain, adapter.rpc_url if backend == "rpc" else None
+        )
+
+    return build_wallet_transactions(
+        wallet_address, chain, fetched, start_date_str, end_date_str, fees_only=fees_only
+    )
+
+
+async def async_process_transactions(
+    wallet_address: str,
+    chain: str,
+    start_date_str: Optional[str] = None,
+    end_date_str: Optional[str] = None,
+    fees_only: bool = False,
+    rpc_url: Optional[str] = None,
+    limiter: Optional[HostConcurrencyLimiter] = None,
+    sharded: bool = False,
+    incremental: bool = False,
+    backend: str = "explorer",
+    receipts: bool = False,
+    client: Optional["aiohttp.ClientSession"] = None,
+) -> List[Transaction]:
+    """
+    Asyncio counterpart of process_transactions. The five endpoint fetches run
+    concurrently on the event loop, sharing the per-host request limiter and,
+    when given, the aiohttp session their pages are sent on.
+    """
+    adapter = AsyncExplorerAdapter(
+        _get_adapter(chain, rpc_url, sharded, backend), limiter or HostConcurrencyLimiter(), client
+    )
+
+    start_block = 0
+    end_block = 99999999
+
+    if incremental and backend != "rpc":
+        start_blocks = await asyncio.to_thread(_incremental_start_blocks, chain, wallet_address)
+    else:
+        start_ts, end_ts = _date_range_to_timestamps(start_date_str, end_date_str)
+        if start_ts is not None:
+            start_block = await adapter.get_block_number_by_timestamp(start_ts, "after")
+        if end_ts is not None and not incremental:
+            end_block = await adapter.get_block_number_by_timestamp(end_ts, "before")
+        start_blocks = dict.fromkeys(ENDPOINT_MODELS, start_block)
+        if incremental:
+            # The rpc backend cannot scan from genesis: the first run starts at the start date
+            start_blocks = await asyncio.to_thread(_incremental_start_blocks, chain, wallet_address, start_block)
+
+    failures = failed_fetch_count()
+    tasks = {
+        "transactions": adapter.get_transactions,
+        "token_transfers": adapter.get_token_transfers,
+        "internal_transactions": adapter.get_internal_transactions,
+        "nft_transfers": adapter.get_nft_transfers,
+        "1155_transfers": adapter.get_1155_transfers,
+    }
+    results = await asyncio.gather(
+        *(fetch(wallet_address, start_blocks[task_type], end_block) for task_type, fetch in tasks.items()),
+        return_exceptions=True,
+    )
+
+    fetched: Dict[str, List] = {}
+    for task_type, result in zip(tasks, results):
+        if isinstance(result, WALLET_FATAL_ERRORS):
+            raise result
+        if isinstance(result, BaseException):
+            logging.error(f"Error fetching {task_type}: {result}")
+            result = []
+        fetched[task_type] = result
+
+    if incremental:
+        fetched = await asyncio.to_thread(
+            _merge_incremental,
+            chain, wallet_address, adapter.adapter, start_blocks, end_block, fetched, failed_fetch_count() == failures,
+        )
+
+    if receipts:
+        fetched["transactions"] = await asyncio.to_thread(
+            enrich_with_receipts,
+            fetched["transactions"], wallet_address, chain, adapter.adapter.rpc_url if backend == "rpc" else None,
+        )
+
+    # Extraction may look up prices over HTTP, so keep it off the event loop
+    return await asyncio.to_thread(
+        build_wallet_transactions,
+        wallet_address, chain, fetched, start_date_str, end_date_str, fees_only,
+    )
+
+
+def _write_wallet_output(
+    wallet_address: str,
+    chain: str,
+    output_format: str,
+    all_sorted_transactions: List[Transaction],
+    consolidated: bool = False,
+    index: int = 0,
+    total_count: int = 1,
+    run_validation: bool = False,
+) -> None:
+    """
+    Writes a wallet's transactions and logs its audit summary.
+    """
+    # Convert Pydantic models to dictionaries for writers
+    output_data = [trx.model_dump(by_alias=True) for trx in all_sorted_transactions]
+
+    # Define the output path based on the format
+    output_file = f"output/{wallet_address}_transactions.{output_format}"
+
+    # Write data using the WriterFactory
+    if not consolidated:
+        writer = WriterFactory.get_writer(output_format)
+        writer.write(output_file, output_data, chain=chain, consolidated=consolidated)
+
+    if not consolidated:
+        logging.info(
+            f"({index + 1}/{total_count}) "
+            f"Successfully wrote {len(output_data)} transactions to {output_file} for wallet {wallet_address}"
+        )
+
+    # Log Token Balance Audit Summary
+    balances = calculate_token_balances(all_sorted_transactions)
+    summary = format_balance_summary(balances)
+    logging.info(f"Audit Summary for {wallet_address}:\n{summary}")
+
+    # Run Koinly validation if requested
+    if run_validation and output_format == "koinly":
+        from validation import validate_transactions_for_koinly, print_validation_report
+        errors = validate_transactions_for_koinly(output_data)
+        print_validation_report(errors)
+
+
 def process_single_wallet(
     wallet_address: str,
     chain: str,
@@ -429,42 +687,65 @@ def process_single_wallet(
     run_validation: bool = False,
     rpc_url: Optional[str] = None,
     executor: ThreadPoolExecutor = GLOBAL_EXECUTOR,
+    sharded: bool = False,
+    incremental: bool = False,
+    backend: str = "explorer",
+    receipts: bool = False,
 ) -> None:
     """
     Processes a single wallet address.
     """
     try:
         all_sorted_transactions = process_transactions(
-            wallet_address, chain, start_date, end_date, fees_only=fees_only, rpc_url=rpc_url, executor=executor
+            wallet_address, chain, start_date, end_date, fees_only=fees_only, rpc_url=rpc_url, executor=executor,
+            sharded=sharded, incremental=incremental, backend=backend, receipts=receipts,
         )
 
-        # Convert Pydantic models to dictionaries for writers
-        output_data = [trx.model_dump(by_alias=True) for trx in all_sorted_transactions]
+        _write_wallet_output(
+            wallet_address, chain, output_format, all_sorted_transactions,
+            consolidated, index, total_count, run_validation,
+        )
 
-        # Define the output path based on the format
-        output_file = f"output/{wallet_address}_transactions.{output_format}"
+        return all_sorted_transactions
 
-        # Write data using the WriterFactory
-        if not consolidated:
-            writer = WriterFactory.get_writer(output_format)
-            writer.write(output_file, output_data, chain=chain, consolidated=consolidated)
-
-        if not consolidated:
-            logging.info(
-                f"({index + 1}/{total_count}) "
-                f"Successfully wrote {len(output_data)} transactions to {output_file} for wallet {wallet_address}"
-            )
+    except Exception as e:
+        logging.exception(f"Failed to process address {wallet_address}: {e}")
+        raise
 
-        # Log Token Balance Audit Summary
-        balances = calculate_token_balances(all_sorted_transactions)
-        summary = format_balance_summary(balances)
-        logging.info(f"Audit Summary for {wallet_address}:\n{summary}")
 
-        # Run Koinly validation if requested
-        if run_validation and output_format == "koinly":
-            from validation import validate_transactions_for_koinly, print_validation_report
-            errors = validate_transactions_for_koinly(output_data)
-            print_validation_report(errors)
+async def async_process_single_wallet(
+    wallet_address: str,
+    chain: str,
+    output_format: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fees_only: bool = False,
+    consolidated: bool = False,
+    index: int = 0,
+    total_count: int = 1,
+    run_validation: bool = False,
+    rpc_url: Optional[str] = None,
+    limiter: Optional[HostConcurrencyLimiter] = None,
+    sharded: bool = False,
+    incremental: bool = False,
+    backend: str = "explorer",
+    receipts: bool = False,
+    client: Optional["aiohttp.ClientSession"] = None,
+) -> List[Transaction]:
+    """
+    Processes a single wallet address on the asyncio engine.
+    """
+    try:
+        all_sorted_transactions = await async_process_transactions(
+            wallet_address, chain, start_date, end_date, fees_only=fees_only, rpc_url=rpc_url, limiter=limiter,
+            sharded=sharded, incremental=incremental, backend=backend, receipts=receipts, client=client,
+        )
+
+        await asyncio.to_thread(
+            _write_wallet_output,
+            wallet_address, chain, output_format, all_sorted_transactions,
+            consolidated, index, total_count, run_validation,
+        )
 
         return all_sorted_transactions
 
@@ -473,6 +754,70 @@ def process_single_wallet(
         raise
 
 
+async def async_process_wallets(
+    addresses: List[str],
+    chain: str,
+    output_format: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fees_only: bool = False,
+    consolidated: bool = False,
+    rpc_url: Optional[str] = None,
+    run_validation: bool = False,
+    sharded: bool = False,
+    incremental: bool = False,
+    backend: str = "explorer",
+    receipts: bool = False,
+) -> List[Tuple[str, List[Transaction]]]:
+    """
+    Drives every wallet of a batch from a single event loop.
+
+    At most ASYNC_MAX_CONCURRENT_WALLETS wallets are in progress at once, and
+    all of them share one HostConcurrencyLimiter so each explorer host sees a
+    bounded number of in-flight requests regardless of batch size.
+
+    Explorer pages are sent on one aiohttp session, so requests in flight are
+    bounded by the limiter rather than by threads. Without aiohttp installed
+    they fall back to the ASYNC_IO_WORKERS threads, which otherwise only run
+    blocking work: block lookups, price lookups, extraction and writing.
+    """
+    loop = asyncio.get_running_loop()
+    io_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_WORKERS)
+    loop.set_default_executor(io_executor)
+
+    limiter = HostConcurrencyLimiter()
+    wallet_slots = asyncio.Semaphore(ASYNC_MAX_CONCURRENT_WALLETS)
+    client = async_explorer_session()
+    if client is None:
+        logging.warning(
+            f"aiohttp is not installed; the asyncio engine sends requests from {ASYNC_IO_WORKERS} threads."
+        )
+
+    async def run_wallet(index: int, wallet_address: str) -> Tuple[str, List[Transaction]]:
+        async with wallet_slots:
+            try:
+                txs = await async_process_single_wallet(
+                    wallet_address, chain, output_format, start_date, end_date, fees_only,
+                    consolidated, index, len(addresses), run_validation, rpc_url, limiter,
+                    sharded=sharded, incremental=incremental, backend=backend, receipts=receipts, client=client,
+                )
+            except Exception as e:
+                logging.exception(f"Error processing wallet {wallet_address}: {e}")
+                txs = []
+            return wallet_address, txs
+
+    tasks = [run_wallet(i, wallet_address) for i, wallet_address in enumerate(addresses)]
+    results = []
+    try:
+        for next_done in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Processing wallets", unit="wallet"):
+            results.append(await next_done)
+    finally:
+        if client is not None:
+            await client.close()
+
+    return results
+
+
 def process_batch_transactions(
     addresses: List[str],
     chain: str,
@@ -483,45 +828,69 @@ def process_batch_transactions(
     consolidated: bool = False,
     rpc_url: Optional[str] = None,
     run_validation: bool = False,
+    engine: str = "threads",
+    sharded: bool = False,
+    incremental: bool = False,
+    backend: str = "explorer",
+    receipts: bool = False,
 ) -> None:
     """
     Processes multiple wallet addresses concurrently.
+
+    The "threads" engine runs wallets on GLOBAL_EXECUTOR; the "asyncio" engine
+    drives all of them from one event loop (see async_process_wallets).
     """
     total = len(addresses)
     logging.info(f"Starting batch process for {total} wallet(s) on {chain}...")
 
     all_consolidated_transactions = []
 
-    futures = {
-        GLOBAL_EXECUTOR.submit(
-            process_single_wallet,
-            wallet_address,
-            chain,
-            output_format,
-            start_date,
-            end_date,
-            fees_only,
-            consolidated,
-            i,
-            len(addresses),
-            run_validation,
-            rpc_url,
-            GLOBAL_EXECUTOR,
-        ): wallet_address
-        for i, wallet_address in enumerate(addresses)
-    }
-
-    for future in tqdm(as_completed(futures), total=len(futures), desc="Processing wallets", unit="wallet"):
-        wallet_address = futures[future]
-        try:
-            if consolidated:
-                txs = future.result()
+    if engine == "asyncio":
+        results = asyncio.run(
+            async_process_wallets(
+                addresses, chain, output_format, start_date, end_date,
+                fees_only, consolidated, rpc_url, run_validation, sharded, incremental, backend, receipts,
+            )
+        )
+        if consolidated:
+            for wallet_address, txs in results:
                 for tx in txs:
                     all_consolidated_transactions.append((wallet_address, tx))
-            else:
-                future.result()
-        except Exception as e:
-            logging.exception(f"Error processing wallet {wallet_address}: {e}")
+    else:
+        futures = {
+            GLOBAL_EXECUTOR.submit(
+                process_single_wallet,
+                wallet_address,
+                chain,
+                output_format,
+                start_date,
+                end_date,
+                fees_only,
+                consolidated,
+                i,
+                len(addresses),
+                run_validation,
+                rpc_url,
+                GLOBAL_EXECUTOR,
+                sharded,
+                incremental,
+                backend,
+                receipts,
+            ): wallet_address
+            for i, wallet_address in enumerate(addresses)
+        }
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing wallets", unit="wallet"):
+            wallet_address = futures[future]
+            try:
+                if consolidated:
+                    txs = future.result()
+                    for tx in txs:
+                        all_consolidated_transactions.append((wallet_address, tx))
+                else:
+                    future.result()
+            except Exception as e:
+                logging.exception(f"Error processing wallet {wallet_address}: {e}")
 
     if consolidated and all_consolidated_transactions:
         # Sort all by date
@@ -620,6 +989,35 @@ def main() -> None:
         type=str,
         help="Custom RPC/explorer API URL (overrides default for selected chain).",
     )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        choices=list(ENGINES),
+        default="threads",
+        help="Fetch engine: 'threads' (thread pool) or 'asyncio' (one event loop, suited to large batches).",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Fetch each endpoint as concurrent block-range shards (complete results for wallets beyond the 10k result window).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch blocks after each wallet's last synced block and merge them into the stored history.",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=list(BACKENDS),
+        default="explorer",
+        help="Data source: 'explorer' (Etherscan-style API) or 'rpc' (JSON-RPC node from --rpc-url, RPC_URL_<CHAIN> or config).",
+    )
+    parser.add_argument(
+        "--receipts",
+        action="store_true",
+        help="Fetch receipts of outgoing transactions (batched JSON-RPC) for exact gas used, gas price and L1 fees.",
+    )
     parser.add_argument(
         "--year",
         type=int,
@@ -694,6 +1092,11 @@ def main() -> None:
         validated_args.consolidated,
         validated_args.rpc_url,
         validated_args.run_validation,
+        engine=validated_args.engine,
+        sharded=validated_args.sharded,
+        incremental=validated_args.incremental,
+        backend=validated_args.backend,
+        receipts=validated_args.receipts,
     )
 
 
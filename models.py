@@ -1,5 +1,7 @@
-from typing import Any, Optional, Union
-from pydantic import BaseModel, Field, AliasChoices, model_validator
+import sys
+import weakref
+from typing import Any, Dict, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, AliasChoices, field_validator, model_validator
 from enum import Enum
 
 
@@ -21,7 +23,15 @@ class TransactionType(Enum):
     BORROW = "borrow"
 
 
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class Address(BaseModel):
+    """An address, stored lowercased and interned so comparisons need no .lower()."""
+
+    model_config = ConfigDict(frozen=True)
+
     hash: str
 
     @model_validator(mode="before")
@@ -31,16 +41,103 @@ class Address(BaseModel):
             return {"hash": data}
         return data
 
+    @field_validator("hash")
+    @classmethod
+    def normalize_hash(cls, value: str) -> str:
+        return sys.intern(value.lower())
+
+    @classmethod
+    def shared(cls, data: Any) -> Any:
+        """
+        The one live Address instance for an address, so the wallet and common
+        counterparties are not re-allocated for every record. Data that is not
+        an address is returned unchanged for validation to reject.
+        """
+        value = data.get("hash") if isinstance(data, dict) else data.hash if isinstance(data, Address) else data
+        if not isinstance(value, str):
+            return data
+        key = value.lower()
+        address = _ADDRESSES.get(key)
+        if address is None:
+            address = _ADDRESSES.setdefault(key, cls(hash=key))
+        return address
+
 
 class Token(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     symbol: str
 
+    @field_validator("symbol")
+    @classmethod
+    def intern_symbol(cls, value: str) -> str:
+        return sys.intern(value)
+
+    @classmethod
+    def shared(cls, data: Any) -> Any:
+        """The one live Token instance per symbol; see Address.shared."""
+        symbol = data.get("symbol") if isinstance(data, dict) else data.symbol if isinstance(data, Token) else None
+        if not isinstance(symbol, str):
+            return data
+        token = _TOKENS.get(symbol)
+        if token is None:
+            token = _TOKENS.setdefault(symbol, cls(symbol=symbol))
+        return token
+
 
 class Total(BaseModel):
     value: str
 
 
-class RawTransaction(BaseModel):
+# Live shared instances; entries go away with the last record using them
+_ADDRESSES: "weakref.WeakValueDictionary[str, Address]" = weakref.WeakValueDictionary()
+_TOKENS: "weakref.WeakValueDictionary[str, Token]" = weakref.WeakValueDictionary()
+
+
+class RawRecord(BaseModel):
+    """
+    Shared behaviour of the raw explorer records: sender and recipient (and
+    token) are shared interned instances, and records that were validated
+    before (e.g. stored by an incremental sync) can be rebuilt without
+    validation through `trusted`.
+    """
+
+    @field_validator("from_address", "to_address", mode="before", check_fields=False)
+    @classmethod
+    def share_address(cls, value: Any) -> Any:
+        return Address.shared(value)
+
+    @field_validator("token", mode="before", check_fields=False)
+    @classmethod
+    def share_token(cls, value: Any) -> Any:
+        return Token.shared(value)
+
+    @field_validator("tokenSymbol", "tokenName", mode="before", check_fields=False)
+    @classmethod
+    def intern_names(cls, value: Any) -> Any:
+        return _intern(value)
+
+    @classmethod
+    def trusted(cls, data: Dict[str, Any]):
+        """
+        Builds a record from a dump of an already validated record
+        (`model_dump(by_alias=True)`), skipping validators.
+        """
+        values = dict(data)
+        for key in ("from", "to"):
+            if key in values:
+                values[key] = Address.shared(values[key])
+        if "token" in values:
+            values["token"] = Token.shared(values["token"])
+        if isinstance(values.get("total"), dict):
+            values["total"] = Total.model_construct(**values["total"])
+        for key in ("tokenSymbol", "tokenName"):
+            if key in values:
+                values[key] = _intern(values[key])
+        return cls.model_construct(**values)
+
+
+class RawTransaction(RawRecord):
     hash: str = Field(..., validation_alias=AliasChoices("hash", "transactionHash"))
     timeStamp: str
     from_address: Address = Field(..., alias="from")
@@ -48,9 +145,13 @@ class RawTransaction(BaseModel):
     value: str
     gasUsed: Optional[str] = Field(None, validation_alias=AliasChoices("gasUsed", "gas"))
     gasPrice: Optional[str] = None
+    blockNumber: Optional[Union[str, int]] = None
+    # Filled in from the transaction receipt when receipts are fetched
+    effectiveGasPrice: Optional[str] = None
+    l1Fee: Optional[str] = None
 
 
-class RawTokenTransfer(BaseModel):
+class RawTokenTransfer(RawRecord):
     hash: str = Field(..., validation_alias=AliasChoices("hash", "transactionHash"))
     timeStamp: str
     from_address: Address = Field(..., alias="from")
@@ -59,9 +160,11 @@ class RawTokenTransfer(BaseModel):
     token: Token
     tokenDecimal: str
     contractAddress: str
+    blockNumber: Optional[Union[str, int]] = None
+    logIndex: Optional[Union[str, int]] = None
 
 
-class RawNFTTransfer(BaseModel):
+class RawNFTTransfer(RawRecord):
     hash: str = Field(..., validation_alias=AliasChoices("hash", "transactionHash"))
     timeStamp: str
     from_address: Address = Field(..., alias="from")
@@ -70,9 +173,11 @@ class RawNFTTransfer(BaseModel):
     tokenName: str
     tokenSymbol: str
     tokenDecimal: Optional[str] = "0"
+    blockNumber: Optional[Union[str, int]] = None
+    logIndex: Optional[Union[str, int]] = None
 
 
-class Raw1155Transfer(BaseModel):
+class Raw1155Transfer(RawRecord):
     hash: str = Field(..., validation_alias=AliasChoices("hash", "transactionHash"))
     timeStamp: str
     from_address: Address = Field(..., alias="from")
@@ -81,6 +186,8 @@ class Raw1155Transfer(BaseModel):
     tokenValue: str
     tokenName: str
     tokenSymbol: str
+    blockNumber: Optional[Union[str, int]] = None
+    logIndex: Optional[Union[str, int]] = None
 
 
 class Transaction(BaseModel):
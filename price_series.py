@@ -0,0 +1,52 @@
+import threading
+from bisect import bisect_left, insort
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from price_store import GRANULARITY_SECONDS, bucket_start
+
+
+class PriceSeries:
+    """
+    Price points of one asset, sorted by timestamp, and the time spans they
+    were fetched for.
+
+    Lookups are binary searches: a bucket's price is the point nearest to the
+    bucket's start, if one lies within a bucket width of it. Daily lookups
+    therefore match the 00:00 UTC price a per-day history call returns.
+    """
+
+    def __init__(self):
+        self.times: List[int] = []
+        self.prices: List[Decimal] = []
+        self.spans: List[Tuple[int, int]] = []
+        self._lock = threading.Lock()
+
+    def covers(self, timestamp: int) -> bool:
+        """Whether a fetched span contains `timestamp` (so a missing point means "no price")."""
+        with self._lock:
+            return any(start <= timestamp <= end for start, end in self.spans)
+
+    def add(self, start: int, end: int, points: Iterable[Tuple[int, Decimal]]) -> None:
+        """Adds the points fetched for [start, end]; points already known are kept."""
+        with self._lock:
+            known = set(self.times)
+            for timestamp, price in sorted(points):
+                if timestamp in known:
+                    continue
+                i = bisect_left(self.times, timestamp)
+                self.times.insert(i, timestamp)
+                self.prices.insert(i, price)
+                known.add(timestamp)
+            insort(self.spans, (start, end))
+
+    def lookup(self, timestamp: int, granularity: str) -> Optional[Decimal]:
+        width = GRANULARITY_SECONDS[granularity]
+        target = bucket_start(timestamp, granularity)
+        with self._lock:
+            i = bisect_left(self.times, target)
+            nearest = [j for j in (i - 1, i) if 0 <= j < len(self.times)]
+            if not nearest:
+                return None
+            j = min(nearest, key=lambda k: abs(self.times[k] - target))
+            return self.prices[j] if abs(self.times[j] - target) < width else None
@@ -1,20 +1,84 @@
+import json
 import logging
 import os
+import threading
 import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from typing import Dict, Optional, Union
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 from decimal import Decimal
 
+from tqdm import tqdm
+
 from config import (
-    COINGECKO_BASE_URL, COINGECKO_PLATFORM_MAP, TIMEOUT, NATIVE_CURRENCIES,
-    DEFILLAMA_BASE_URL, DEFILLAMA_COIN_MAP, DEFILLAMA_PLATFORM_MAP
+    COINGECKO_BASE_URL, COINGECKO_PLATFORM_MAP, COINGECKO_PRICE_MODE, COINGECKO_RANGE_GRANULARITY,
+    TIMEOUT, NATIVE_CURRENCIES,
+    DEFILLAMA_BASE_URL, DEFILLAMA_COIN_MAP, DEFILLAMA_PLATFORM_MAP,
+    DEFILLAMA_BATCH_SIZE, DEFILLAMA_BATCH_WORKERS, DEFILLAMA_SEARCH_WIDTH, PRICE_SOURCE,
 )
-from fetch_blockchain_data import session
+from coin_index import CoinIndexUnavailable, coin_index
+from http_sessions import PRICES, session_registry
+from price_series import PriceSeries
+from price_store import PriceKey, bucket_start, price_store
+from single_flight import SingleFlight
+
+# Price APIs get their own session so they cannot starve explorer connections
+session = session_registry.get(PRICES)
+
+# In-process cache in front of the persistent price store, to avoid redundant API calls and respect rate limits
+# Keys are (source, asset id, granularity, bucket timestamp), see price_store.PriceKey:
+# ("coingecko", "platform:contract_address", "day", day) for tokens, ("coingecko", coin_id, "day", day)
+# for native coins and ("defillama", token_id, "exact", timestamp) for DefiLlama
+_price_cache: Dict[PriceKey, Optional[Decimal]] = {}
+
+# Concurrent lookups of the same price (same cache key) share one request
+_price_inflight = SingleFlight()
+
+
+# Range mode: per-coin price series from /coins/{id}/market_chart/range
+_series: Dict[str, PriceSeries] = {}
+_series_lock = threading.Lock()
+_series_inflight = SingleFlight()
+
+# Longest range CoinGecko answers with hourly points
+HOURLY_RANGE_SECONDS = 90 * 86400
+
+# A price a row needs: (chain, timestamp, contract address, symbol), as passed to get_token_price
+PriceRequest = Tuple[str, int, Optional[str], Optional[str]]
+
+
+class PriceLookupError(Exception):
+    """A price source could not be reached or answered with an error (as opposed to "no price")."""
+
+
+def _cached_price(cache_key: PriceKey, fetch: Callable[..., Optional[Decimal]], *args) -> Optional[Decimal]:
+    """Returns the cached price for a key, fetching it at most once across threads."""
+    if cache_key in _price_cache:
+        return _price_cache[cache_key]
+    return _price_inflight.do(cache_key, _fetch_and_cache, cache_key, fetch, *args)
+
+
+def _fetch_and_cache(cache_key: PriceKey, fetch: Callable[..., Optional[Decimal]], *args) -> Optional[Decimal]:
+    try:
+        return _load_or_fetch(cache_key, fetch, *args)
+    except PriceLookupError:
+        # Failures are only remembered for this run; the next one asks again
+        _price_cache[cache_key] = None
+        return None
+
+
+def _load_or_fetch(cache_key: PriceKey, fetch: Callable[..., Optional[Decimal]], *args) -> Optional[Decimal]:
+    """Reads the price from the persistent store, or fetches and stores it. PriceLookupError propagates."""
+    if cache_key in _price_cache:
+        return _price_cache[cache_key]
+    found, price = price_store.get(cache_key)
+    if not found:
+        price = fetch(*args)
+        price_store.set(cache_key, price)
+    _price_cache[cache_key] = price
+    return price
 
-# Cache for token prices to avoid redundant API calls and respect rate limits
-# Key format: "platform:contract_address:timestamp_day" for tokens
-# Key format: "coin_id:timestamp_day" for native coins
-_price_cache: Dict[str, Optional[Decimal]] = {}
 
 def get_defillama_price(
     chain: str,
@@ -27,20 +91,28 @@ def get_defillama_price(
     For tokens: uses {platform}:{contract_address} format.
     For native coins: uses {coin_id}:0x0000000000000000000000000000000000000000.
     """
+    token_id = _defillama_token_id(chain, contract_address, symbol)
+    if not token_id:
+        return None
+    return _cached_price(("defillama", token_id, "exact", timestamp), _fetch_defillama_price, token_id, timestamp)
+
+
+def _defillama_token_id(chain: str, contract_address: Optional[str], symbol: Optional[str]) -> Optional[str]:
     if contract_address:
         platform = DEFILLAMA_PLATFORM_MAP.get(chain)
         if not platform:
             logging.warning(f"No DefiLlama platform ID for chain: {chain}")
             return None
-        token_id = f"{platform}:{contract_address.lower()}"
-    else:
-        lookup_symbol = symbol.upper() if symbol else NATIVE_CURRENCIES.get(chain, "ETH").upper()
-        coin_id = DEFILLAMA_COIN_MAP.get(lookup_symbol)
-        if not coin_id:
-            logging.warning(f"No DefiLlama coin ID for symbol: {lookup_symbol}")
-            return None
-        token_id = f"{coin_id}:0x0000000000000000000000000000000000000000"
+        return f"{platform}:{contract_address.lower()}"
+    lookup_symbol = symbol.upper() if symbol else NATIVE_CURRENCIES.get(chain, "ETH").upper()
+    coin_id = DEFILLAMA_COIN_MAP.get(lookup_symbol)
+    if not coin_id:
+        logging.warning(f"No DefiLlama coin ID for symbol: {lookup_symbol}")
+        return None
+    return f"{coin_id}:0x0000000000000000000000000000000000000000"
 
+
+def _fetch_defillama_price(token_id: str, timestamp: int) -> Optional[Decimal]:
     url = f"{DEFILLAMA_BASE_URL}/prices/historical/{timestamp}"
     params = {"tokens": token_id}
 
@@ -58,7 +130,103 @@ def get_defillama_price(
         return None
     except Exception as e:
         logging.error(f"Error fetching DefiLlama price for {token_id} at {timestamp}: {e}")
-        return None
+        raise PriceLookupError(token_id) from e
+
+
+def _resolve_defillama(needed: Iterable[PriceRequest]) -> None:
+    """
+    Resolves many DefiLlama prices with batchHistorical requests, each
+    carrying up to DEFILLAMA_BATCH_SIZE (coin, timestamp) pairs across coins.
+
+    Answers land in the price caches, so the get_defillama_price calls that
+    follow are cache hits. Pairs of a failed batch are left unresolved and
+    fall back to single lookups.
+    """
+    pending: List[Tuple[str, int]] = []
+    seen: Set[Tuple[str, int]] = set()
+    for chain, timestamp, contract_address, symbol in needed:
+        token_id = _defillama_token_id(chain, contract_address, symbol)
+        if not token_id or (token_id, timestamp) in seen:
+            continue
+        seen.add((token_id, timestamp))
+        cache_key = ("defillama", token_id, "exact", timestamp)
+        if cache_key in _price_cache:
+            continue
+        found, price = price_store.get(cache_key)
+        if found:
+            _price_cache[cache_key] = price
+        else:
+            pending.append((token_id, timestamp))
+
+    if not pending:
+        return
+    batches = [pending[i:i + DEFILLAMA_BATCH_SIZE] for i in range(0, len(pending), DEFILLAMA_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=DEFILLAMA_BATCH_WORKERS) as executor:
+        futures = [executor.submit(_fetch_defillama_batch, batch) for batch in batches]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Resolving prices", leave=False):
+            entries = [
+                (("defillama", token_id, "exact", timestamp), price)
+                for (token_id, timestamp), price in future.result().items()
+            ]
+            price_store.set_many(entries)
+            _price_cache.update(entries)
+
+
+def _fetch_defillama_batch(pairs: List[Tuple[str, int]]) -> Dict[Tuple[str, int], Optional[Decimal]]:
+    """
+    Fetches one batchHistorical request. Each requested timestamp gets the
+    nearest returned price point within DEFILLAMA_SEARCH_WIDTH, or None.
+    Returns an empty dict when the request fails.
+    """
+    coins: Dict[str, List[int]] = {}
+    for token_id, timestamp in pairs:
+        coins.setdefault(token_id, []).append(timestamp)
+    url = f"{DEFILLAMA_BASE_URL}/batchHistorical"
+    params = {"coins": json.dumps(coins, separators=(",", ":")), "searchWidth": str(DEFILLAMA_SEARCH_WIDTH)}
+
+    try:
+        response = session.get(url, params=params, timeout=TIMEOUT)
+        response.raise_for_status()
+        data = response.json().get("coins", {})
+    except Exception as e:
+        logging.error(f"Error fetching DefiLlama batch of {len(pairs)} prices: {e}")
+        return {}
+
+    resolved: Dict[Tuple[str, int], Optional[Decimal]] = {}
+    for token_id, timestamps in coins.items():
+        points = sorted(
+            (int(point["timestamp"]), point["price"])
+            for point in (data.get(token_id) or {}).get("prices", [])
+            if point.get("price") is not None
+        )
+        times = [point_time for point_time, _ in points]
+        for timestamp in timestamps:
+            price = None
+            i = bisect_left(times, timestamp)
+            nearest = [j for j in (i - 1, i) if 0 <= j < len(points)]
+            if nearest:
+                j = min(nearest, key=lambda k: abs(times[k] - timestamp))
+                if abs(times[j] - timestamp) <= DEFILLAMA_SEARCH_WIDTH:
+                    price = Decimal(str(points[j][1]))
+            resolved[(token_id, timestamp)] = price
+    return resolved
+
+
+def price_source() -> str:
+    """The configured price source: the PRICE_SOURCE environment variable, else config.PRICE_SOURCE."""
+    return os.getenv("PRICE_SOURCE") or PRICE_SOURCE
+
+
+def resolve_prices(needed: Iterable[PriceRequest], source: Optional[str] = None) -> None:
+    """
+    Price-resolution stage: looks up every price a batch of rows needs before
+    the rows are valued, so get_token_price then answers from the caches.
+
+    DefiLlama prices are fetched in batches of many coins and timestamps;
+    CoinGecko prices are still looked up per coin and day on demand.
+    """
+    if (source or price_source()) == "defillama":
+        _resolve_defillama(needed)
 
 
 def get_token_price(
@@ -66,7 +234,7 @@ def get_token_price(
     timestamp: int,
     contract_address: Optional[str] = None,
     symbol: Optional[str] = None,
-    source: str = "coingecko"
+    source: Optional[str] = None
 ) -> Optional[Decimal]:
     """
     Fetches the historical price of a token or native coin.
@@ -76,12 +244,12 @@ def get_token_price(
         timestamp: Unix timestamp of the transaction.
         contract_address: The contract address of the token (None for native currency).
         symbol: The symbol of the token (used for native currency lookup).
-        source: Price source, either "coingecko" or "defillama".
+        source: Price source, either "coingecko" or "defillama" (defaults to `price_source()`).
     
     Returns:
         The price in USD as a Decimal, or None if not found.
     """
-    if source == "defillama":
+    if (source or price_source()) == "defillama":
         return get_defillama_price(chain, timestamp, contract_address, symbol)
     else:
         return _get_coingecko_price(chain, timestamp, contract_address, symbol)
@@ -92,35 +260,41 @@ def _get_coingecko_price(
     contract_address: Optional[str] = None,
     symbol: Optional[str] = None
 ) -> Optional[Decimal]:
-    """Fetches historical price from Coingecko (original logic)."""
-    date_str = datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%d-%m-%Y")
+    """Fetches historical price from Coingecko, per day ("history" mode) or from range series ("range" mode)."""
+    granularity = COINGECKO_RANGE_GRANULARITY if coingecko_mode() == "range" else "day"
+    bucket = bucket_start(timestamp, granularity)
     platform_id = COINGECKO_PLATFORM_MAP.get(chain)
 
     if contract_address:
         if not platform_id:
             logging.warning(f"No Coingecko platform ID for chain: {chain}")
             return None
-        cache_key = f"{platform_id}:{contract_address.lower()}:{date_str}"
-        if cache_key in _price_cache:
-            return _price_cache[cache_key]
-        price = _fetch_price_by_contract(platform_id, contract_address, date_str)
-        _price_cache[cache_key] = price
-        return price
+        cache_key = ("coingecko", f"{platform_id}:{contract_address.lower()}", granularity, bucket)
+        return _cached_price(cache_key, _fetch_price_by_contract, platform_id, contract_address, bucket, granularity)
     else:
         lookup_symbol = symbol.upper() if symbol else NATIVE_CURRENCIES.get(chain, "ETH").upper()
         coin_id = _get_coin_id_by_symbol(lookup_symbol)
         if not coin_id:
             logging.warning(f"No Coingecko coin ID for symbol: {lookup_symbol}")
             return None
-        cache_key = f"{coin_id}:{date_str}"
-        if cache_key in _price_cache:
-            return _price_cache[cache_key]
-        price = _fetch_price_by_coin_id(coin_id, date_str)
-        _price_cache[cache_key] = price
-        return price
+        return _cached_price(("coingecko", coin_id, granularity, bucket), _fetch_coin_price, coin_id, bucket, granularity)
+
+def coingecko_mode() -> str:
+    """The CoinGecko lookup mode: the COINGECKO_PRICE_MODE environment variable, else config."""
+    return os.getenv("COINGECKO_PRICE_MODE") or COINGECKO_PRICE_MODE
+
+def _fetch_coin_price(coin_id: str, bucket: int, granularity: str) -> Optional[Decimal]:
+    if coingecko_mode() == "range":
+        return _fetch_price_from_series(coin_id, bucket, granularity)
+    date_str = datetime.fromtimestamp(bucket, tz=timezone.utc).strftime("%d-%m-%Y")
+    return _fetch_price_by_coin_id(coin_id, date_str)
 
 def _get_coin_id_by_symbol(symbol: str) -> Optional[str]:
-    """Maps a native currency symbol to a Coingecko coin ID."""
+    """
+    Maps a fungible coin's symbol to a Coingecko coin ID: native currencies
+    by name, other symbols only when the coin list has a single coin for them.
+    Callers must not pass NFT collection symbols (see extract_transaction_data).
+    """
     mapping = {
         "ETH": "ethereum",
         "MATIC": "matic-network",
@@ -128,34 +302,31 @@ def _get_coin_id_by_symbol(symbol: str) -> Optional[str]:
         "ARB": "arbitrum",
         "OP": "optimism",
     }
-    return mapping.get(symbol.upper())
+    if symbol.upper() in mapping:
+        return mapping[symbol.upper()]
+    try:
+        candidates = coin_index.candidates_for_symbol(symbol)
+    except CoinIndexUnavailable:
+        return None
+    return candidates[0] if len(candidates) == 1 else None
 
-def _fetch_price_by_contract(platform_id: str, contract_address: str, date_str: str) -> Optional[Decimal]:
-    """Fetches historical price using Coingecko's /coins/{id}/contract/{contract_address}/history endpoint."""
+def _fetch_price_by_contract(platform_id: str, contract_address: str, bucket: int, granularity: str) -> Optional[Decimal]:
+    """Resolves the contract's Coingecko coin ID, then fetches that coin's price."""
     coin_id = _get_coin_id_from_contract(platform_id, contract_address)
     if not coin_id:
         return None
-    return _fetch_price_by_coin_id(coin_id, date_str)
+    # Keyed like the native-coin cache entry, so contract and native lookups of one coin share it.
+    # A failure propagates, so the contract entry is not stored as "no price" either.
+    cache_key = ("coingecko", coin_id, granularity, bucket)
+    return _price_inflight.do(cache_key, _load_or_fetch, cache_key, _fetch_coin_price, coin_id, bucket, granularity)
 
 def _get_coin_id_from_contract(platform_id: str, contract_address: str) -> Optional[str]:
-    """Finds the Coingecko coin ID for a given contract address on a platform."""
-    url = f"{COINGECKO_BASE_URL}/coins/{platform_id}/contract/{contract_address.lower()}"
-    api_key = os.getenv("COINGECKO_API_KEY")
-    headers = {"x-cg-demo-api-key": api_key} if api_key else {}
-
+    """Finds the Coingecko coin ID for a contract address in the local coin list (no request)."""
     try:
-        response = session.get(url, headers=headers, timeout=TIMEOUT)
-        if response.status_code == 429:
-            logging.warning("Coingecko rate limit exceeded. Sleeping for 30 seconds.")
-            time.sleep(30)
-            return _get_coin_id_from_contract(platform_id, contract_address)
-
-        response.raise_for_status()
-        data = response.json()
-        return data.get("id")
-    except Exception as e:
-        logging.error(f"Error fetching coin ID for {contract_address} on {platform_id}: {e}")
-        return None
+        return coin_index.coin_id_for_contract(platform_id, contract_address)
+    except CoinIndexUnavailable as e:
+        logging.error(f"Coingecko coin list unavailable, cannot resolve {contract_address} on {platform_id}: {e}")
+        raise PriceLookupError(contract_address) from e
 
 def _fetch_price_by_coin_id(coin_id: str, date_str: str) -> Optional[Decimal]:
     """Fetches historical price using Coingecko's /coins/{id}/history endpoint."""
@@ -184,4 +355,56 @@ def _fetch_price_by_coin_id(coin_id: str, date_str: str) -> Optional[Decimal]:
         return None
     except Exception as e:
         logging.error(f"Error fetching price for {coin_id} on {date_str}: {e}")
-        return None
+        raise PriceLookupError(coin_id) from e
+
+def _range_window(timestamp: int, granularity: str) -> Tuple[int, int]:
+    """
+    The span fetched for a lookup, up to now: the calendar year holding it
+    for daily buckets (a tax year in one call), the 90-day block for hourly ones.
+    """
+    if granularity == "hour":
+        start = timestamp - timestamp % HOURLY_RANGE_SECONDS
+        end = start + HOURLY_RANGE_SECONDS - 1
+    else:
+        year = datetime.fromtimestamp(timestamp, tz=timezone.utc).year
+        start = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp())
+        end = int(datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp()) - 1
+    return start, min(end, int(time.time()))
+
+def _series_for(coin_id: str) -> PriceSeries:
+    with _series_lock:
+        return _series.setdefault(coin_id, PriceSeries())
+
+def _fetch_price_from_series(coin_id: str, bucket: int, granularity: str) -> Optional[Decimal]:
+    """Answers a lookup from the coin's range series, fetching the window around it first if needed."""
+    series = _series_for(coin_id)
+    if not series.covers(bucket):
+        start, end = _range_window(bucket, granularity)
+        # Every bucket of the window waits for the same request
+        _series_inflight.do((coin_id, start), _load_series, coin_id, start, end)
+    return series.lookup(bucket, granularity)
+
+def _load_series(coin_id: str, start: int, end: int) -> None:
+    """Fetches Coingecko's /coins/{id}/market_chart/range for [start, end] into the coin's series."""
+    url = f"{COINGECKO_BASE_URL}/coins/{coin_id}/market_chart/range"
+    params = {"vs_currency": "usd", "from": start, "to": end}
+    api_key = os.getenv("COINGECKO_API_KEY")
+    headers = {"x-cg-demo-api-key": api_key} if api_key else {}
+
+    try:
+        response = session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+        if response.status_code == 429:
+            logging.warning("Coingecko rate limit exceeded. Sleeping for 30 seconds.")
+            time.sleep(30)
+            return _load_series(coin_id, start, end)
+
+        response.raise_for_status()
+        points = [
+            (int(ms) // 1000, Decimal(str(price)))
+            for ms, price in response.json().get("prices", [])
+            if price is not None
+        ]
+    except Exception as e:
+        logging.error(f"Error fetching price range for {coin_id} from {start} to {end}: {e}")
+        raise PriceLookupError(coin_id) from e
+    _series_for(coin_id).add(start, end, points)
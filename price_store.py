@@ -0,0 +1,140 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+
+from config import (
+    CACHE_BUSY_TIMEOUT,
+    PRICE_CACHE_DB_PATH,
+    PRICE_NEGATIVE_TTL,
+    PRICE_OPEN_BUCKET_TTL,
+)
+
+# Width of each price granularity's buckets (seconds); "exact" prices are keyed by their own timestamp
+GRANULARITY_SECONDS = {"day": 86400, "hour": 3600, "exact": 1}
+
+# (source, asset id, granularity, bucket timestamp)
+PriceKey = Tuple[str, str, str, int]
+
+
+def bucket_start(timestamp: int, granularity: str) -> int:
+    """Start of the bucket holding `timestamp` (UTC-aligned)."""
+    width = GRANULARITY_SECONDS[granularity]
+    return timestamp - timestamp % width
+
+
+class PriceStore:
+    """
+    Persistent price cache shared by runs and processes.
+
+    Prices are keyed by (source, asset id, granularity, bucket timestamp).
+    Historical prices never change, so they are kept forever; "no price"
+    answers expire after PRICE_NEGATIVE_TTL, and prices for a bucket that has
+    not ended yet (e.g. today) after PRICE_OPEN_BUCKET_TTL. The database runs
+    in WAL mode and every write is a single-row upsert, so any number of
+    worker processes can read and write it at once.
+    """
+
+    def __init__(self, db_path: str = PRICE_CACHE_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_db()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with sqlite3.connect(self.db_path, timeout=CACHE_BUSY_TIMEOUT) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "source TEXT, "
+                "asset TEXT, "
+                "granularity TEXT, "
+                "bucket INTEGER, "
+                "price TEXT, "
+                "expires_at REAL, "
+                "PRIMARY KEY (source, asset, granularity, bucket)"
+                ")"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """The calling thread's connection (autocommit; each statement is its own transaction)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.db_path != self.db_path:
+            if conn is not None:
+                conn.close()
+            conn = sqlite3.connect(self.db_path, timeout=CACHE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.db_path = conn, self.db_path
+        return conn
+
+    @staticmethod
+    def _disabled() -> bool:
+        return os.getenv("DISABLE_CACHE", "").lower() == "true"
+
+    @staticmethod
+    def ttl_for(key: PriceKey, price: Optional[Decimal]) -> Optional[float]:
+        """Seconds an answer stays fresh, or None if it never expires."""
+        _, _, granularity, bucket = key
+        if price is None:
+            return PRICE_NEGATIVE_TTL
+        if bucket + GRANULARITY_SECONDS[granularity] > time.time():
+            return PRICE_OPEN_BUCKET_TTL
+        return None
+
+    def get(self, key: PriceKey) -> Tuple[bool, Optional[Decimal]]:
+        """Returns (found, price); a found None is a cached "no price" answer."""
+        if self._disabled():
+            return False, None
+        try:
+            row = self._connection().execute(
+                "SELECT price, expires_at FROM prices WHERE source = ? AND asset = ? AND granularity = ? AND bucket = ?",
+                key,
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Price cache read failed: {e}")
+            return False, None
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return False, None
+        return True, Decimal(row[0]) if row[0] is not None else None
+
+    def set(self, key: PriceKey, price: Optional[Decimal]) -> None:
+        self.set_many([(key, price)])
+
+    def set_many(self, entries: Iterable[Tuple[PriceKey, Optional[Decimal]]]) -> None:
+        """Stores answers in one transaction; a locked database only costs the writes, never the lookup."""
+        now = time.time()
+        rows = []
+        for key, price in entries:
+            ttl = self.ttl_for(key, price)
+            rows.append(key + (str(price) if price is not None else None, now + ttl if ttl is not None else None))
+        if not rows:
+            return
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO prices (source, asset, granularity, bucket, price, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logging.warning(f"Price cache write of {len(rows)} entries failed: {e}")
+
+    def prune(self) -> int:
+        """Deletes expired entries; returns how many were removed."""
+        with sqlite3.connect(self.db_path, timeout=CACHE_BUSY_TIMEOUT) as conn:
+            return conn.execute(
+                "DELETE FROM prices WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+
+
+# Singleton instance
+price_store = PriceStore()
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+from urllib.parse import parse_qs, urlparse
+
+from config import (
+    EXPLORER_URLS,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_COOLDOWN,
+    RATE_LIMIT_REQUESTS_PER_SECOND,
+)
+
+# Reverse lookup so limiter keys carry the chain name for default explorer URLs
+_BASE_URL_TO_CHAIN = {url: chain for chain, url in EXPLORER_URLS.items()}
+
+
+def rate_limit_key(endpoint: str) -> str:
+    """
+    Derives the limiter key (chain and API key) from a full explorer URL.
+    Custom RPC/explorer URLs fall back to their base URL in place of the chain.
+    """
+    parsed = urlparse(endpoint)
+    base_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+    chain = _BASE_URL_TO_CHAIN.get(base_url, base_url)
+    api_key = parse_qs(parsed.query).get("apikey", [""])[0]
+    return f"{chain}:{api_key}"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header given either as delta-seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (ValueError, TypeError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (ValueError, TypeError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with a shared pause window.
+
+    Callers reserve a token under the lock and sleep outside of it, so waiting
+    threads are released in order at the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, exempt_until: float = 0.0) -> float:
+        """Takes one token and returns how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            wait = 0.0
+            if self._tokens < 0 and self.rate > 0:
+                wait = -self._tokens / self.rate
+            if self._paused_until > exempt_until:
+                wait = max(wait, self._paused_until - now)
+            return wait
+
+    def pause_until(self, until: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, until)
+
+
+class RateLimiter:
+    """
+    Process-wide rate limiter keyed by chain and API key.
+
+    Every worker acquires a token before sending a request. A rate-limit signal
+    from the explorer (429 with Retry-After, exhausted X-RateLimit-* headers or
+    a "rate limit" error payload) pauses the whole bucket, so all workers back
+    off together instead of burning their retries.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = RATE_LIMIT_REQUESTS_PER_SECOND,
+        burst: int = RATE_LIMIT_BURST,
+    ):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        # Pause windows the current thread waits out itself (via its retry backoff)
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        """Forgets all buckets and pause windows."""
+        with self._lock:
+            self._buckets.clear()
+        self._local = threading.local()
+
+    def _get_bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.requests_per_second, self.burst)
+                self._buckets[key] = bucket
+            return bucket
+
+    def _owned_pauses(self) -> Dict[str, float]:
+        if not hasattr(self._local, "owned_pauses"):
+            self._local.owned_pauses = {}
+        return self._local.owned_pauses
+
+    def acquire(self, endpoint: str) -> None:
+        """Blocks until a request to the given endpoint may be sent."""
+        if self.requests_per_second <= 0:
+            return
+        key = rate_limit_key(endpoint)
+        exempt_until = self._owned_pauses().pop(key, 0.0)
+        wait = self._get_bucket(key).reserve(exempt_until)
+        if wait > 0:
+            logging.debug(f"Rate limiter delaying request for {key} by {wait:.2f}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, endpoint: str) -> None:
+        """
+        Awaits a token without blocking the event loop.
+
+        Tasks on one loop share a thread, so pauses are never treated as owned
+        here: every task waits out the shared pause window.
+        """
+        if self.requests_per_second <= 0:
+            return
+        key = rate_limit_key(endpoint)
+        wait = self._get_bucket(key).reserve()
+        if wait > 0:
+            logging.debug(f"Rate limiter delaying request for {key} by {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def pause(self, endpoint: str, seconds: float, owned: bool = False) -> None:
+        """
+        Pauses every worker sharing the endpoint's key for the given duration.
+
+        With owned=True the calling thread is expected to wait the pause out
+        itself (e.g. through its retry backoff) and is not delayed a second time
+        on its next acquire.
+        """
+        if seconds <= 0:
+            return
+        key = rate_limit_key(endpoint)
+        until = time.monotonic() + seconds
+        self._get_bucket(key).pause_until(until)
+        if owned:
+            self._owned_pauses()[key] = until
+        logging.warning(f"Rate limit signalled for {key}; pausing all workers for {seconds:.1f}s.")
+
+    def observe_response(self, endpoint: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Applies rate-limit hints from an HTTP response to the shared bucket."""
+        if status_code == 429:
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            self.pause(endpoint, retry_after if retry_after is not None else RATE_LIMIT_COOLDOWN, owned=True)
+            return
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            if int(remaining) > 0:
+                return
+            reset_value = float(reset)
+        except (ValueError, TypeError):
+            return
+        # Reset is either an absolute epoch timestamp or a delay in seconds
+        seconds = reset_value - time.time() if reset_value > 1e9 else reset_value
+        self.pause(endpoint, seconds)
+
+
+# Singleton instance
+rate_limiter = RateLimiter()
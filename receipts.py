@@ -0,0 +1,162 @@
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import RECEIPT_CACHE_DB_PATH, RECEIPT_WORKERS, RPC_BATCH_SIZE, RPC_NODE_URLS
+from fetch_blockchain_data import JsonRpcError
+from json_utils import dumps, loads
+from models import RawTransaction
+from rpc_adapter import JsonRpcClient
+
+# Threads sending receipt batches (separate from the wallet/task pools to avoid nested waits)
+RECEIPT_EXECUTOR = ThreadPoolExecutor(max_workers=RECEIPT_WORKERS)
+
+# Receipt fields kept in the cache, as decimal strings
+RECEIPT_FIELDS = ("gasUsed", "effectiveGasPrice", "l1Fee")
+
+
+class ReceiptStore:
+    """
+    Permanent cache of the receipt fields needed for fees, keyed by chain and hash.
+
+    Receipts never change once a transaction is mined, so entries are never
+    expired.
+    """
+
+    def __init__(self, db_path: str = RECEIPT_CACHE_DB_PATH):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS receipts ("
+                "chain TEXT, "
+                "tx_hash TEXT, "
+                "receipt BLOB, "
+                "PRIMARY KEY (chain, tx_hash)"
+                ")"
+            )
+
+    def get_many(self, chain: str, tx_hashes: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        if os.getenv("DISABLE_CACHE", "").lower() == "true":
+            return {}
+        tx_hashes = list(tx_hashes)
+        found: Dict[str, Dict[str, Optional[str]]] = {}
+        with sqlite3.connect(self.db_path) as conn:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(tx_hashes), 500):
+                chunk = tx_hashes[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT tx_hash, receipt FROM receipts WHERE chain = ? AND tx_hash IN ({','.join('?' * len(chunk))})",
+                    [chain, *chunk],
+                ).fetchall()
+                found.update((tx_hash, loads(receipt)) for tx_hash, receipt in rows)
+        return found
+
+    def set_many(self, chain: str, receipts: Dict[str, Dict[str, Optional[str]]]) -> None:
+        if not receipts:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO receipts (chain, tx_hash, receipt) VALUES (?, ?, ?)",
+                [(chain, tx_hash, dumps(receipt)) for tx_hash, receipt in receipts.items()],
+            )
+
+
+def _receipt_fields(receipt: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    return {
+        field: str(int(receipt[field], 16)) if receipt.get(field) is not None else None
+        for field in RECEIPT_FIELDS
+    }
+
+
+def receipt_node_url(chain: str, rpc_url: Optional[str] = None) -> Optional[str]:
+    """
+    The JSON-RPC node to read receipts from: an explicit node URL (the RPC
+    backend's), RECEIPT_NODE_URL_<CHAIN> or config. RPC_URL_<CHAIN> is not
+    used: with the explorer backend it points at an Etherscan-style API.
+    """
+    return rpc_url or os.getenv(f"RECEIPT_NODE_URL_{chain.upper()}") or RPC_NODE_URLS.get(chain)
+
+
+def fetch_receipts(
+    client: JsonRpcClient, tx_hashes: List[str], batch_size: int = RPC_BATCH_SIZE
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Fetches receipts as JSON-RPC batches, RECEIPT_WORKERS batches at a time.
+
+    A batch that fails is logged and skipped; the receipts of the other
+    batches are still returned.
+    """
+
+    def fetch_batch(batch: List[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        results = client.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in batch])
+        fields = {}
+        for tx_hash, result in zip(batch, results):
+            if isinstance(result, JsonRpcError):
+                logging.warning(f"Receipt for {tx_hash} unavailable: {result}")
+            elif result:
+                fields[tx_hash] = _receipt_fields(result)
+        return fields
+
+    batches = [tx_hashes[i:i + batch_size] for i in range(0, len(tx_hashes), batch_size)]
+    futures = {RECEIPT_EXECUTOR.submit(fetch_batch, batch): batch for batch in batches}
+    receipts: Dict[str, Dict[str, Optional[str]]] = {}
+    for future in as_completed(futures):
+        try:
+            receipts.update(future.result())
+        except Exception as e:
+            logging.error(f"Receipt batch of {len(futures[future])} transaction(s) failed: {e}")
+    return receipts
+
+
+def enrich_with_receipts(
+    transactions: List[RawTransaction],
+    wallet_address: str,
+    chain: str,
+    rpc_url: Optional[str] = None,
+    store: Optional[ReceiptStore] = None,
+) -> List[RawTransaction]:
+    """
+    Replaces the gas fields of the wallet's outgoing transactions with the
+    values from their receipts: real gasUsed (the explorer may only report the
+    gas limit), effectiveGasPrice and, on OP-stack chains, l1Fee.
+
+    Transactions whose receipt cannot be fetched are returned unchanged.
+    """
+    wallet_address = wallet_address.lower()
+    outgoing = list(dict.fromkeys(
+        trx.hash for trx in transactions if trx.from_address.hash == wallet_address
+    ))
+    if not outgoing:
+        return transactions
+    node_url = receipt_node_url(chain, rpc_url)
+    if not node_url:
+        logging.warning(f"No JSON-RPC node configured for {chain}; fees are not enriched from receipts.")
+        return transactions
+
+    store = store or receipt_store
+    receipts = store.get_many(chain, outgoing)
+    missing = [tx_hash for tx_hash in outgoing if tx_hash not in receipts]
+    if missing:
+        logging.info(f"Fetching {len(missing)} receipt(s) for {wallet_address} on {chain} ({len(receipts)} cached).")
+        fetched = fetch_receipts(JsonRpcClient(node_url), missing)
+        # Receipts of the batches that succeeded are kept even if others failed
+        store.set_many(chain, fetched)
+        receipts.update(fetched)
+
+    enriched = []
+    for trx in transactions:
+        fields = receipts.get(trx.hash)
+        if fields and trx.from_address.hash == wallet_address:
+            trx = trx.model_copy(update={field: value for field, value in fields.items() if value is not None})
+        enriched.append(trx)
+    return enriched
+
+
+# Singleton instance
+receipt_store = ReceiptStore()
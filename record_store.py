@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from typing import List, Optional, Sequence, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from config import RECORD_STORE_DB_PATH
+from finality import finalized_block
+from json_utils import loads
+from models import RawRecord
+
+T = TypeVar("T", bound=BaseModel)
+
+Interval = Tuple[int, int]
+
+
+def _record_block(record: BaseModel) -> Optional[int]:
+    block = getattr(record, "blockNumber", None)
+    try:
+        return int(block) if block is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_id(record: BaseModel, payload: str) -> str:
+    """Log index for log-based records; a payload digest for those without one (internal transactions)."""
+    log_index = getattr(record, "logIndex", None)
+    if log_index is not None:
+        return str(log_index)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class RecordStore:
+    """
+    Normalized explorer records keyed by (chain, wallet, endpoint, block).
+
+    Next to the records it keeps, per (chain, wallet, endpoint), the block
+    intervals whose records are known to be complete. A block-range query is
+    answered from the store, fetching only the parts of the range no earlier
+    query covered, whatever page size, API key or date range produced them.
+
+    A range only counts as covered up to the finalized head (see
+    finality.finalized_block), so blocks that may still be reorged, and the
+    chain tip of open-ended ranges, are always fetched again.
+    """
+
+    def __init__(self, db_path: str = RECORD_STORE_DB_PATH):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "chain TEXT, "
+                "wallet TEXT, "
+                "endpoint TEXT, "
+                "block INTEGER, "
+                "hash TEXT, "
+                "record_id TEXT, "
+                "payload TEXT, "
+                "PRIMARY KEY (chain, wallet, endpoint, block, hash, record_id)"
+                ")"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS record_coverage ("
+                "chain TEXT, "
+                "wallet TEXT, "
+                "endpoint TEXT, "
+                "start_block INTEGER, "
+                "end_block INTEGER, "
+                "PRIMARY KEY (chain, wallet, endpoint, start_block)"
+                ")"
+            )
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("DISABLE_CACHE", "").lower() != "true"
+
+    def coverage(self, chain: str, wallet: str, endpoint: str) -> List[Interval]:
+        """Covered block intervals (inclusive, disjoint and sorted)."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT start_block, end_block FROM record_coverage "
+                "WHERE chain = ? AND wallet = ? AND endpoint = ? ORDER BY start_block",
+                (chain, wallet.lower(), endpoint),
+            ).fetchall()
+        return [(start, end) for start, end in rows]
+
+    def missing(self, chain: str, wallet: str, endpoint: str, startblock: int, endblock: int) -> List[Interval]:
+        """The parts of [startblock, endblock] that still have to be fetched."""
+        gaps = []
+        cursor = startblock
+        for start, end in self.coverage(chain, wallet, endpoint):
+            if end < cursor:
+                continue
+            if start > endblock:
+                break
+            if start > cursor:
+                gaps.append((cursor, start - 1))
+            cursor = end + 1
+            if cursor > endblock:
+                return gaps
+        gaps.append((cursor, endblock))
+        return gaps
+
+    def load(
+        self, chain: str, wallet: str, endpoint: str, startblock: int, endblock: int, model: Type[T]
+    ) -> List[T]:
+        """Stored records in [startblock, endblock], in block and fetch order."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT payload FROM records WHERE chain = ? AND wallet = ? AND endpoint = ? "
+                "AND block BETWEEN ? AND ? ORDER BY block, rowid",
+                (chain, wallet.lower(), endpoint, startblock, endblock),
+            ).fetchall()
+        # Stored records were validated when fetched
+        if issubclass(model, RawRecord):
+            return [model.trusted(loads(payload)) for (payload,) in rows]
+        return [model.model_validate_json(payload) for (payload,) in rows]
+
+    def save(
+        self,
+        chain: str,
+        wallet: str,
+        endpoint: str,
+        startblock: int,
+        endblock: int,
+        records: Sequence[BaseModel],
+        complete: bool = True,
+    ) -> None:
+        """
+        Stores the records fetched for [startblock, endblock]. A `complete`
+        fetch (no request in it failed) replaces any stored ones from those
+        blocks and marks the range's final blocks covered; an incomplete one
+        only adds to them, since a failed page proves nothing was removed.
+        """
+        wallet = wallet.lower()
+        rows = []
+        # Records without a block are filed under the range's start; a later range may return them again
+        unplaced = []
+        for record in records:
+            payload = record.model_dump_json(by_alias=True)
+            block = _record_block(record)
+            if block is None:
+                unplaced.append((chain, wallet, endpoint, getattr(record, "hash", None) or "", _record_id(record, payload)))
+            # The explorer filtered by block, so a record without one still lies in the range
+            rows.append(
+                (
+                    chain,
+                    wallet,
+                    endpoint,
+                    startblock if block is None else block,
+                    getattr(record, "hash", None) or "",
+                    _record_id(record, payload),
+                    payload,
+                )
+            )
+
+        covered_end = None
+        if complete:
+            final = finalized_block(chain, records)
+            if final is not None:
+                covered_end = min(endblock, final)
+
+        with sqlite3.connect(self.db_path) as conn:
+            if complete:
+                conn.execute(
+                    "DELETE FROM records WHERE chain = ? AND wallet = ? AND endpoint = ? AND block BETWEEN ? AND ?",
+                    (chain, wallet, endpoint, startblock, endblock),
+                )
+            conn.executemany(
+                "DELETE FROM records WHERE chain = ? AND wallet = ? AND endpoint = ? AND hash = ? AND record_id = ?",
+                unplaced,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO records (chain, wallet, endpoint, block, hash, record_id, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if covered_end is not None and covered_end >= startblock:
+                self._add_coverage(conn, chain, wallet, endpoint, startblock, covered_end)
+
+        logging.debug(
+            f"Record store {chain}/{wallet}/{endpoint}: {len(rows)} records for blocks "
+            f"{startblock}-{endblock}, covered to {covered_end}"
+        )
+
+    @staticmethod
+    def _add_coverage(
+        conn: sqlite3.Connection, chain: str, wallet: str, endpoint: str, startblock: int, endblock: int
+    ) -> None:
+        """Merges [startblock, endblock] with the overlapping and adjacent covered intervals."""
+        key = (chain, wallet, endpoint)
+        touching = conn.execute(
+            "SELECT start_block, end_block FROM record_coverage "
+            "WHERE chain = ? AND wallet = ? AND endpoint = ? AND start_block <= ? AND end_block >= ?",
+            key + (endblock + 1, startblock - 1),
+        ).fetchall()
+        for start, end in touching:
+            startblock, endblock = min(startblock, start), max(endblock, end)
+        conn.execute(
+            "DELETE FROM record_coverage "
+            "WHERE chain = ? AND wallet = ? AND endpoint = ? AND start_block <= ? AND end_block >= ?",
+            key + (endblock + 1, startblock - 1),
+        )
+        conn.execute(
+            "INSERT INTO record_coverage (chain, wallet, endpoint, start_block, end_block) VALUES (?, ?, ?, ?, ?)",
+            key + (startblock, endblock),
+        )
+
+
+# Singleton instance
+record_store = RecordStore()
@@ -0,0 +1,442 @@
+import itertools
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from requests.exceptions import RequestException
+from tqdm import tqdm
+
+from config import RPC_BATCH_SIZE, RPC_LOG_BLOCK_RANGE, RPC_MAX_NATIVE_SCAN_BLOCKS, RPC_NODE_URLS, SHARD_WORKERS
+from explorer_adapters import SHARD_EXECUTOR, ExplorerAdapter
+from fetch_blockchain_data import JsonRpcError, post_json_rpc
+from models import Raw1155Transfer, RawNFTTransfer, RawTokenTransfer, RawTransaction
+from block_index import block_index
+from single_flight import SingleFlight
+
+# keccak256 of the Transfer event signatures
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+TRANSFER_SINGLE_TOPIC = "0xc3d58168c5ae7397731d063d5bbf3d657854427343f4c083240f7aacaa2d0f62"
+TRANSFER_BATCH_TOPIC = "0x4a39dc06d4c0dbc64b70af90fd698a233a518aa5d07e595d983b8c0526c8f7fb"
+
+# Function selectors for token metadata calls
+NAME_SELECTOR = "0x06fdde03"
+SYMBOL_SELECTOR = "0x95d89b41"
+DECIMALS_SELECTOR = "0x313ce567"
+
+# Phrases nodes use when an eth_getLogs range spans too many blocks or results
+LOG_LIMIT_MARKERS = ("more than", "too many", "too large", "block range", "exceed", "response size", "limited to")
+
+
+class NativeScanTooWide(Exception):
+    """Raised when a native-transfer block scan would exceed RPC_MAX_NATIVE_SCAN_BLOCKS."""
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    return int(value, 16) if str(value).startswith("0x") else int(value)
+
+
+def _address_topic(address: str) -> str:
+    return "0x" + address.lower()[2:].rjust(64, "0")
+
+
+def _topic_address(topic: str) -> str:
+    return "0x" + topic[-40:]
+
+
+def _data_words(data: str) -> List[int]:
+    raw = data[2:] if data.startswith("0x") else data
+    return [int(raw[i:i + 64], 16) for i in range(0, len(raw), 64)]
+
+
+def _decode_uint_array(words: List[int], offset_bytes: int) -> List[int]:
+    start = offset_bytes // 32
+    length = words[start]
+    return words[start + 1:start + 1 + length]
+
+
+def _decode_string(result: Optional[str]) -> Optional[str]:
+    """Decodes an ABI string return value, or a bytes32 one (e.g. MKR's symbol)."""
+    if not isinstance(result, str) or len(result) < 66:
+        return None
+    raw = bytes.fromhex(result[2:])
+    try:
+        if len(raw) >= 64:
+            offset = int.from_bytes(raw[:32], "big")
+            length = int.from_bytes(raw[offset:offset + 32], "big")
+            value = raw[offset + 32:offset + 32 + length]
+        else:
+            value = raw.rstrip(b"\0")
+        return value.decode("utf-8", errors="replace").strip("\0") or None
+    except (ValueError, OverflowError):
+        return None
+
+
+def _is_log_limit_error(error: JsonRpcError) -> bool:
+    return any(marker in error.message.lower() for marker in LOG_LIMIT_MARKERS)
+
+
+class JsonRpcClient:
+    """
+    Minimal JSON-RPC client sending calls as batch requests.
+
+    Per-call errors come back in place of the result so a single failed call
+    does not discard the rest of its batch.
+    """
+
+    def __init__(self, url: str, batch_size: int = RPC_BATCH_SIZE):
+        self.url = url
+        self.batch_size = batch_size
+        self._ids = itertools.count(1)
+
+    def batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        results: List[Any] = []
+        for i in range(0, len(calls), self.batch_size):
+            chunk = calls[i:i + self.batch_size]
+            ids = [next(self._ids) for _ in chunk]
+            payload = [
+                {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+                for request_id, (method, params) in zip(ids, chunk)
+            ]
+            body = post_json_rpc(self.url, payload)
+            if isinstance(body, dict):
+                # Some nodes answer a rejected batch with a single error object
+                error = body.get("error") or {}
+                raise JsonRpcError(error.get("code"), error.get("message", "invalid batch response"))
+            by_id = {item.get("id"): item for item in body}
+            for request_id in ids:
+                item = by_id.get(request_id)
+                if item is None:
+                    results.append(JsonRpcError(None, "missing response in batch"))
+                elif item.get("error"):
+                    results.append(JsonRpcError(item["error"].get("code"), item["error"].get("message", "")))
+                else:
+                    results.append(item.get("result"))
+        return results
+
+    def call(self, method: str, params: list) -> Any:
+        result = self.batch([(method, params)])[0]
+        if isinstance(result, JsonRpcError):
+            raise result
+        return result
+
+
+class RpcAdapter(ExplorerAdapter):
+    """
+    Adapter backed by a plain JSON-RPC node instead of an explorer API.
+
+    ERC-20, ERC-721 and ERC-1155 transfers come from one topic-filtered
+    eth_getLogs scan per wallet (sent and received), split into block ranges
+    that are halved whenever the node rejects one as too large. Native
+    transfers are found by scanning blocks with eth_getBlockByNumber, which
+    reads every block in the range. Internal transactions need a trace API and
+    are not available.
+    """
+
+    # Records do not come from Etherscan-style paginated queries
+    paginated = False
+
+    _block_cache: Dict[str, int] = {}
+    _block_inflight = SingleFlight()
+    # Per-node caches shared by every adapter instance
+    _timestamps: Dict[Tuple[str, int], int] = {}
+    _token_metadata: Dict[Tuple[str, str], Dict[str, Optional[str]]] = {}
+
+    def __init__(self, chain: str, rpc_url: Optional[str] = None, sharded: bool = False):
+        super().__init__(chain, rpc_url, sharded)
+        self.rpc_url = self.rpc_url or RPC_NODE_URLS.get(chain)
+        if not self.rpc_url:
+            raise ValueError(
+                f"No JSON-RPC node configured for {chain}; pass --rpc-url or set RPC_URL_{chain.upper()}."
+            )
+        self.client = JsonRpcClient(self.rpc_url)
+        self.log_block_range = RPC_LOG_BLOCK_RANGE
+        # The three token iterators share one log scan per (wallet, range)
+        self._scans: Dict[Tuple[str, int, int], Dict[str, list]] = {}
+        self._scan_inflight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def _head_block(self) -> int:
+        return _to_int(self.client.call("eth_blockNumber", []))
+
+    # Logs
+
+    def _get_logs(self, filters: Sequence[list], startblock: int, endblock: int) -> List[Dict[str, Any]]:
+        """Runs eth_getLogs for every topic filter over the range, splitting rejected ranges."""
+        pending: Deque[Tuple[list, int, int]] = deque(
+            (topics, lo, min(lo + self.log_block_range - 1, endblock))
+            for topics in filters
+            for lo in range(startblock, endblock + 1, self.log_block_range)
+        )
+        logs: List[Dict[str, Any]] = []
+        while pending:
+            chunk = [pending.popleft() for _ in range(min(RPC_BATCH_SIZE, len(pending)))]
+            results = self.client.batch(
+                [("eth_getLogs", [{"fromBlock": hex(lo), "toBlock": hex(hi), "topics": topics}]) for topics, lo, hi in chunk]
+            )
+            for (topics, lo, hi), result in zip(chunk, results):
+                if isinstance(result, JsonRpcError):
+                    if lo < hi and _is_log_limit_error(result):
+                        mid = (lo + hi) // 2
+                        pending.appendleft((topics, mid + 1, hi))
+                        pending.appendleft((topics, lo, mid))
+                        with self._lock:
+                            # Later scans start from the smaller span
+                            self.log_block_range = max(1, min(self.log_block_range, mid - lo + 1))
+                        continue
+                    raise result
+                logs.extend(log for log in result or [] if not log.get("removed"))
+        return logs
+
+    def _scan_transfer_logs(self, wallet_address: str, startblock: int, endblock: int) -> Dict[str, list]:
+        key = (wallet_address.lower(), startblock, endblock)
+        scan = self._scans.get(key)
+        if scan is None:
+            scan = self._scan_inflight.do(key, self._run_transfer_scan, *key)
+        return scan
+
+    def _run_transfer_scan(self, wallet_address: str, startblock: int, endblock: int) -> Dict[str, list]:
+        key = (wallet_address, startblock, endblock)
+        if key in self._scans:
+            return self._scans[key]
+
+        scan: Dict[str, list] = {"token_transfers": [], "nft_transfers": [], "1155_transfers": []}
+        endblock = min(endblock, self._head_block())
+        if endblock >= startblock:
+            wallet_topic = _address_topic(wallet_address)
+            filters = [
+                # ERC-20/721 sent
+                [TRANSFER_TOPIC, wallet_topic],
+                # ERC-20/721 received and ERC-1155 sent (the 1155 "from" is the second indexed address)
+                [[TRANSFER_TOPIC, TRANSFER_SINGLE_TOPIC, TRANSFER_BATCH_TOPIC], None, wallet_topic],
+                # ERC-1155 received
+                [[TRANSFER_SINGLE_TOPIC, TRANSFER_BATCH_TOPIC], None, None, wallet_topic],
+            ]
+            unique: Dict[Tuple[str, int], Dict[str, Any]] = {}
+            for log in self._get_logs(filters, startblock, endblock):
+                # Self-transfers match two filters
+                unique[(log["transactionHash"], _to_int(log["logIndex"]))] = log
+            logs = sorted(unique.values(), key=lambda log: (_to_int(log["blockNumber"]), _to_int(log["logIndex"])))
+
+            timestamps = self._block_timestamps({_to_int(log["blockNumber"]) for log in logs})
+            metadata = self._metadata_for({log["address"].lower() for log in logs})
+            for log in logs:
+                self._add_transfer_records(scan, log, timestamps, metadata[log["address"].lower()])
+
+        self._scans[key] = scan
+        return scan
+
+    @staticmethod
+    def _add_transfer_records(
+        scan: Dict[str, list], log: Dict[str, Any], timestamps: Dict[int, int], metadata: Dict[str, Optional[str]]
+    ) -> None:
+        topics = log.get("topics") or []
+        block = _to_int(log["blockNumber"])
+        log_index = _to_int(log["logIndex"])
+        contract = log["address"].lower()
+        base = {
+            "hash": log["transactionHash"],
+            "timeStamp": str(timestamps.get(block, 0)),
+            "blockNumber": str(block),
+            "logIndex": str(log_index),
+        }
+        words = _data_words(log.get("data") or "0x")
+        symbol = metadata.get("symbol") or "UNKNOWN"
+        name = metadata.get("name") or ""
+
+        if topics[0] == TRANSFER_TOPIC and len(topics) == 3:
+            scan["token_transfers"].append(RawTokenTransfer.model_validate({
+                **base,
+                "from": _topic_address(topics[1]),
+                "to": _topic_address(topics[2]),
+                "total": {"value": str(words[0] if words else 0)},
+                "token": {"symbol": symbol},
+                "tokenDecimal": metadata.get("decimals") or "",
+                "contractAddress": contract,
+            }))
+        elif topics[0] == TRANSFER_TOPIC and len(topics) == 4:
+            scan["nft_transfers"].append(RawNFTTransfer.model_validate({
+                **base,
+                "from": _topic_address(topics[1]),
+                "to": _topic_address(topics[2]),
+                "tokenID": str(_to_int(topics[3])),
+                "tokenName": name,
+                "tokenSymbol": symbol,
+            }))
+        elif topics[0] in (TRANSFER_SINGLE_TOPIC, TRANSFER_BATCH_TOPIC) and len(topics) == 4:
+            if topics[0] == TRANSFER_SINGLE_TOPIC:
+                items = [(words[0], words[1])]
+            else:
+                items = list(zip(_decode_uint_array(words, words[0]), _decode_uint_array(words, words[1])))
+            for position, (token_id, value) in enumerate(items):
+                record = {
+                    **base,
+                    "from": _topic_address(topics[2]),
+                    "to": _topic_address(topics[3]),
+                    "tokenID": str(token_id),
+                    "tokenValue": str(value),
+                    "tokenName": name,
+                    "tokenSymbol": symbol,
+                }
+                if topics[0] == TRANSFER_BATCH_TOPIC:
+                    # One record per id; keep their identities distinct
+                    record["logIndex"] = f"{log_index}.{position}"
+                scan["1155_transfers"].append(Raw1155Transfer.model_validate(record))
+
+    def _block_timestamps(self, blocks: Iterable[int]) -> Dict[int, int]:
+        missing = sorted(block for block in set(blocks) if (self.rpc_url, block) not in self._timestamps)
+        results = self.client.batch([("eth_getBlockByNumber", [hex(block), False]) for block in missing])
+        for block, result in zip(missing, results):
+            if isinstance(result, JsonRpcError):
+                raise result
+            if result:
+                self._timestamps[(self.rpc_url, block)] = _to_int(result["timestamp"])
+        return {block: self._timestamps.get((self.rpc_url, block), 0) for block in blocks}
+
+    def _metadata_for(self, contracts: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        """Token name, symbol and decimals per contract, read once per node via eth_call."""
+        contracts = set(contracts)
+        missing = sorted(c for c in contracts if (self.rpc_url, c) not in self._token_metadata)
+        selectors = (("name", NAME_SELECTOR), ("symbol", SYMBOL_SELECTOR), ("decimals", DECIMALS_SELECTOR))
+        calls = [
+            ("eth_call", [{"to": contract, "data": selector}, "latest"])
+            for contract in missing
+            for _, selector in selectors
+        ]
+        results = iter(self.client.batch(calls))
+        for contract in missing:
+            metadata: Dict[str, Optional[str]] = {}
+            for field, _ in selectors:
+                result = next(results)
+                if isinstance(result, JsonRpcError) or not result or result == "0x":
+                    metadata[field] = None
+                elif field == "decimals":
+                    metadata[field] = str(_to_int(result))
+                else:
+                    metadata[field] = _decode_string(result)
+            self._token_metadata[(self.rpc_url, contract)] = metadata
+        return {contract: self._token_metadata[(self.rpc_url, contract)] for contract in contracts}
+
+    # Native transfers
+
+    def _scan_native_batch(self, wallet_address: str, blocks: range) -> List[RawTransaction]:
+        results = self.client.batch([("eth_getBlockByNumber", [hex(block), True]) for block in blocks])
+        records: List[RawTransaction] = []
+        for block_number, block in zip(blocks, results):
+            if isinstance(block, JsonRpcError):
+                raise block
+            if not block:
+                continue
+            timestamp = _to_int(block["timestamp"])
+            self._timestamps[(self.rpc_url, block_number)] = timestamp
+            for tx in block.get("transactions") or []:
+                sender = (tx.get("from") or "").lower()
+                recipient = (tx.get("to") or "").lower()
+                if wallet_address not in (sender, recipient):
+                    continue
+                records.append(RawTransaction.model_validate({
+                    "hash": tx["hash"],
+                    "timeStamp": str(timestamp),
+                    "from": sender,
+                    # Contract creations have no recipient
+                    "to": recipient,
+                    "value": str(_to_int(tx.get("value") or "0x0")),
+                    "gas": str(_to_int(tx.get("gas") or "0x0")),
+                    "gasPrice": str(_to_int(tx.get("gasPrice") or "0x0")),
+                    "blockNumber": str(block_number),
+                }))
+        return records
+
+    def iter_transactions(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawTransaction]:
+        """
+        Native transfers have no log to filter on, so every block of the range
+        is fetched; ranges wider than RPC_MAX_NATIVE_SCAN_BLOCKS are refused.
+        """
+        endblock = min(endblock, self._head_block())
+        block_count = max(endblock - startblock + 1, 0)
+        if block_count > RPC_MAX_NATIVE_SCAN_BLOCKS:
+            raise NativeScanTooWide(
+                f"Refusing to scan {block_count} blocks ({startblock}-{endblock}) of {self.chain} for native "
+                f"transfers; narrow the run with --start-date/--end-date or raise RPC_MAX_NATIVE_SCAN_BLOCKS."
+            )
+        logging.info(f"Scanning {block_count} blocks ({startblock}-{endblock}) of {self.chain} for native transfers.")
+        wallet_address = wallet_address.lower()
+        batches = (
+            range(lo, min(lo + RPC_BATCH_SIZE, endblock + 1))
+            for lo in range(startblock, endblock + 1, RPC_BATCH_SIZE)
+        )
+        progress = tqdm(total=block_count, desc=f"Scanning {self.chain} blocks", unit="block", leave=False)
+        # A bounded window of batches in flight, yielded in block order
+        in_flight: Deque[Tuple[int, Future]] = deque()
+
+        def drain() -> List[RawTransaction]:
+            size, future = in_flight.popleft()
+            records = future.result()
+            progress.update(size)
+            return records
+
+        try:
+            for blocks in batches:
+                in_flight.append((len(blocks), SHARD_EXECUTOR.submit(self._scan_native_batch, wallet_address, blocks)))
+                if len(in_flight) >= SHARD_WORKERS:
+                    yield from drain()
+            while in_flight:
+                yield from drain()
+        finally:
+            progress.close()
+            for _, future in in_flight:
+                future.cancel()
+
+    def iter_token_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawTokenTransfer]:
+        return iter(self._scan_transfer_logs(wallet_address, startblock, endblock)["token_transfers"])
+
+    def iter_internal_transactions(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawTransaction]:
+        logging.warning(
+            f"Internal transactions are not available from a plain JSON-RPC node ({self.chain}); skipping them."
+        )
+        return iter(())
+
+    def iter_nft_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[RawNFTTransfer]:
+        return iter(self._scan_transfer_logs(wallet_address, startblock, endblock)["nft_transfers"])
+
+    def iter_1155_transfers(
+        self, wallet_address: str, startblock: int = 0, endblock: int = 99999999
+    ) -> Iterator[Raw1155Transfer]:
+        return iter(self._scan_transfer_logs(wallet_address, startblock, endblock)["1155_transfers"])
+
+    # Block lookups
+
+    def _block_timestamp(self, block: int) -> int:
+        return self._block_timestamps([block])[block]
+
+    def get_block_number_by_timestamp(
+        self, timestamp: int, closest: str = "before"
+    ) -> int:
+        cache_key = f"{self.rpc_url}_{timestamp}_{closest}"
+        if cache_key in self._block_cache:
+            return self._block_cache[cache_key]
+        return self._block_inflight.do(cache_key, self._search_block, cache_key, timestamp, closest)
+
+    def _search_block(self, cache_key: str, timestamp: int, closest: str) -> int:
+        """Search over block timestamps, narrowed by the persisted block index."""
+        if cache_key in self._block_cache:
+            return self._block_cache[cache_key]
+        try:
+            block = block_index.search(self.chain, timestamp, closest, self._block_timestamp, self._head_block)
+        except (RequestException, JsonRpcError) as e:
+            block = block_index.bound(self.chain, timestamp, closest)
+            logging.warning(f"Block lookup for {timestamp} failed on {self.chain} node ({e}); using block {block}.")
+            return block
+        self._block_cache[cache_key] = block
+        return block
@@ -0,0 +1,133 @@
+import logging
+import os
+import sqlite3
+from typing import List, Optional, Sequence, Type, TypeVar
+
+from pydantic import BaseModel
+
+from config import SYNC_REORG_MARGIN, SYNC_STATE_DB_PATH
+from record_store import RecordStore, record_store
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def _record_block(record: BaseModel) -> Optional[int]:
+    block = getattr(record, "blockNumber", None)
+    try:
+        return int(block) if block is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SyncStateStore:
+    """
+    Persisted per-wallet sync state for incremental runs.
+
+    For every (chain, wallet, endpoint) it keeps the highest block fetched so
+    far (the high-water mark); the records themselves live in the record
+    store. The next run only fetches from that block minus a reorg safety
+    margin, the refetched window replaces the stored records from the same
+    blocks, and the endpoint's history is read back from the record store.
+    """
+
+    def __init__(
+        self,
+        db_path: str = SYNC_STATE_DB_PATH,
+        reorg_margin: int = SYNC_REORG_MARGIN,
+        records: Optional[RecordStore] = None,
+    ):
+        self.db_path = db_path
+        self.reorg_margin = reorg_margin
+        self.records = records or record_store
+        self._init_db()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "chain TEXT, "
+                "wallet TEXT, "
+                "endpoint TEXT, "
+                "last_block INTEGER, "
+                "updated DATETIME DEFAULT CURRENT_TIMESTAMP, "
+                "PRIMARY KEY (chain, wallet, endpoint)"
+                ")"
+            )
+            legacy = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_records'"
+            ).fetchone()
+            if legacy:
+                # Histories used to be kept here; their marks would now point past an empty record store
+                logging.info("Dropping the old incremental sync records; the next incremental run fetches in full.")
+                conn.execute("DELETE FROM sync_state")
+                conn.execute("DROP TABLE sync_records")
+
+    def last_synced_block(self, chain: str, wallet: str, endpoint: str) -> Optional[int]:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT last_block FROM sync_state WHERE chain = ? AND wallet = ? AND endpoint = ?",
+                (chain, wallet.lower(), endpoint),
+            ).fetchone()
+        return row[0] if row else None
+
+    def resume_block(self, chain: str, wallet: str, endpoint: str) -> int:
+        """The start block for the next fetch of an endpoint (0 if never synced)."""
+        last_block = self.last_synced_block(chain, wallet, endpoint)
+        if last_block is None:
+            return 0
+        return max(0, last_block + 1 - self.reorg_margin)
+
+    def load_records(self, chain: str, wallet: str, endpoint: str, model: Type[T], to_block: int = 99999999) -> List[T]:
+        return self.records.load(chain, wallet, endpoint, 0, to_block, model)
+
+    def merge(
+        self,
+        chain: str,
+        wallet: str,
+        endpoint: str,
+        from_block: int,
+        to_block: int,
+        fetched: Sequence[T],
+        model: Type[T],
+        stored: bool = False,
+        complete: bool = True,
+    ) -> List[T]:
+        """
+        Records the blocks fetched for [from_block, to_block] and returns the
+        endpoint's full history from the record store.
+
+        `stored` means the adapter already saved the fetch to the record store;
+        otherwise it is saved here, marked covered only when `complete`. An
+        empty fetch leaves the store untouched: fetch_data also returns an
+        empty list once its retries are exhausted, and that must not be
+        mistaken for "nothing changed since the last run".
+        """
+        if not fetched:
+            return self.load_records(chain, wallet, endpoint, model, to_block)
+
+        wallet = wallet.lower()
+        if not stored:
+            self.records.save(chain, wallet, endpoint, from_block, to_block, fetched, complete=complete)
+
+        known_blocks = [block for block in map(_record_block, fetched) if block is not None]
+        last_block = self.last_synced_block(chain, wallet, endpoint)
+        if known_blocks:
+            last_block = max(known_blocks + ([last_block] if last_block is not None else []))
+        if last_block is not None:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (chain, wallet, endpoint, last_block) VALUES (?, ?, ?, ?)",
+                    (chain, wallet, endpoint, last_block),
+                )
+
+        history = self.load_records(chain, wallet, endpoint, model, to_block)
+        logging.debug(
+            f"Incremental sync {chain}/{wallet}/{endpoint}: {len(fetched)} fetched from block {from_block}, "
+            f"{len(history)} stored, synced to {last_block}"
+        )
+        return history
+
+
+# Singleton instance
+sync_state = SyncStateStore()
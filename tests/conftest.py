@@ -1,6 +1,9 @@
 import pytest
 import os
 from cache_manager import cache_manager
+from rate_limiter import rate_limiter
+from api_key_pool import KeyUsageStore, api_key_manager
+from endpoint_health import endpoint_health
 
 @pytest.fixture(autouse=True)
 def disable_persistent_cache(monkeypatch):
@@ -8,3 +11,36 @@ def disable_persistent_cache(monkeypatch):
     Automatically disables the persistent cache for all tests to prevent interference.
     """
     monkeypatch.setenv("DISABLE_CACHE", "true")
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    """
+    Gives every test a fresh shared rate limiter so token and pause state does not leak.
+    """
+    rate_limiter.reset()
+    yield
+    rate_limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def isolated_api_key_pools(tmp_path):
+    """
+    Keeps API key pools and their persisted usage counts local to each test.
+    """
+    api_key_manager.reset(KeyUsageStore(str(tmp_path / "api_key_usage.db")))
+    yield
+    api_key_manager.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_endpoint_health():
+    """
+    Starts every test with closed circuits, no latency history and a single
+    endpoint per chain; hedging tests configure their own alternatives.
+    """
+    endpoint_health.reset()
+    endpoint_health.set_endpoints({})
+    yield
+    endpoint_health.reset()
+    endpoint_health.set_endpoints()
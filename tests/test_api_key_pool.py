@@ -0,0 +1,137 @@
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from api_key_pool import ApiKeyPool, ApiKeyQuotaExceeded, KeyUsageStore, _key_id, api_key_manager
+from config import EXPLORER_URLS
+from explorer_adapters import EtherscanAdapter
+from fetch_blockchain_data import fetch_data
+from models import RawTransaction
+
+CHAIN = "etherscan"
+WALLET_ADDRESS = "0x1234567890123456789012345678901234567890"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KeyUsageStore(str(tmp_path / "usage.db"), flush_every=1)
+
+
+def test_keys_from_plural_and_single_env_vars(monkeypatch):
+    monkeypatch.setenv("ETHERSCAN_API_KEYS", "k1, k2,k3")
+    monkeypatch.setenv("ETHERSCAN_API_KEY", "k2")
+
+    assert api_key_manager.keys_for_chain(CHAIN) == ["k1", "k2", "k3"]
+    assert api_key_manager.keys_for_chain("mintchain") == []
+
+
+def test_round_robin_rotation(store):
+    pool = ApiKeyPool(CHAIN, ["k1", "k2", "k3"], store, strategy="round_robin")
+
+    assert [pool.next_key() for _ in range(4)] == ["k1", "k2", "k3", "k1"]
+
+
+def test_least_used_rotation(store):
+    pool = ApiKeyPool(CHAIN, ["k1", "k2"], store, strategy="least_used")
+    pool.checkout("k1")
+    pool.checkout("k1")
+    pool.checkout("k2")
+
+    assert pool.next_key() == "k2"
+
+
+def test_parked_key_is_skipped_and_swapped(store):
+    pool = ApiKeyPool(CHAIN, ["k1", "k2"], store)
+
+    assert pool.park("k1", 60, "rate limited") is True
+    assert [pool.next_key() for _ in range(3)] == ["k2", "k2", "k2"]
+    assert pool.checkout("k1") == "k2"
+
+
+def test_daily_quota_moves_work_to_keys_with_headroom(store):
+    pool = ApiKeyPool(CHAIN, ["k1", "k2"], store, daily_quota=2)
+
+    used = [pool.checkout("k1") for _ in range(4)]
+
+    assert used == ["k1", "k1", "k2", "k2"]
+    with pytest.raises(ApiKeyQuotaExceeded):
+        pool.checkout("k1")
+
+
+def test_usage_is_persisted_across_pools(store):
+    pool = ApiKeyPool(CHAIN, ["k1"], store)
+    pool.checkout("k1")
+    pool.checkout("k1")
+    store.flush()
+
+    reloaded = ApiKeyPool(CHAIN, ["k1"], store)
+
+    assert reloaded.usage() == {_key_id("k1"): 2}
+
+
+def test_adapter_spreads_requests_across_keys(monkeypatch):
+    monkeypatch.setenv("ETHERSCAN_API_KEYS", "k1,k2")
+    adapter = EtherscanAdapter(CHAIN)
+
+    urls = [adapter._get_explorer_api_url({"module": "account"}) for _ in range(2)]
+
+    assert urls[0].endswith("apikey=k1")
+    assert urls[1].endswith("apikey=k2")
+
+
+@patch("time.sleep", return_value=None)
+@responses.activate
+def test_fetch_data_retries_invalid_key_with_another_key(mock_sleep, monkeypatch):
+    monkeypatch.setenv("ETHERSCAN_API_KEYS", "bad,good")
+    adapter = EtherscanAdapter(CHAIN)
+    url = adapter._get_explorer_api_url({"module": "account", "action": "txlist"})
+    assert url.endswith("apikey=bad")
+
+    base_url = EXPLORER_URLS[CHAIN]
+    responses.add(
+        responses.GET,
+        f"{base_url}?module=account&action=txlist&apikey=bad",
+        json={"status": "0", "message": "NOTOK", "result": "Invalid API Key"},
+    )
+    responses.add(
+        responses.GET,
+        f"{base_url}?module=account&action=txlist&apikey=good",
+        json={"status": "1", "message": "OK", "result": [{
+            "hash": "0xabc", "from": "0x1", "to": "0x2", "value": "1", "timeStamp": "1",
+        }]},
+    )
+
+    data = fetch_data(url, RawTransaction)
+
+    assert [tx.hash for tx in data] == ["0xabc"]
+    assert [c.request.url.rsplit("=", 1)[1] for c in responses.calls] == ["bad", "good"]
+    # The invalid key stays parked for later URLs
+    assert adapter._get_explorer_api_url({"module": "account"}).endswith("apikey=good")
+
+
+def test_day_rollover_reloads_usage_from_the_store(store, tmp_path):
+    with patch("api_key_pool._today", return_value="2024-01-01"):
+        pool = ApiKeyPool(CHAIN, ["k1"], store, daily_quota=5)
+        pool.checkout("k1")
+
+    # Another process sharing the store already used the new day's quota
+    other = KeyUsageStore(store.db_path, flush_every=1)
+    for _ in range(5):
+        other.record(_key_id("k1"), "2024-01-02")
+
+    with patch("api_key_pool._today", return_value="2024-01-02"):
+        assert pool.usage() == {_key_id("k1"): 1}
+        with pytest.raises(ApiKeyQuotaExceeded):
+            pool.next_key()
+
+
+@responses.activate
+def test_fetch_data_raises_when_every_key_is_out_of_quota(monkeypatch):
+    monkeypatch.setenv("ETHERSCAN_API_KEYS", "k1")
+    url = EtherscanAdapter(CHAIN)._get_explorer_api_url({"module": "account", "action": "txlist"})
+    api_key_manager.get_pool(CHAIN).daily_quota = 0
+
+    with pytest.raises(ApiKeyQuotaExceeded):
+        fetch_data(url, RawTransaction)
+    assert len(responses.calls) == 0
@@ -0,0 +1,299 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from config import EXPLORER_URLS
+from explorer_adapters import AsyncExplorerAdapter, MintchainAdapter
+from fetch_blockchain_data import HostConcurrencyLimiter, async_fetch_data
+from models import RawTransaction, Transaction
+
+WALLET_ADDRESS = "0x1234567890123456789012345678901234567890"
+CHAIN = "mintchain"
+
+
+@pytest.fixture
+def mocked_responses():
+    with responses.RequestsMock() as rsps:
+        yield rsps
+
+
+def _tx(i: int, prefix: str) -> dict:
+    return {
+        "hash": f"0x{prefix}_{i}",
+        "from": {"hash": "0x123"},
+        "to": {"hash": WALLET_ADDRESS},
+        "value": "100",
+        "timeStamp": "1672531200",
+        "gasUsed": "21000",
+        "gasPrice": "1000000000",
+    }
+
+
+def test_async_adapter_fetches_all_pages(mocked_responses):
+    base_url = EXPLORER_URLS[CHAIN]
+    for page, count in ((1, 10000), (2, 3)):
+        mocked_responses.add(
+            responses.GET,
+            f"{base_url}?module=account&action=txlist&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&offset=10000&sort=asc&page={page}",
+            json={"status": "1", "message": "OK", "result": [_tx(i, f"p{page}") for i in range(count)]},
+            status=200,
+        )
+
+    async def run():
+        adapter = AsyncExplorerAdapter(MintchainAdapter(CHAIN), HostConcurrencyLimiter())
+        return await adapter.get_transactions(WALLET_ADDRESS)
+
+    transactions = asyncio.run(run())
+
+    assert len(transactions) == 10003
+    assert transactions[0].hash == "0xp1_0"
+    assert transactions[-1].hash == "0xp2_2"
+    assert len(mocked_responses.calls) == 2
+
+
+def test_host_concurrency_limiter_caps_in_flight_requests():
+    limiter = HostConcurrencyLimiter(max_per_host=2)
+    in_flight = 0
+    peak = 0
+
+    async def request(url: str):
+        nonlocal in_flight, peak
+        async with limiter.limit(url):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def run():
+        await asyncio.gather(*(request(f"https://api.example.com/api?page={i}") for i in range(10)))
+
+    asyncio.run(run())
+
+    assert peak == 2
+
+
+def test_host_concurrency_limiter_is_per_host():
+    async def run():
+        limiter = HostConcurrencyLimiter(max_per_host=1)
+        first = limiter.limit("https://a.example.com/api?x=1")
+        assert limiter.limit("https://a.example.com/api?x=2") is first
+        assert limiter.limit("https://b.example.com/api?x=1") is not first
+
+    asyncio.run(run())
+
+
+@patch("main.WriterFactory")
+@patch("main.async_process_transactions")
+def test_batch_asyncio_engine(mock_process, mock_factory):
+    from main import process_batch_transactions
+
+    addr1 = "0x" + "1" * 40
+    addr2 = "0x" + "2" * 40
+
+    async def fake_process(wallet_address, chain, start, end, fees_only=False, rpc_url=None, limiter=None, sharded=False, incremental=False, backend="explorer", receipts=False, client=None):
+        assert isinstance(limiter, HostConcurrencyLimiter)
+        return [
+            Transaction.model_validate(
+                {"Date": "2023-01-01 00:00:01 UTC", "timestamp": 1, "Description": wallet_address, "TxHash": wallet_address}
+            )
+        ]
+
+    mock_process.side_effect = fake_process
+
+    process_batch_transactions([addr1, addr2], CHAIN, "csv", engine="asyncio")
+
+    assert mock_process.call_count == 2
+    assert mock_factory.get_writer.return_value.write.call_count == 2
+    written = {c.args[0] for c in mock_factory.get_writer.return_value.write.call_args_list}
+    assert written == {f"output/{addr1}_transactions.csv", f"output/{addr2}_transactions.csv"}
+
+
+def _serve(handler):
+    """Starts a local aiohttp explorer answering /api with `handler`; returns (server, url)."""
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    async def start():
+        app = web.Application()
+        app.router.add_get("/api", handler)
+        server = TestServer(app)
+        await server.start_server()
+        return server, str(server.make_url("/api"))
+
+    return start()
+
+
+def test_async_fetch_data_sends_requests_from_the_event_loop(monkeypatch):
+    aiohttp = pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from rate_limiter import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "requests_per_second", 0)
+    monkeypatch.setattr("asyncio.to_thread", None)
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        page = request.query["page"]
+        return web.json_response({"status": "1", "message": "OK", "result": [_tx(0, f"p{page}")]})
+
+    async def run():
+        server, url = await _serve(handler)
+        limiter = HostConcurrencyLimiter(max_per_host=3)
+        try:
+            async with aiohttp.ClientSession() as client:
+                return await asyncio.gather(
+                    *(async_fetch_data(f"{url}?module=account&page={i}", RawTransaction, limiter, client) for i in range(12))
+                )
+        finally:
+            await server.close()
+
+    pages = asyncio.run(run())
+
+    assert [page[0].hash for page in pages] == [f"0xp{i}_0" for i in range(12)]
+    # Bounded by the per-host limiter, not by a thread pool
+    assert peak == 3
+
+
+def test_async_fetch_data_retries_and_coalesces_identical_requests(monkeypatch):
+    aiohttp = pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from rate_limiter import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "requests_per_second", 0)
+    from fetch_blockchain_data import _async_fetch_data_with_retry
+    from tenacity import wait_none
+
+    monkeypatch.setattr(_async_fetch_data_with_retry.retry, "wait", wait_none())
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        if calls == 1:
+            return web.Response(status=502)
+        return web.json_response({"status": "1", "message": "OK", "result": [_tx(0, "ok")]})
+
+    async def run():
+        server, url = await _serve(handler)
+        try:
+            async with aiohttp.ClientSession() as client:
+                endpoint = f"{url}?module=account&page=1"
+                return await asyncio.gather(
+                    *(async_fetch_data(f"{endpoint}&apikey=K{i}", RawTransaction, HostConcurrencyLimiter(), client) for i in range(4))
+                )
+        finally:
+            await server.close()
+
+    pages = asyncio.run(run())
+
+    assert all(page[0].hash == "0xok_0" for page in pages)
+    # One leader for the four callers: a failed attempt and its retry
+    assert calls == 2
+
+
+def _paged(rows, query):
+    page, offset = int(query["page"]), int(query["offset"])
+    return {"status": "1", "message": "OK", "result": rows[(page - 1) * offset:page * offset]}
+
+
+def test_async_pager_shrinks_page_size_after_timeout(monkeypatch):
+    aiohttp = pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from rate_limiter import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "requests_per_second", 0)
+    monkeypatch.setattr("fetch_blockchain_data.TIMEOUT", 0.2)
+    monkeypatch.setattr("explorer_adapters.PAGE_SIZE_LADDER", (10, 5))
+    monkeypatch.setattr("explorer_adapters.PAGE_SIZE_BOUNDS", {CHAIN: (5, 10)})
+    monkeypatch.setattr("explorer_adapters.DEFAULT_PAGE_SIZE", 10)
+    rows = [_tx(i, "r") for i in range(12)]
+    offsets = []
+
+    async def handler(request):
+        offsets.append(int(request.query["offset"]))
+        if offsets[-1] > 5:
+            await asyncio.sleep(1)
+        return web.json_response(_paged(rows, request.query))
+
+    async def run():
+        server, url = await _serve(handler)
+        try:
+            async with aiohttp.ClientSession() as client:
+                adapter = AsyncExplorerAdapter(MintchainAdapter(CHAIN, rpc_url=url), HostConcurrencyLimiter(), client)
+                return await adapter.get_transactions(WALLET_ADDRESS)
+        finally:
+            await server.close()
+
+    transactions = asyncio.run(run())
+
+    assert [tx.hash for tx in transactions] == [f"0xr_{i}" for i in range(12)]
+    # One timed-out 10-row page, then 5-row pages 1..3 with no backoff retries
+    assert offsets == [10, 5, 5, 5]
+
+
+def test_async_pager_coalesces_identical_pages(monkeypatch):
+    aiohttp = pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from rate_limiter import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "requests_per_second", 0)
+    rows = [_tx(i, "r") for i in range(3)]
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request.query["page"])
+        await asyncio.sleep(0.1)
+        return web.json_response(_paged(rows, request.query))
+
+    async def run():
+        server, url = await _serve(handler)
+        try:
+            async with aiohttp.ClientSession() as client:
+                adapter = AsyncExplorerAdapter(MintchainAdapter(CHAIN, rpc_url=url), HostConcurrencyLimiter(), client)
+                return await asyncio.gather(*(adapter.get_transactions(WALLET_ADDRESS) for _ in range(5)))
+        finally:
+            await server.close()
+
+    results = asyncio.run(run())
+
+    assert all([tx.hash for tx in r] == [f"0xr_{i}" for i in range(3)] for r in results)
+    assert requests_seen == ["1"]
+
+
+def test_thread_backed_async_pager_shrinks_page_size_after_timeout(mocked_responses, monkeypatch):
+    from urllib.parse import parse_qs, urlparse
+    from requests.exceptions import ReadTimeout
+
+    monkeypatch.setattr("explorer_adapters.PAGE_SIZE_LADDER", (10, 5))
+    monkeypatch.setattr("explorer_adapters.PAGE_SIZE_BOUNDS", {CHAIN: (5, 10)})
+    monkeypatch.setattr("explorer_adapters.DEFAULT_PAGE_SIZE", 10)
+    rows = [_tx(i, "r") for i in range(12)]
+    offsets = []
+
+    def callback(request):
+        query = {name: values[0] for name, values in parse_qs(urlparse(request.url).query).items()}
+        offsets.append(int(query["offset"]))
+        if offsets[-1] > 5:
+            raise ReadTimeout("page too large")
+        return 200, {}, json.dumps(_paged(rows, query))
+
+    mocked_responses.add_callback(responses.GET, EXPLORER_URLS[CHAIN], callback=callback)
+
+    async def run():
+        adapter = AsyncExplorerAdapter(MintchainAdapter(CHAIN), HostConcurrencyLimiter())
+        return await adapter.get_transactions(WALLET_ADDRESS)
+
+    transactions = asyncio.run(run())
+
+    assert len(transactions) == 12
+    assert offsets == [10, 5, 5, 5]
@@ -0,0 +1,124 @@
+import time
+
+import pytest
+import responses
+
+from block_index import BlockIndex
+from config import EXPLORER_URLS
+from explorer_adapters import EtherscanAdapter, MintchainAdapter
+from models import RawTransaction
+
+CHAIN = "mintchain"
+
+
+def _timestamp(block: int) -> int:
+    return 1700000000 + block * 2
+
+
+@pytest.fixture
+def mocked_responses():
+    with responses.RequestsMock() as rsps:
+        yield rsps
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    return BlockIndex(str(tmp_path / "cache.db"), max_gap=10)
+
+
+def test_adjacent_anchors_resolve_exactly(index):
+    index.add_anchors(CHAIN, [(100, _timestamp(100)), (101, _timestamp(101))])
+
+    assert index.resolve(CHAIN, _timestamp(100) + 1, "before") == 100
+    assert index.resolve(CHAIN, _timestamp(100) + 1, "after") == 101
+    assert index.resolve(CHAIN, _timestamp(101), "after") == 101
+
+
+def test_narrow_bracket_resolves_to_conservative_edge(index):
+    index.add_anchors(CHAIN, [(100, _timestamp(100)), (108, _timestamp(108))])
+    timestamp = _timestamp(104)
+
+    # Range starts may begin early and range ends may end late, never the reverse
+    assert index.resolve(CHAIN, timestamp, "after") == 101
+    assert index.resolve(CHAIN, timestamp, "before") == 107
+
+
+def test_wide_or_open_bracket_needs_the_network(index):
+    index.add_anchors(CHAIN, [(100, _timestamp(100)), (500, _timestamp(500))])
+
+    assert index.resolve(CHAIN, _timestamp(300), "before") is None
+    assert index.resolve(CHAIN, _timestamp(600), "before") is None
+    assert index.bound(CHAIN, _timestamp(300), "after") == 101
+    assert index.bound(CHAIN, _timestamp(300), "before") == 499
+    assert index.bound(CHAIN, _timestamp(600), "before") == 99999999
+
+
+def test_records_become_anchors(index):
+    records = [
+        RawTransaction.model_validate(
+            {
+                "hash": f"0x{block}",
+                "blockNumber": str(block),
+                "timeStamp": str(_timestamp(block)),
+                "from": "0x1",
+                "to": "0x2",
+                "value": "0",
+                "gasUsed": "21000",
+                "gasPrice": "1",
+            }
+        )
+        for block in (200, 201)
+    ]
+    index.add_records(CHAIN, records)
+
+    assert index.bracket(CHAIN, _timestamp(200), "before") == ((200, _timestamp(200)), (201, _timestamp(201)))
+
+
+def test_only_settled_lookups_are_stored(index):
+    index.set_lookup(CHAIN, _timestamp(50), "after", 50)
+    index.set_lookup(CHAIN, int(time.time()), "before", 999)
+
+    assert index.resolve(CHAIN, _timestamp(50), "after") == 50
+    assert index.resolve(CHAIN, int(time.time()), "before") is None
+
+
+def test_search_reads_few_blocks_and_indexes_them(index):
+    reads = []
+
+    def block_timestamp(block):
+        reads.append(block)
+        return _timestamp(block)
+
+    assert index.search(CHAIN, _timestamp(321) + 1, "before", block_timestamp, lambda: 100000) == 321
+    first = len(reads)
+    assert first < 34
+
+    # The probes of the first search narrow the second
+    reads.clear()
+    assert index.search(CHAIN, _timestamp(322), "after", block_timestamp, lambda: 100000) == 322
+    assert len(reads) < first
+
+
+def test_explorer_lookup_served_from_index(index, monkeypatch, mocked_responses):
+    monkeypatch.setattr("explorer_adapters.block_index", index)
+    EtherscanAdapter._block_cache.clear()
+    index.add_anchors(CHAIN, [(4769930, 1725148790), (4769940, 1725148810)])
+
+    block = MintchainAdapter(CHAIN).get_block_number_by_timestamp(1725148800, "before")
+
+    assert block == 4769939
+    assert len(mocked_responses.calls) == 0
+
+
+def test_failed_explorer_lookup_falls_back_to_anchors(index, monkeypatch, mocked_responses):
+    monkeypatch.setattr("explorer_adapters.block_index", index)
+    EtherscanAdapter._block_cache.clear()
+    index.add_anchors(CHAIN, [(4000000, 1725100000), (4800000, 1725200000)])
+    mocked_responses.add(
+        responses.GET,
+        f"{EXPLORER_URLS[CHAIN]}?module=block&action=getblocknobytime&timestamp=1725148800&closest=after",
+        json={"status": "0", "message": "NOTOK", "result": "Error!"},
+    )
+
+    assert MintchainAdapter(CHAIN).get_block_number_by_timestamp(1725148800, "after") == 4000001
@@ -0,0 +1,112 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from endpoint_health import CircuitBreaker, EndpointHealth, endpoint_health
+from fetch_blockchain_data import send_explorer_request
+
+PRIMARY = "https://primary.example/api"
+MIRROR = "https://mirror.example/api"
+QUERY = "?module=account&action=txlist&address=0xabc&page=1"
+
+
+def _response(status_code=200):
+    return Mock(status_code=status_code, headers={})
+
+
+@pytest.fixture
+def two_endpoints():
+    endpoint_health.set_endpoints({"testchain": [PRIMARY, MIRROR]})
+
+
+def test_circuit_opens_after_threshold_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_candidates_skip_open_circuits_and_drop_api_key():
+    health = EndpointHealth({"testchain": [PRIMARY, MIRROR]})
+
+    assert health.candidates(PRIMARY + QUERY + "&apikey=secret") == [
+        PRIMARY + QUERY + "&apikey=secret",
+        MIRROR + QUERY,
+    ]
+
+    for _ in range(5):
+        health.record_failure(PRIMARY)
+    assert health.candidates(PRIMARY + QUERY) == [MIRROR + QUERY]
+
+    # With every circuit open the request still goes somewhere
+    for _ in range(5):
+        health.record_failure(MIRROR)
+    assert health.candidates(PRIMARY + QUERY) == [PRIMARY + QUERY]
+
+
+def test_single_endpoint_chains_are_requested_directly():
+    with patch("fetch_blockchain_data.session.get", return_value=_response()) as mock_get:
+        url, _ = send_explorer_request(PRIMARY + QUERY)
+
+    assert url == PRIMARY + QUERY
+    assert mock_get.call_count == 1
+
+
+def test_failover_on_connection_error(two_endpoints):
+    def get(url, timeout):
+        if url.startswith(PRIMARY):
+            raise ConnectionError("refused")
+        return _response()
+
+    with patch("fetch_blockchain_data.session.get", side_effect=get):
+        url, response = send_explorer_request(PRIMARY + QUERY)
+
+    assert url == MIRROR + QUERY
+    assert response.status_code == 200
+    assert endpoint_health.breaker(PRIMARY).failures == 1
+
+
+def test_hedge_wins_when_primary_is_slow(two_endpoints, monkeypatch):
+    monkeypatch.setattr(endpoint_health, "hedge_delay", lambda endpoint: 0.01)
+    release = threading.Event()
+
+    def get(url, timeout):
+        if url.startswith(PRIMARY):
+            release.wait(1)
+        return _response()
+
+    try:
+        with patch("fetch_blockchain_data.session.get", side_effect=get) as mock_get:
+            url, _ = send_explorer_request(PRIMARY + QUERY)
+    finally:
+        release.set()
+
+    assert url == MIRROR + QUERY
+    assert mock_get.call_count == 2
+
+
+def test_server_error_is_returned_when_no_endpoint_succeeds(two_endpoints):
+    with patch("fetch_blockchain_data.session.get", return_value=_response(502)) as mock_get:
+        _, response = send_explorer_request(PRIMARY + QUERY)
+
+    assert response.status_code == 502
+    assert mock_get.call_count == 2
+
+
+def test_hedge_delay_follows_p95_latency():
+    health = EndpointHealth({})
+    for i in range(100):
+        health.record_success(PRIMARY, i / 100)
+
+    assert health.hedge_delay(PRIMARY + QUERY) == pytest.approx(0.95)
@@ -184,6 +184,24 @@ def test_extract_transaction_data_token_transfer_received(mock_get_price):
     assert trx.sent_amount is None
     assert trx.fee_amount is None
 
+@patch("extract_transaction_data.get_token_price")
+def test_extract_transaction_data_token_transfer_unknown_decimals_logged(mock_get_price, caplog):
+    mock_get_price.return_value = None
+    raw_token_trx = RawTokenTransfer.model_validate({
+        "hash": "0xdef",
+        "from": {"hash": "0x456"},
+        "to": {"hash": WALLET_ADDRESS},
+        "timeStamp": "1672531201",
+        "total": {"value": "3000000000000000000"},
+        "token": {"symbol": "ODD"},
+        "tokenDecimal": "",
+        "contractAddress": "0xodd"
+    })
+    transactions = extract_transaction_data([raw_token_trx], "token_transfers", WALLET_ADDRESS, "mintchain")
+    assert transactions[0].received_amount == "3"
+    assert "Unknown decimals for 1 token(s) on mintchain" in caplog.text
+    assert "ODD (0xodd)" in caplog.text
+
 @patch("extract_transaction_data.get_token_price")
 def test_extract_transaction_data_internal_transaction_sent(mock_get_price):
     mock_get_price.return_value = Decimal("2000.0")
@@ -295,7 +295,8 @@ def test_adapter_get_block_number_by_timestamp(mocked_responses):
 
 def test_adapter_get_block_number_by_timestamp_error(mocked_responses):
     """
-    Verify that get_block_number_by_timestamp returns fallback values on API error.
+    Verify that get_block_number_by_timestamp falls back to the widest range on API error,
+    so a failed lookup never drops records from the requested period.
     """
     EtherscanAdapter._block_cache.clear()
     adapter = MintchainAdapter(CHAIN)
@@ -310,7 +311,7 @@ def test_adapter_get_block_number_by_timestamp_error(mocked_responses):
         json={"status": "0", "message": "NOTOK", "result": "Error!"},
         status=200,
     )
-    assert adapter.get_block_number_by_timestamp(timestamp, "before") == 0
+    assert adapter.get_block_number_by_timestamp(timestamp, "before") == 99999999
 
     # Test "after" fallback
     mock_url_after = f"{base_url}?module=block&action=getblocknobytime&timestamp={timestamp}&closest=after"
@@ -320,7 +321,7 @@ def test_adapter_get_block_number_by_timestamp_error(mocked_responses):
         json={"status": "0", "message": "NOTOK", "result": "Error!"},
         status=200,
     )
-    assert adapter.get_block_number_by_timestamp(timestamp, "after") == 99999999
+    assert adapter.get_block_number_by_timestamp(timestamp, "after") == 0
 
 
 @pytest.mark.parametrize("chain", ["etherscan", "basescan", "arbiscan"])
@@ -703,3 +704,47 @@ def test_adapter_pagination(mocked_responses):
     transactions = adapter.get_transactions(WALLET_ADDRESS)
     assert len(transactions) == 10005
     assert len(mocked_responses.calls) == 2
+
+
+def _page_item(tx_hash):
+    return {
+        "hash": tx_hash,
+        "from": {"hash": "0x123"},
+        "to": {"hash": "0x456"},
+        "value": "100",
+        "timeStamp": "1672531200",
+        "gasUsed": "21000",
+        "gasPrice": "1000000000",
+    }
+
+
+def test_fetch_data_validates_page_in_one_pass(mocked_responses):
+    base_url = EXPLORER_URLS[CHAIN]
+    mock_url = f"{base_url}?module=account&action=txlist&address={WALLET_ADDRESS}&page=1&offset=10000"
+    mocked_responses.add(
+        responses.GET,
+        mock_url,
+        json={"status": "1", "message": "OK", "result": [_page_item(f"0x{i}") for i in range(3)]},
+    )
+
+    with patch.object(RawTransaction, "model_validate", side_effect=AssertionError("per-item validation")):
+        result = fetch_data(mock_url, RawTransaction)
+
+    assert [tx.hash for tx in result] == ["0x0", "0x1", "0x2"]
+
+
+def test_fetch_data_isolates_invalid_rows(mocked_responses, caplog):
+    base_url = EXPLORER_URLS[CHAIN]
+    mock_url = f"{base_url}?module=account&action=txlist&address={WALLET_ADDRESS}&page=1&offset=10000"
+    bad_item = {**_page_item("0xbad"), "value": None}
+    mocked_responses.add(
+        responses.GET,
+        mock_url,
+        json={"status": "1", "message": "OK", "result": [_page_item("0x0"), bad_item, _page_item("0x2")]},
+    )
+
+    with caplog.at_level(logging.WARNING):
+        result = fetch_data(mock_url, RawTransaction)
+
+    assert [tx.hash for tx in result] == ["0x0", "0x2"]
+    assert "0xbad" in caplog.text
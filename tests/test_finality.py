@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from block_index import BlockIndex
+from config import CACHE_TTL_BLOCK_LOOKUP, CACHE_TTL_OPEN_ENDED, EXPLORER_URLS
+from finality import chain_for_endpoint, finalized_block, page_ttl
+from models import RawTransaction
+
+CHAIN = "mintchain"
+OLD = 1672531200
+
+
+def _tx(block, timestamp):
+    return RawTransaction.model_validate(
+        {
+            "hash": f"0x{block}",
+            "blockNumber": str(block),
+            "from": "0x1",
+            "to": "0x2",
+            "value": "1",
+            "timeStamp": str(timestamp),
+            "gasUsed": "21000",
+            "gasPrice": "1",
+        }
+    )
+
+
+def _page_url(startblock=0, endblock=99999999, offset=2, sort="asc"):
+    return (
+        f"{EXPLORER_URLS[CHAIN]}?module=account&action=txlist&address=0xabc"
+        f"&startblock={startblock}&endblock={endblock}&sort={sort}&page=1&offset={offset}"
+    )
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    index = BlockIndex(str(tmp_path / "cache.db"))
+    monkeypatch.setattr("finality.block_index", index)
+    return index
+
+
+def test_chain_for_endpoint():
+    assert chain_for_endpoint(_page_url()) == CHAIN
+    assert chain_for_endpoint("https://explorer.mintchain.io/api?module=account") == CHAIN
+    assert chain_for_endpoint("https://unknown.example/api?module=account") is None
+
+
+def test_finalized_block_uses_records_and_index(index):
+    now = int(time.time())
+    assert finalized_block(CHAIN, [_tx(10, OLD), _tx(11, now)]) == 10
+
+    index.add_anchors(CHAIN, [(500, OLD + 500), (900, now)])
+    assert finalized_block(CHAIN, [_tx(10, OLD)]) == 500
+
+
+def test_full_page_of_final_blocks_never_expires():
+    assert page_ttl(_page_url(), [_tx(10, OLD), _tx(11, OLD)]) is None
+
+
+def test_page_touching_the_head_expires():
+    now = int(time.time())
+    # The last page of an open-ended query gains records as the wallet transacts
+    assert page_ttl(_page_url(), [_tx(10, OLD)]) == CACHE_TTL_OPEN_ENDED
+    # A full page whose last block may still be reorged
+    assert page_ttl(_page_url(), [_tx(10, OLD), _tx(11, now)]) == CACHE_TTL_OPEN_ENDED
+    assert page_ttl(_page_url(sort="desc"), [_tx(11, OLD), _tx(10, OLD)]) == CACHE_TTL_OPEN_ENDED
+
+
+def test_bounded_page_is_permanent_once_its_end_block_is_final(index):
+    assert page_ttl(_page_url(endblock=200), [_tx(10, OLD)]) == CACHE_TTL_OPEN_ENDED
+
+    index.add_anchors(CHAIN, [(250, OLD + 250)])
+    assert page_ttl(_page_url(endblock=200), [_tx(10, OLD)]) is None
+
+
+def test_block_lookups_keep_their_class_ttl():
+    url = f"{EXPLORER_URLS[CHAIN]}?module=block&action=getblocknobytime&timestamp={OLD}&closest=before"
+    assert page_ttl(url, []) == CACHE_TTL_BLOCK_LOOKUP
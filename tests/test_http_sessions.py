@@ -0,0 +1,33 @@
+import fetch_blockchain_data
+import price_service
+from config import COINGECKO_BASE_URL, EXPLORER_POOL_MAXSIZE, EXPLORER_URLS, PRICE_POOL_MAXSIZE
+from http_sessions import EXPLORER, PRICES, SessionRegistry, session_registry
+
+
+def test_explorer_and_price_sessions_are_isolated():
+    assert fetch_blockchain_data.session is session_registry.get(EXPLORER)
+    assert price_service.session is session_registry.get(PRICES)
+    assert fetch_blockchain_data.session is not price_service.session
+
+
+def test_each_known_host_has_its_own_sized_pool():
+    explorer = session_registry.get(EXPLORER)
+    etherscan_adapter = explorer.get_adapter(EXPLORER_URLS["etherscan"])
+    basescan_adapter = explorer.get_adapter(EXPLORER_URLS["basescan"])
+
+    assert etherscan_adapter is not basescan_adapter
+    assert etherscan_adapter._pool_maxsize == EXPLORER_POOL_MAXSIZE
+
+    prices = session_registry.get(PRICES)
+    assert prices.get_adapter(COINGECKO_BASE_URL)._pool_maxsize == PRICE_POOL_MAXSIZE
+
+
+def test_unknown_hosts_use_the_sized_default_adapter():
+    registry = SessionRegistry()
+    session = registry.register("custom", ["https://api.example.com/api"], pool_maxsize=7)
+
+    default_adapter = session.get_adapter("https://rpc.other.org/")
+    assert default_adapter is not session.get_adapter("https://api.example.com/api")
+    assert default_adapter._pool_maxsize == 7
+    # Registering the same name again returns the existing session
+    assert registry.register("custom", [], pool_maxsize=1) is session
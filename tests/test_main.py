@@ -455,6 +455,18 @@ def test_args_year_leap_year():
     assert args.end_date == "2024-12-31"
 
 
+def test_args_rpc_backend_requires_start():
+    """
+    Test that --backend rpc without a start date, year or incremental run is rejected.
+    """
+    with pytest.raises(ValidationError) as exc_info:
+        Args(wallet="0x1234567890123456789012345678901234567890", format="csv", backend="rpc")
+    assert "--backend rpc scans every block in range" in str(exc_info.value)
+
+    args = Args(wallet="0x1234567890123456789012345678901234567890", format="csv", backend="rpc", tax_year=2024)
+    assert args.start_date == "2024-01-01"
+
+
 def test_main_year_flag(mock_adapter):
     """
     Test that main() correctly processes --year flag to set start/end dates.
@@ -488,4 +500,9 @@ def test_main_year_flag(mock_adapter):
                 False,
                 None,
                 False,
+                engine="threads",
+                sharded=False,
+                incremental=False,
+                backend="explorer",
+                receipts=False,
             )
@@ -1,3 +1,6 @@
+import json
+from unittest.mock import patch
+
 import responses
 import pytest
 from explorer_adapters import MintchainAdapter
@@ -65,3 +68,170 @@ def test_fetch_all_pages_pagination(mocked_responses):
     assert transactions[10499].hash == "0xhash2_499"
 
     assert len(mocked_responses.calls) == 2
+
+
+def _fake_explorer(records_by_block, page_size_limit=None):
+    """Builds a responses callback that serves txlist queries like an Etherscan-style explorer."""
+    from urllib.parse import parse_qs, urlparse
+
+    def callback(request):
+        query = {k: v[0] for k, v in parse_qs(urlparse(request.url).query).items()}
+        start, end = int(query["startblock"]), int(query["endblock"])
+        page, offset = int(query["page"]), int(query["offset"])
+        if page_size_limit and page * offset > page_size_limit:
+            return (200, {}, json.dumps({"status": "0", "message": "Result window is too large", "result": []}))
+        rows = [r for b in sorted(records_by_block) if start <= b <= end for r in records_by_block[b]]
+        if query["sort"] == "desc":
+            rows = rows[::-1]
+        rows = rows[(page - 1) * offset: page * offset]
+        if not rows:
+            return (200, {}, json.dumps({"status": "0", "message": "No transactions found", "result": []}))
+        return (200, {}, json.dumps({"status": "1", "message": "OK", "result": rows}))
+
+    return callback
+
+
+def _tx_at(block, i):
+    return {
+        "hash": f"0xb{block}_{i}",
+        "blockNumber": str(block),
+        "from": {"hash": "0x123"},
+        "to": {"hash": WALLET_ADDRESS},
+        "value": "1",
+        "timeStamp": str(1672531200 + block),
+        "gasUsed": "21000",
+        "gasPrice": "1",
+    }
+
+
+def test_block_sharded_fetch_splits_full_shards(mocked_responses):
+    # 30 rows spread over blocks 100..129, with a hot block holding 12 rows
+    records = {b: [_tx_at(b, 0)] for b in range(100, 130)}
+    records[115] = [_tx_at(115, i) for i in range(12)]
+    mocked_responses.add_callback(
+        responses.GET, EXPLORER_URLS[CHAIN], callback=_fake_explorer(records, page_size_limit=10)
+    )
+
+    with patch("explorer_adapters.DEFAULT_PAGE_SIZE", 10), \
+            patch("explorer_adapters.RESULT_WINDOW", 10), \
+            patch("explorer_adapters.SINGLE_BLOCK_PAGE_SIZE", 5), \
+            patch("explorer_adapters.SHARD_COUNT", 2):
+        adapter = MintchainAdapter(CHAIN, sharded=True)
+        transactions = adapter.get_transactions(WALLET_ADDRESS)
+
+    expected = [r["hash"] for b in sorted(records) for r in records[b]]
+    # The hot block exceeds the window: only its first RESULT_WINDOW rows are reachable
+    expected.remove("0xb115_10")
+    expected.remove("0xb115_11")
+    assert [tx.hash for tx in transactions] == expected
+
+
+def test_block_sharded_fetch_empty_wallet(mocked_responses):
+    mocked_responses.add_callback(responses.GET, EXPLORER_URLS[CHAIN], callback=_fake_explorer({}))
+
+    adapter = MintchainAdapter(CHAIN, sharded=True)
+
+    assert adapter.get_transactions(WALLET_ADDRESS) == []
+    # Only the first-block probe is needed
+    assert len(mocked_responses.calls) == 1
+
+
+def test_block_sharded_fetch_dedupes_on_hash_and_log_index():
+    from explorer_adapters import _record_key
+    from models import RawTokenTransfer
+
+    def transfer(log_index):
+        return RawTokenTransfer.model_validate({
+            "hash": "0xabc", "blockNumber": "1", "logIndex": log_index, "timeStamp": "1",
+            "from": "0x1", "to": "0x2", "total": {"value": "1"}, "token": {"symbol": "T"},
+            "tokenDecimal": "18", "contractAddress": "0xc",
+        })
+
+    assert _record_key(transfer("1")) == _record_key(transfer("1"))
+    assert _record_key(transfer("1")) != _record_key(transfer("2"))
+
+
+def test_split_block_range_covers_range():
+    shards = MintchainAdapter._split_block_range(0, 9, 3)
+    assert shards == [(0, 3), (4, 6), (7, 9)]
+    assert MintchainAdapter._split_block_range(5, 6, 8) == [(5, 5), (6, 6)]
+
+
+def test_iter_transactions_streams_page_by_page(mocked_responses):
+    records = {b: [_tx_at(b, 0)] for b in range(1, 26)}
+    mocked_responses.add_callback(responses.GET, EXPLORER_URLS[CHAIN], callback=_fake_explorer(records))
+
+    with patch("explorer_adapters.DEFAULT_PAGE_SIZE", 10):
+        adapter = MintchainAdapter(CHAIN)
+        stream = adapter.iter_transactions(WALLET_ADDRESS)
+
+        # Nothing is requested until the stream is consumed
+        assert len(mocked_responses.calls) == 0
+        first = next(stream)
+        assert first.hash == "0xb1_0"
+        assert len(mocked_responses.calls) == 1
+
+        rest = list(stream)
+
+    assert len(rest) == 24
+    assert len(mocked_responses.calls) == 3
+
+
+def test_get_transactions_wraps_iterator(mocked_responses):
+    records = {b: [_tx_at(b, 0)] for b in range(1, 4)}
+    mocked_responses.add_callback(responses.GET, EXPLORER_URLS[CHAIN], callback=_fake_explorer(records))
+
+    adapter = MintchainAdapter(CHAIN)
+    transactions = adapter.get_transactions(WALLET_ADDRESS)
+
+    assert isinstance(transactions, list)
+    assert [tx.hash for tx in transactions] == ["0xb1_0", "0xb2_0", "0xb3_0"]
+
+
+def test_adaptive_page_size_shrinks_and_grows_on_whole_pages():
+    from explorer_adapters import AdaptivePageSize
+
+    controller = AdaptivePageSize(100, 10000)
+    assert controller.size == 10000
+
+    with patch("explorer_adapters.SLOW_PAGE_SECONDS", 5), patch("explorer_adapters.FAST_PAGE_SECONDS", 1):
+        controller.record(elapsed=6, rows_fetched=10000)
+        assert controller.size == 5000
+        controller.record(elapsed=6, rows_fetched=15000)
+        assert controller.size == 1000
+
+        # 16000 rows is not a whole number of 5000-row pages: stay put
+        controller.record(elapsed=0.1, rows_fetched=16000)
+        assert controller.size == 1000
+        controller.record(elapsed=0.1, rows_fetched=20000)
+        assert controller.size == 5000
+
+    assert AdaptivePageSize(500, 10000).sizes == [10000, 5000, 1000, 500]
+
+
+def test_iter_pages_shrinks_page_size_after_timeout(mocked_responses):
+    from urllib.parse import parse_qs, urlparse
+    from requests.exceptions import ReadTimeout
+
+    records = {b: [_tx_at(b, 0)] for b in range(1, 13)}
+    serve = _fake_explorer(records)
+    offsets = []
+
+    def callback(request):
+        offset = int(parse_qs(urlparse(request.url).query)["offset"][0])
+        offsets.append(offset)
+        if offset > 5:
+            raise ReadTimeout("page too large")
+        return serve(request)
+
+    mocked_responses.add_callback(responses.GET, EXPLORER_URLS[CHAIN], callback=callback)
+
+    with patch("explorer_adapters.PAGE_SIZE_LADDER", (10, 5)), \
+            patch("explorer_adapters.PAGE_SIZE_BOUNDS", {CHAIN: (5, 10)}), \
+            patch("explorer_adapters.DEFAULT_PAGE_SIZE", 10):
+        adapter = MintchainAdapter(CHAIN)
+        transactions = adapter.get_transactions(WALLET_ADDRESS)
+
+    assert [tx.hash for tx in transactions] == [f"0xb{b}_0" for b in range(1, 13)]
+    # One timed-out 10-row page, then 5-row pages 1..3 with no backoff retries
+    assert offsets == [10, 5, 5, 5]
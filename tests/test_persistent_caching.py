@@ -1,6 +1,7 @@
 import responses
 import pytest
 import os
+from unittest.mock import patch
 from fetch_blockchain_data import fetch_data
 from models import RawTransaction
 from cache_manager import cache_manager
@@ -45,3 +46,232 @@ def test_fetch_data_persistent_caching(tmp_path, monkeypatch):
         
     # Verify the database file exists
     assert os.path.exists(cache_db)
+
+
+def test_cache_hit_rebuilds_validated_records_without_validation(tmp_path, monkeypatch):
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    monkeypatch.setattr(cache_manager, "db_path", os.path.join(tmp_path, "bytes_cache.db"))
+    cache_manager._init_db()
+
+    mock_url = "https://api.test.com/raw"
+    body = b'{"status": "1", "message": "OK", "result": [{"hash": "0x1", "timeStamp": "1704067200", "from": "0xa", "to": "0xb", "value": "1"}]}'
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, mock_url, body=body, status=200, content_type="application/json")
+        fetched = fetch_data(mock_url, RawTransaction)
+
+    # Stored as the dumps of the validated records
+    cached = cache_manager.get_response(mock_url)
+    assert cached["trusted"] is True
+    assert cached["result"][0]["from"] == {"hash": "0xa"}
+
+    with patch.object(RawTransaction, "model_validate", side_effect=AssertionError("validated again")), \
+            patch("fetch_blockchain_data._list_adapter", side_effect=AssertionError("validated again")):
+        hit = fetch_data(mock_url, RawTransaction)
+
+    assert hit == fetched
+    assert hit[0].from_address.hash == "0xa"
+
+
+def test_cache_reads_legacy_text_rows(tmp_path, monkeypatch):
+    import sqlite3
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    monkeypatch.setattr(cache_manager, "db_path", os.path.join(tmp_path, "legacy_cache.db"))
+    cache_manager._init_db()
+    mock_url = "https://api.test.com/legacy"
+    with sqlite3.connect(cache_manager.db_path) as conn:
+        conn.execute(
+            "INSERT INTO api_responses (key, response) VALUES (?, ?)",
+            (cache_manager._get_key(mock_url), '{"status": "1", "result": []}'),
+        )
+
+    assert cache_manager.get_response_bytes(mock_url) == b'{"status": "1", "result": []}'
+    assert cache_manager.get_response(mock_url) == {"status": "1", "result": []}
+
+
+def test_concurrent_writes_are_batched_behind(tmp_path, monkeypatch):
+    import sqlite3
+    from concurrent.futures import ThreadPoolExecutor
+
+    from cache_manager import CacheManager
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    cache = CacheManager(os.path.join(tmp_path, "wal_cache.db"))
+
+    def write(i):
+        cache.set_response(f"https://api.test.com/{i}", {"status": "1", "result": [i]})
+        # Readable right away, before the background commit
+        return cache.get_response(f"https://api.test.com/{i}")
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(write, range(200)))
+    cache.flush()
+
+    assert results == [{"status": "1", "result": [i]} for i in range(200)]
+    stats = cache.stats()
+    assert stats["writes"] == 200 and stats["dropped_writes"] == 0 and stats["pending"] == 0
+    assert stats["batches"] <= 200
+    with sqlite3.connect(cache.db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("SELECT COUNT(*) FROM api_responses").fetchone()[0] == 200
+
+
+def test_writes_within_the_interval_share_a_batch_and_flush_is_immediate(tmp_path, monkeypatch):
+    import time
+
+    from cache_manager import CacheManager
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    cache = CacheManager(os.path.join(tmp_path, "interval_cache.db"), write_interval=5.0)
+
+    for i in range(3):
+        cache.set_response(f"https://api.test.com/{i}", {"status": "1", "result": [i]})
+        time.sleep(0.05)
+    assert cache.stats()["batches"] == 0
+
+    started = time.monotonic()
+    cache.flush()
+
+    assert time.monotonic() - started < 1.0
+    stats = cache.stats()
+    assert stats["writes"] == 3 and stats["batches"] == 1 and stats["pending"] == 0
+
+
+def test_locked_database_write_is_counted_as_dropped(tmp_path, monkeypatch):
+    import sqlite3
+
+    import cache_manager as cache_module
+    from cache_manager import CacheManager
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    monkeypatch.setattr(cache_module, "CACHE_BUSY_TIMEOUT", 0.01)
+    monkeypatch.setattr(cache_module, "CACHE_WRITE_RETRIES", 2)
+    cache = CacheManager(os.path.join(tmp_path, "locked_cache.db"))
+
+    blocker = sqlite3.connect(cache.db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        cache.set_response("https://api.test.com/locked", b'{"status": "1", "result": []}')
+        cache.flush()
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+    stats = cache.stats()
+    assert stats["dropped_writes"] == 1
+    assert stats["lock_contention"] == 2
+    assert cache.get_response_bytes("https://api.test.com/locked") is None
+
+
+def test_ttl_by_endpoint_class():
+    from cache_manager import ttl_for
+    from config import CACHE_TTL_BLOCK_LOOKUP, CACHE_TTL_OPEN_ENDED
+
+    base = "https://api.test.com/api?module=account&action=txlist&address=0xa"
+    assert ttl_for(f"{base}&startblock=0&endblock=5000&page=1") is None
+    assert ttl_for(f"{base}&startblock=0&endblock=99999999&page=1") == CACHE_TTL_OPEN_ENDED
+    assert ttl_for(f"{base}&page=1") == CACHE_TTL_OPEN_ENDED
+    assert ttl_for("https://api.test.com/api?module=block&action=getblocknobytime&timestamp=1") == CACHE_TTL_BLOCK_LOOKUP
+
+
+def test_expired_entries_are_misses_and_pruned(tmp_path, monkeypatch):
+    from cache_manager import CacheManager
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    cache = CacheManager(os.path.join(tmp_path, "ttl_cache.db"))
+    cache.set_response("https://api.test.com/old", b"{}", ttl=-10)
+    cache.set_response("https://api.test.com/forever", b"[]", ttl=None)
+    cache.flush()
+
+    assert cache.get_response_bytes("https://api.test.com/old") is None
+    assert cache.get_response_bytes("https://api.test.com/forever") == b"[]"
+    assert cache.prune()["expired"] == 1
+
+    report = cache.report()
+    assert report["entries"] == 1
+    assert (report["hits"], report["misses"]) == (1, 1)
+    assert report["hit_ratio"] == 0.5
+    assert report["age"]["<1h"] == 1
+
+
+def test_size_cap_evicts_least_recently_read(tmp_path, monkeypatch):
+    import time
+
+    from cache_manager import CacheManager
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    cache = CacheManager(os.path.join(tmp_path, "lru_cache.db"), max_bytes=250)
+    # Random bytes do not compress, so each entry takes about 100 bytes
+    for i in range(2):
+        cache.set_response(f"https://api.test.com/{i}", os.urandom(100), ttl=None)
+    cache.flush()
+    time.sleep(0.01)
+    # Reading entry 0 makes entry 1 the least recently used
+    assert cache.get_response_bytes("https://api.test.com/0") is not None
+    cache.flush()
+
+    cache.set_response("https://api.test.com/2", os.urandom(100), ttl=None)
+    cache.flush()
+
+    assert cache.stats()["evicted"] == 1
+    assert cache.get_response_bytes("https://api.test.com/1") is None
+    assert cache.get_response_bytes("https://api.test.com/0") is not None
+    assert cache.get_response_bytes("https://api.test.com/2") is not None
+
+
+def test_payloads_are_compressed_and_legacy_rows_still_read(tmp_path, monkeypatch):
+    import sqlite3
+
+    import compression
+    from cache_manager import CacheManager
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    cache = CacheManager(os.path.join(tmp_path, "compressed_cache.db"), codec="zlib")
+    body = b'{"status":"1","result":[' + b",".join(
+        b'{"hash":"0x%064x","from":"0x1234567890123456789012345678901234567890"}' % i for i in range(200)
+    ) + b"]}"
+    cache.set_response("https://api.test.com/page", body, ttl=None)
+    cache.flush()
+    with sqlite3.connect(cache.db_path) as conn:
+        conn.execute(
+            "INSERT INTO api_responses (key, response) VALUES (?, ?)",
+            (cache._get_key("https://api.test.com/legacy"), '{"status": "1", "result": []}'),
+        )
+        stored, fmt, size = conn.execute(
+            "SELECT response, format, size FROM api_responses WHERE key = ?", (cache._get_key("https://api.test.com/page"),)
+        ).fetchone()
+
+    assert fmt == compression.ZLIB
+    assert size == len(stored) < len(body) / 4
+    assert cache.get_response_bytes("https://api.test.com/page") == body
+    assert cache.get_response("https://api.test.com/legacy") == {"status": "1", "result": []}
+
+
+def test_urls_differing_only_by_api_key_share_a_cache_entry(tmp_path, monkeypatch):
+    from cache_manager import CacheManager, endpoint_identity
+
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    cache = CacheManager(os.path.join(tmp_path, "keys_cache.db"))
+    base = "https://api.test.com/api?module=account&action=txlist&address=0xa&startblock=0&endblock=5000"
+    assert endpoint_identity(f"{base}&apikey=KEY1") == endpoint_identity(f"{base}&apikey=KEY2")
+    assert endpoint_identity(base) == base
+
+    cache.set_response(f"{base}&apikey=KEY1", b'{"status": "1"}')
+    cache.flush()
+    assert cache.get_response_bytes(f"{base}&apikey=KEY2") == b'{"status": "1"}'
+    assert cache.get_response_bytes(base) == b'{"status": "1"}'
+
+
+def test_fetch_data_reuses_pages_fetched_with_another_api_key(tmp_path, monkeypatch):
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    monkeypatch.setattr(cache_manager, "db_path", os.path.join(tmp_path, "pooled_cache.db"))
+    cache_manager._init_db()
+
+    base = "https://api.test.com/api?module=account&action=txlist&address=0xa&startblock=0&endblock=5000"
+    body = {"status": "1", "message": "OK", "result": [{"hash": "0x1", "timeStamp": "1704067200", "from": "0xa", "to": "0xb", "value": "1"}]}
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://api.test.com/api", json=body, status=200)
+        assert len(fetch_data(f"{base}&apikey=KEY1", RawTransaction)) == 1
+        assert len(fetch_data(f"{base}&apikey=KEY2", RawTransaction)) == 1
+        assert len(rsps.calls) == 1
@@ -37,7 +37,14 @@ def test_get_native_token_price(mocked_responses):
     assert price_cached == Decimal("1200.5")
     assert len(mocked_responses.calls) == 1
 
-def test_get_erc20_token_price(mocked_responses):
+@pytest.fixture
+def fresh_coin_index(tmp_path, monkeypatch):
+    from coin_index import CoinIndex
+    index = CoinIndex(str(tmp_path / "coins.db"))
+    monkeypatch.setattr("price_service.coin_index", index)
+    return index
+
+def test_get_erc20_token_price(mocked_responses, fresh_coin_index):
     _price_cache.clear()
     chain = "polygon"
     platform_id = "polygon-pos"
@@ -46,11 +53,11 @@ def test_get_erc20_token_price(mocked_responses):
     date_str = "01-01-2023"
     coin_id = "usd-coin"
 
-    # Mock coin ID lookup
+    # Mock the coin list that resolves contracts to coin IDs
     mocked_responses.add(
         responses.GET,
-        f"https://api.coingecko.com/api/v3/coins/{platform_id}/contract/{contract_address}",
-        json={"id": coin_id},
+        "https://api.coingecko.com/api/v3/coins/list?include_platform=true",
+        json=[{"id": coin_id, "symbol": "usdc", "name": "USDC", "platforms": {platform_id: contract_address.upper()}}],
         status=200
     )
 
@@ -192,3 +199,204 @@ def test_get_token_price_defillama_source(mocked_responses):
     price = get_token_price(chain, timestamp, symbol=symbol, source="defillama")
     assert price == Decimal("1200.5")
     assert len(mocked_responses.calls) == 1
+
+@pytest.fixture
+def persistent_prices(tmp_path, monkeypatch):
+    from price_store import PriceStore
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    store = PriceStore(str(tmp_path / "prices.db"))
+    monkeypatch.setattr("price_service.price_store", store)
+    return store
+
+def test_prices_persist_across_runs(persistent_prices, mocked_responses):
+    _price_cache.clear()
+    url = "https://api.coingecko.com/api/v3/coins/ethereum/history?date=01-01-2023&localization=false"
+    mocked_responses.add(responses.GET, url, json={"market_data": {"current_price": {"usd": 1200.50}}}, status=200)
+
+    assert get_token_price("ethereum", 1672531200) == Decimal("1200.5")
+    # A new run starts with an empty in-process cache; any time of the same day hits the store
+    _price_cache.clear()
+    assert get_token_price("ethereum", 1672531200 + 3600) == Decimal("1200.5")
+    assert len(mocked_responses.calls) == 1
+    assert persistent_prices.get(("coingecko", "ethereum", "day", 1672531200)) == (True, Decimal("1200.5"))
+
+def test_negative_prices_expire(persistent_prices):
+    import time
+    from price_store import PRICE_NEGATIVE_TTL
+    key = ("defillama", "ethereum:0x0", "exact", 1672531200)
+    persistent_prices.set(key, None)
+    assert persistent_prices.get(key) == (True, None)
+
+    with patch("price_store.time.time", return_value=time.time() + PRICE_NEGATIVE_TTL + 1):
+        assert persistent_prices.get(key) == (False, None)
+
+def test_failed_lookups_are_not_persisted(persistent_prices, mocked_responses):
+    _price_cache.clear()
+    url = "https://api.coingecko.com/api/v3/coins/ethereum/history?date=01-01-2023&localization=false"
+    mocked_responses.add(responses.GET, url, status=500)
+
+    assert get_token_price("ethereum", 1672531200) is None
+    assert persistent_prices.get(("coingecko", "ethereum", "day", 1672531200)) == (False, None)
+
+def test_defillama_batch_resolution(mocked_responses, monkeypatch):
+    import json
+    from urllib.parse import parse_qs, urlparse
+    from price_service import resolve_prices
+
+    _price_cache.clear()
+    monkeypatch.setattr("price_service.DEFILLAMA_BATCH_SIZE", 3)
+    usdc = "polygon-pos:0x2791bca1f2de4661ed88a30c99a7a9449aa84174"
+    matic = "polygon:0x0000000000000000000000000000000000000000"
+    requested = []
+
+    def callback(request):
+        coins = json.loads(parse_qs(urlparse(request.url).query)["coins"][0])
+        requested.append(coins)
+        body = {"coins": {
+            token_id: {"prices": [{"timestamp": ts + 60, "price": 1.5, "confidence": 0.99} for ts in timestamps
+                                  if token_id == matic or ts != 1672617600]}
+            for token_id, timestamps in coins.items()
+        }}
+        return (200, {}, json.dumps(body))
+
+    mocked_responses.add_callback(responses.GET, "https://coins.llama.fi/batchHistorical", callback=callback)
+
+    needed = [
+        ("polygon", 1672531200, "0x2791bca1f2de4661ed88a30c99a7a9449aa84174", "USDC"),
+        ("polygon", 1672617600, "0x2791bca1f2de4661ed88a30c99a7a9449aa84174", "USDC"),
+        ("polygon", 1672531200, None, "MATIC"),
+        ("polygon", 1672531200, None, "MATIC"),
+        ("polygon", 1672704000, None, "MATIC"),
+    ]
+    resolve_prices(needed, source="defillama")
+
+    # Four distinct (coin, timestamp) pairs in batches of three
+    assert len(mocked_responses.calls) == 2
+    assert sum(len(timestamps) for coins in requested for timestamps in coins.values()) == 4
+    assert get_token_price("polygon", 1672704000, symbol="MATIC", source="defillama") == Decimal("1.5")
+    assert get_token_price("polygon", 1672531200, "0x2791bca1f2de4661ed88a30c99a7a9449aa84174", "USDC", "defillama") == Decimal("1.5")
+    # No point near the timestamp: a cached "no price"
+    assert get_token_price("polygon", 1672617600, "0x2791bca1f2de4661ed88a30c99a7a9449aa84174", "USDC", "defillama") is None
+    assert len(mocked_responses.calls) == 2
+
+def test_coingecko_range_mode_fetches_once_per_year(mocked_responses, monkeypatch):
+    import price_service
+    _price_cache.clear()
+    price_service._series.clear()
+    monkeypatch.setenv("COINGECKO_PRICE_MODE", "range")
+    day = 86400
+    start_2023 = 1672531200
+    mocked_responses.add(
+        responses.GET,
+        "https://api.coingecko.com/api/v3/coins/ethereum/market_chart/range",
+        json={"prices": [[(start_2023 + i * day) * 1000, 1000 + i] for i in range(365)]},
+        status=200,
+        match_querystring=False,
+    )
+
+    assert get_token_price("ethereum", start_2023 + 3600) == Decimal("1000")
+    assert get_token_price("ethereum", start_2023 + 40 * day + 7200) == Decimal("1040")
+    assert get_token_price("ethereum", start_2023 + 364 * day) == Decimal("1364")
+    assert len(mocked_responses.calls) == 1
+    query = mocked_responses.calls[0].request.url
+    assert f"from={start_2023}" in query and f"to={start_2023 + 365 * day - 1}" in query
+
+def test_price_series_lookup_by_bucket():
+    from price_series import PriceSeries
+    series = PriceSeries()
+    series.add(0, 10 * 3600, [(3600 * 2 + 30, Decimal("2")), (0, Decimal("0")), (3600 * 5 - 60, Decimal("5"))])
+
+    assert series.covers(3600) and not series.covers(11 * 3600)
+    assert series.lookup(3600 * 2 + 1800, "hour") == Decimal("2")
+    assert series.lookup(3600 * 5 + 10, "hour") == Decimal("5")
+    # No point within an hour of the bucket start
+    assert series.lookup(3600 * 8, "hour") is None
+    assert series.lookup(5000, "day") == Decimal("0")
+
+def test_coin_list_is_downloaded_once_and_persisted(mocked_responses, tmp_path, monkeypatch):
+    from coin_index import CoinIndex
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    mocked_responses.add(
+        responses.GET,
+        "https://api.coingecko.com/api/v3/coins/list?include_platform=true",
+        json=[
+            {"id": "usd-coin", "symbol": "usdc", "name": "USDC", "platforms": {"ethereum": "0xA0b8", "base": "0x8335"}},
+            {"id": "bridged-usdc", "symbol": "USDC", "name": "Bridged USDC", "platforms": {"": ""}},
+        ],
+        status=200
+    )
+    index = CoinIndex(str(tmp_path / "coins.db"))
+
+    assert index.coin_id_for_contract("ethereum", "0xa0b8") == "usd-coin"
+    assert index.coin_id_for_contract("base", "0x8335") == "usd-coin"
+    assert index.coin_id_for_contract("ethereum", "0xdead") is None
+    assert index.candidates_for_symbol("USDC") == ["usd-coin", "bridged-usdc"]
+    assert len(mocked_responses.calls) == 1
+
+    # Another process reads the stored copy
+    assert CoinIndex(str(tmp_path / "coins.db")).coin_id_for_contract("base", "0x8335") == "usd-coin"
+    assert len(mocked_responses.calls) == 1
+
+def test_stale_coin_list_is_used_when_refresh_fails(mocked_responses, tmp_path, monkeypatch):
+    from coin_index import CoinIndex
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    url = "https://api.coingecko.com/api/v3/coins/list?include_platform=true"
+    mocked_responses.add(responses.GET, url, json=[{"id": "weth", "symbol": "weth", "platforms": {"ethereum": "0xc02a"}}])
+    CoinIndex(str(tmp_path / "coins.db")).coin_id_for_contract("ethereum", "0xc02a")
+    mocked_responses.add(responses.GET, url, status=500)
+
+    stale = CoinIndex(str(tmp_path / "coins.db"), ttl=0)
+    assert stale.coin_id_for_contract("ethereum", "0xc02a") == "weth"
+    assert len(mocked_responses.calls) == 2
+
+def test_failed_coin_list_download_is_not_retried_until_backoff_expires(mocked_responses, tmp_path):
+    from coin_index import CoinIndex, CoinIndexUnavailable
+    url = "https://api.coingecko.com/api/v3/coins/list?include_platform=true"
+    mocked_responses.add(responses.GET, url, status=500)
+    index = CoinIndex(str(tmp_path / "coins.db"), retry_after=600)
+
+    for _ in range(3):
+        with pytest.raises(CoinIndexUnavailable):
+            index.coin_id_for_contract("ethereum", "0xc02a")
+    assert len(mocked_responses.calls) == 1
+
+    # Once the backoff has passed, the next lookup downloads again
+    mocked_responses.replace(responses.GET, url, json=[{"id": "weth", "symbol": "weth", "platforms": {"ethereum": "0xc02a"}}])
+    index._unavailable = (0, "expired")
+    assert index.coin_id_for_contract("ethereum", "0xc02a") == "weth"
+    assert len(mocked_responses.calls) == 2
+
+def test_nft_rows_with_a_coin_symbol_stay_unpriced(mocked_responses, fresh_coin_index):
+    from extract_transaction_data import extract_transaction_data
+    from models import Raw1155Transfer, RawNFTTransfer
+
+    _price_cache.clear()
+    mocked_responses.assert_all_requests_are_fired = False
+    wallet = "0x0000000000000000000000000000000000000001"
+    # The collection's symbol is also the symbol of exactly one unrelated coin
+    mocked_responses.add(
+        responses.GET,
+        "https://api.coingecko.com/api/v3/coins/list?include_platform=true",
+        json=[{"id": "punk-coin", "symbol": "punk", "name": "Punk Coin", "platforms": {}}],
+        status=200
+    )
+    mocked_responses.add(
+        responses.GET,
+        "https://api.coingecko.com/api/v3/coins/punk-coin/history?date=01-01-2023&localization=false",
+        json={"market_data": {"current_price": {"usd": 3.5}}},
+        status=200
+    )
+    rows = [
+        RawNFTTransfer.model_validate({
+            "hash": "0xnft", "timeStamp": "1672531200", "from": {"hash": wallet}, "to": {"hash": "0x2"},
+            "tokenID": "7", "tokenName": "Punks", "tokenSymbol": "PUNK",
+        }),
+        Raw1155Transfer.model_validate({
+            "hash": "0x1155", "timeStamp": "1672531200", "from": {"hash": "0x2"}, "to": {"hash": wallet},
+            "tokenID": "7", "tokenValue": "3", "tokenName": "Punks", "tokenSymbol": "PUNK",
+        }),
+    ]
+    extracted = extract_transaction_data(rows, "nft_transfer", wallet, "ethereum")
+
+    assert [row.net_worth_amount for row in extracted] == ["", ""]
+    assert len(mocked_responses.calls) == 0
@@ -1,7 +1,10 @@
+from unittest.mock import patch
+
 import responses
 import pytest
 from requests.exceptions import RequestException
 from fetch_blockchain_data import fetch_data
+from rate_limiter import RateLimiter, rate_limit_key
 from models import RawTransaction
 
 @responses.activate
@@ -42,3 +45,84 @@ def test_fetch_data_429_retry_after():
     data = fetch_data(mock_url, RawTransaction)
     assert data == []
     assert len(responses.calls) > 1
+
+
+def _run_in_thread(func):
+    import threading
+    thread = threading.Thread(target=func)
+    thread.start()
+    thread.join()
+
+
+@patch("rate_limiter.time.sleep")
+def test_rate_limiter_enforces_rate_after_burst(mock_sleep):
+    limiter = RateLimiter(requests_per_second=10, burst=2)
+    url = "https://api.test.com/api?module=account&apikey=k1"
+
+    for _ in range(4):
+        limiter.acquire(url)
+
+    # Two requests fit in the burst, the next two wait for refilled tokens
+    assert mock_sleep.call_count == 2
+    waits = [c.args[0] for c in mock_sleep.call_args_list]
+    assert waits[0] == pytest.approx(0.1, abs=0.02)
+    assert waits[1] == pytest.approx(0.2, abs=0.02)
+
+
+@patch("rate_limiter.time.sleep")
+def test_rate_limiter_keys_by_chain_and_api_key(mock_sleep):
+    limiter = RateLimiter(requests_per_second=1, burst=1)
+
+    limiter.acquire("https://api.test.com/api?apikey=k1")
+    limiter.acquire("https://api.test.com/api?apikey=k2")
+    limiter.acquire("https://api.other.com/api?apikey=k1")
+
+    mock_sleep.assert_not_called()
+    assert rate_limit_key("https://api.test.com/api?page=1&apikey=k1") == rate_limit_key(
+        "https://api.test.com/api?page=2&apikey=k1"
+    )
+
+
+@patch("rate_limiter.time.sleep")
+def test_rate_limiter_429_pauses_all_other_workers(mock_sleep):
+    limiter = RateLimiter(requests_per_second=100, burst=100)
+    url = "https://api.test.com/api?apikey=k1"
+
+    # The worker that received the 429 waits it out through its retry backoff
+    def worker_with_429():
+        limiter.observe_response(url, 429, {"Retry-After": "30"})
+        limiter.acquire(url)
+
+    _run_in_thread(worker_with_429)
+    mock_sleep.assert_not_called()
+
+    # Every other worker is held back by the shared pause
+    limiter.acquire(url)
+    assert mock_sleep.call_count == 1
+    assert mock_sleep.call_args.args[0] == pytest.approx(30, abs=1)
+
+
+@patch("rate_limiter.time.sleep")
+def test_rate_limiter_honors_exhausted_rate_limit_headers(mock_sleep):
+    limiter = RateLimiter(requests_per_second=100, burst=100)
+    url = "https://api.test.com/api?apikey=k1"
+
+    limiter.observe_response(url, 200, {"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "20"})
+    limiter.acquire(url)
+    mock_sleep.assert_not_called()
+
+    limiter.observe_response(url, 200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "20"})
+    limiter.acquire(url)
+    assert mock_sleep.call_args.args[0] == pytest.approx(20, abs=1)
+
+
+@responses.activate
+@patch("fetch_blockchain_data.rate_limiter")
+def test_fetch_data_acquires_rate_limiter(mock_limiter):
+    mock_url = "https://api.test.com/ok"
+    responses.add(responses.GET, mock_url, json={"status": "1", "message": "OK", "result": []}, status=200)
+
+    fetch_data(mock_url, RawTransaction)
+
+    mock_limiter.acquire.assert_called_once_with(mock_url)
+    mock_limiter.observe_response.assert_called_once()
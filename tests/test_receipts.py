@@ -0,0 +1,123 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from extract_transaction_data import extract_transaction_data
+from models import RawTransaction
+from receipts import ReceiptStore, enrich_with_receipts, fetch_receipts
+from rpc_adapter import JsonRpcClient
+
+NODE_URL = "http://localhost:8545"
+WALLET = "0x1234567890123456789012345678901234567890"
+OTHER = "0x00000000000000000000000000000000000000aa"
+
+
+def _tx(tx_hash: str, sender: str, recipient: str) -> RawTransaction:
+    return RawTransaction.model_validate(
+        {
+            "hash": tx_hash,
+            "timeStamp": "1704067200",
+            "from": sender,
+            "to": recipient,
+            "value": "0",
+            # Explorers on some chains report the gas limit here
+            "gas": "100000",
+            "gasPrice": "2000",
+        }
+    )
+
+
+@pytest.fixture
+def node():
+    batches = []
+
+    def handle(request):
+        batch = json.loads(request.body)
+        batches.append(batch)
+        replies = []
+        for item in batch:
+            tx_hash = item["params"][0]
+            if tx_hash == "0xreject":
+                # The node rejects the whole batch
+                return 200, {}, json.dumps({"jsonrpc": "2.0", "id": None, "error": {"code": -32005, "message": "limit"}})
+            if tx_hash == "0xmissing":
+                replies.append({"jsonrpc": "2.0", "id": item["id"], "result": None})
+                continue
+            receipt = {"transactionHash": tx_hash, "gasUsed": hex(21000), "effectiveGasPrice": hex(1500), "l1Fee": hex(7)}
+            replies.append({"jsonrpc": "2.0", "id": item["id"], "result": receipt})
+        return 200, {}, json.dumps(replies)
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(responses.POST, NODE_URL, callback=handle, content_type="application/json")
+        yield batches
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("DISABLE_CACHE", "false")
+    return ReceiptStore(str(tmp_path / "receipts.db"))
+
+
+def test_fetch_receipts_in_batches(node):
+    receipts = fetch_receipts(JsonRpcClient(NODE_URL), [f"0x{i}" for i in range(5)] + ["0xmissing"], batch_size=2)
+
+    assert len(node) == 3
+    assert all(len(batch) == 2 for batch in node)
+    assert receipts["0x0"] == {"gasUsed": "21000", "effectiveGasPrice": "1500", "l1Fee": "7"}
+    assert "0xmissing" not in receipts
+
+
+def test_enrich_outgoing_transactions_and_cache_receipts(node, store):
+    transactions = [_tx("0xout", WALLET, OTHER), _tx("0xin", OTHER, WALLET)]
+
+    enriched = enrich_with_receipts(transactions, WALLET, "optimism", rpc_url=NODE_URL, store=store)
+
+    assert (enriched[0].gasUsed, enriched[0].effectiveGasPrice, enriched[0].l1Fee) == ("21000", "1500", "7")
+    # Incoming transactions were paid for by someone else
+    assert enriched[1] == transactions[1]
+    assert [item["params"][0] for batch in node for item in batch] == ["0xout"]
+
+    # Receipts are immutable: the second run is served from the store
+    again = enrich_with_receipts(transactions, WALLET, "optimism", rpc_url=NODE_URL, store=store)
+    assert again[0].gasUsed == "21000"
+    assert len(node) == 1
+
+
+def test_fee_uses_receipt_gas_and_l1_fee(node, store):
+    enriched = enrich_with_receipts([_tx("0xout", WALLET, OTHER)], WALLET, "optimism", rpc_url=NODE_URL, store=store)
+
+    with patch("extract_transaction_data.get_token_price", return_value=None):
+        before = extract_transaction_data([_tx("0xout", WALLET, OTHER)], "transaction", WALLET, "optimism")
+        after = extract_transaction_data(enriched, "transaction", WALLET, "optimism")
+
+    assert before[0].fee_amount == "0.0000000002"
+    # 21000 * 1500 + 7 wei
+    assert after[0].fee_amount == "0.000000000031500007"
+
+
+def test_failed_batch_keeps_the_other_batches_receipts(node, store):
+    receipts = fetch_receipts(JsonRpcClient(NODE_URL), ["0xa", "0xb", "0xreject", "0xc"], batch_size=2)
+    assert set(receipts) == {"0xa", "0xb"}
+
+    transactions = [_tx(tx_hash, WALLET, OTHER) for tx_hash in ("0xa", "0xb", "0xreject", "0xc")]
+    in_pairs = lambda client, tx_hashes: fetch_receipts(client, tx_hashes, batch_size=2)
+    with patch("receipts.fetch_receipts", side_effect=in_pairs):
+        enriched = enrich_with_receipts(transactions, WALLET, "optimism", rpc_url=NODE_URL, store=store)
+
+    # The failed batch keeps the explorer's values
+    assert [trx.gasUsed for trx in enriched] == ["21000", "21000", "100000", "100000"]
+    # The successful batch was cached; only the failed one is asked for again
+    assert set(store.get_many("optimism", ["0xa", "0xb", "0xreject", "0xc"])) == {"0xa", "0xb"}
+
+
+def test_receipt_node_ignores_explorer_rpc_url(monkeypatch):
+    from config import RPC_NODE_URLS
+    from receipts import receipt_node_url
+
+    monkeypatch.setenv("RPC_URL_OPTIMISM", "https://api-optimistic.etherscan.io/api")
+    assert receipt_node_url("optimism") == RPC_NODE_URLS["optimism"]
+    monkeypatch.setenv("RECEIPT_NODE_URL_OPTIMISM", NODE_URL)
+    assert receipt_node_url("optimism") == NODE_URL
+    assert receipt_node_url("optimism", "http://rpc-backend:8545") == "http://rpc-backend:8545"
@@ -0,0 +1,210 @@
+import json
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import responses
+
+from config import EXPLORER_URLS
+from explorer_adapters import MintchainAdapter
+from models import RawTokenTransfer, RawTransaction
+from record_store import RecordStore
+
+WALLET_ADDRESS = "0x1234567890123456789012345678901234567890"
+CHAIN = "mintchain"
+
+
+@pytest.fixture
+def mocked_responses():
+    with responses.RequestsMock() as rsps:
+        yield rsps
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RecordStore(str(tmp_path / "records.db"))
+
+
+@pytest.fixture
+def all_final(monkeypatch):
+    monkeypatch.setattr("record_store.finalized_block", lambda chain, records=(): 10 ** 6)
+
+
+def _tx(block, i=0, timestamp=None):
+    return RawTransaction.model_validate(
+        {
+            "hash": f"0xb{block}_{i}",
+            "blockNumber": str(block),
+            "from": {"hash": "0x123"},
+            "to": {"hash": WALLET_ADDRESS},
+            "value": "1",
+            "timeStamp": str(timestamp or 1672531200 + block),
+            "gasUsed": "21000",
+            "gasPrice": "1",
+        }
+    )
+
+
+def test_missing_intervals_skip_covered_ranges(store, all_final):
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 100, 199, [_tx(150)])
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 300, 399, [])
+
+    assert store.missing(CHAIN, WALLET_ADDRESS, "transactions", 0, 500) == [(0, 99), (200, 299), (400, 500)]
+    assert store.missing(CHAIN, WALLET_ADDRESS, "transactions", 120, 180) == []
+    assert store.missing(CHAIN, WALLET_ADDRESS.upper(), "transactions", 150, 350) == [(200, 299)]
+    assert store.missing(CHAIN, WALLET_ADDRESS, "token_transfers", 150, 160) == [(150, 160)]
+
+
+def test_adjacent_ranges_merge(store, all_final):
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 0, 99, [])
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 200, 299, [])
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 100, 199, [])
+
+    assert store.coverage(CHAIN, WALLET_ADDRESS, "transactions") == [(0, 299)]
+
+
+def test_load_returns_range_in_block_order(store):
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 200, 299, [_tx(250, 0), _tx(250, 1)])
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 0, 199, [_tx(10), _tx(150)])
+
+    loaded = store.load(CHAIN, WALLET_ADDRESS, "transactions", 100, 299, RawTransaction)
+
+    assert [record.hash for record in loaded] == ["0xb150_0", "0xb250_0", "0xb250_1"]
+
+
+def test_log_records_keep_one_row_per_log_index(store):
+    transfer = {
+        "hash": "0xabc",
+        "blockNumber": "10",
+        "logIndex": "3",
+        "timeStamp": "1",
+        "from": "0x1",
+        "to": "0x2",
+        "total": {"value": "5"},
+        "token": {"symbol": "TOK"},
+        "tokenDecimal": "18",
+        "contractAddress": "0xtok",
+    }
+    records = [
+        RawTokenTransfer.model_validate(transfer),
+        RawTokenTransfer.model_validate(transfer),
+        RawTokenTransfer.model_validate({**transfer, "logIndex": "4"}),
+    ]
+    store.save(CHAIN, WALLET_ADDRESS, "token_transfers", 0, 20, records)
+
+    assert len(store.load(CHAIN, WALLET_ADDRESS, "token_transfers", 0, 20, RawTokenTransfer)) == 2
+
+
+def test_coverage_stops_at_finalized_head(store):
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 0, 99999999, [_tx(100), _tx(120, timestamp=int(time.time()))])
+
+    assert store.coverage(CHAIN, WALLET_ADDRESS, "transactions") == [(0, 100)]
+    assert len(store.load(CHAIN, WALLET_ADDRESS, "transactions", 0, 99999999, RawTransaction)) == 2
+    # An empty open-ended fetch proves nothing about the tip
+    store.save(CHAIN, WALLET_ADDRESS, "internal_transactions", 0, 99999999, [])
+    assert store.coverage(CHAIN, WALLET_ADDRESS, "internal_transactions") == []
+
+
+def test_incomplete_fetch_is_stored_but_not_covered(store, all_final):
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 0, 99, [_tx(50)], complete=False)
+
+    assert store.missing(CHAIN, WALLET_ADDRESS, "transactions", 0, 99) == [(0, 99)]
+    assert len(store.load(CHAIN, WALLET_ADDRESS, "transactions", 0, 99, RawTransaction)) == 1
+
+
+
+def test_incomplete_fetch_keeps_stored_records(store, all_final):
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 0, 99, [_tx(50), _tx(60)])
+
+    store.save(CHAIN, WALLET_ADDRESS, "transactions", 0, 99, [_tx(60)], complete=False)
+
+    assert [r.hash for r in store.load(CHAIN, WALLET_ADDRESS, "transactions", 0, 99, RawTransaction)] == [
+        "0xb50_0", "0xb60_0"
+    ]
+
+
+def test_records_without_a_block_are_not_duplicated_across_ranges(store, all_final):
+    unplaced = _tx(0, 7)
+    unplaced.blockNumber = None
+
+    store.save(CHAIN, WALLET_ADDRESS, "internal_transactions", 0, 99, [unplaced])
+    store.save(CHAIN, WALLET_ADDRESS, "internal_transactions", 100, 199, [unplaced])
+
+    assert len(store.load(CHAIN, WALLET_ADDRESS, "internal_transactions", 0, 199, RawTransaction)) == 1
+
+def _fake_explorer(blocks, calls):
+    """Serves txlist queries for one transaction per block, recording each (startblock, endblock)."""
+
+    def callback(request):
+        query = {k: v[0] for k, v in parse_qs(urlparse(request.url).query).items()}
+        start, end = int(query["startblock"]), int(query["endblock"])
+        calls.append((start, end))
+        rows = [_tx(block).model_dump(by_alias=True) for block in blocks if start <= block <= end]
+        if not rows:
+            return (200, {}, json.dumps({"status": "0", "message": "No transactions found", "result": []}))
+        return (200, {}, json.dumps({"status": "1", "message": "OK", "result": rows}))
+
+    return callback
+
+
+def test_adapter_fetches_only_missing_blocks(store, all_final, monkeypatch, mocked_responses):
+    monkeypatch.setattr(store, "enabled", lambda: True)
+    monkeypatch.setattr("explorer_adapters.record_store", store)
+    calls = []
+    mocked_responses.add_callback(
+        responses.GET, EXPLORER_URLS[CHAIN], callback=_fake_explorer([10, 150, 250, 350], calls)
+    )
+    adapter = MintchainAdapter(CHAIN)
+
+    first = adapter.get_transactions(WALLET_ADDRESS, 100, 299)
+    second = adapter.get_transactions(WALLET_ADDRESS, 0, 399)
+
+    assert [record.hash for record in first] == ["0xb150_0", "0xb250_0"]
+    assert [record.hash for record in second] == ["0xb10_0", "0xb150_0", "0xb250_0", "0xb350_0"]
+    assert calls == [(100, 299), (0, 99), (300, 399)]
+
+    # Fully covered: answered without a request
+    assert len(adapter.get_transactions(WALLET_ADDRESS, 50, 350)) == 3
+    assert len(calls) == 3
+
+
+def test_adapter_refetches_after_failure(store, all_final, monkeypatch, mocked_responses):
+    monkeypatch.setattr(store, "enabled", lambda: True)
+    monkeypatch.setattr("explorer_adapters.record_store", store)
+    mocked_responses.add(
+        responses.GET,
+        EXPLORER_URLS[CHAIN],
+        json={"status": "0", "message": "NOTOK", "result": "Query Timeout occured"},
+    )
+
+    assert MintchainAdapter(CHAIN).get_transactions(WALLET_ADDRESS, 0, 99) == []
+    assert store.missing(CHAIN, WALLET_ADDRESS, "transactions", 0, 99) == [(0, 99)]
+
+
+def test_async_adapter_uses_the_store_off_the_event_loop(store, all_final, monkeypatch, mocked_responses):
+    import asyncio
+    import threading
+
+    from explorer_adapters import AsyncExplorerAdapter
+    from fetch_blockchain_data import HostConcurrencyLimiter
+
+    monkeypatch.setattr(store, "enabled", lambda: True)
+    monkeypatch.setattr("explorer_adapters.record_store", store)
+    mocked_responses.add_callback(responses.GET, EXPLORER_URLS[CHAIN], callback=_fake_explorer([150], []))
+    store_threads = []
+    for name in ("missing", "save", "load"):
+        method = getattr(store, name)
+
+        def spy(*args, _method=method, **kwargs):
+            store_threads.append(threading.current_thread())
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(store, name, spy)
+
+    async def run():
+        adapter = AsyncExplorerAdapter(MintchainAdapter(CHAIN), HostConcurrencyLimiter())
+        return await adapter.get_transactions(WALLET_ADDRESS, 100, 199)
+
+    assert [record.hash for record in asyncio.run(run())] == ["0xb150_0"]
+    assert len(store_threads) == 3
+    assert threading.main_thread() not in store_threads
@@ -0,0 +1,229 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from main import process_transactions
+from rpc_adapter import (
+    TRANSFER_BATCH_TOPIC,
+    TRANSFER_SINGLE_TOPIC,
+    TRANSFER_TOPIC,
+    NativeScanTooWide,
+    RpcAdapter,
+    _address_topic,
+)
+
+NODE_URL = "http://localhost:8545"
+CHAIN = "mintchain"
+WALLET = "0x1234567890123456789012345678901234567890"
+OTHER = "0x00000000000000000000000000000000000000aa"
+TOKEN = "0x00000000000000000000000000000000000000c1"
+NFT = "0x00000000000000000000000000000000000000c2"
+MULTI = "0x00000000000000000000000000000000000000c3"
+
+
+def _word(value: int) -> str:
+    return hex(value)[2:].rjust(64, "0")
+
+
+def _abi_string(value: str) -> str:
+    data = value.encode().hex()
+    return "0x" + _word(32) + _word(len(value)) + data.ljust(64, "0")
+
+
+class FakeNode:
+    """Local stand-in for a JSON-RPC node, served through `responses`."""
+
+    def __init__(self, head: int = 1000, max_log_results: int = 1000):
+        self.head = head
+        self.max_log_results = max_log_results
+        self.logs = []
+        self.transactions = {}
+        self.calls = []
+        self.tokens = {
+            TOKEN: {"0x06fdde03": "Test Token", "0x95d89b41": "TST", "0x313ce567": 6},
+            NFT: {"0x06fdde03": "Test NFT", "0x95d89b41": "TNFT"},
+            MULTI: {"0x06fdde03": "Multi", "0x95d89b41": "MLT"},
+        }
+
+    @staticmethod
+    def timestamp(block: int) -> int:
+        return 1700000000 + block * 2
+
+    def add_log(self, address, topics, data, block, log_index, tx_hash):
+        self.logs.append({
+            "address": address, "topics": topics, "data": data, "blockNumber": hex(block),
+            "logIndex": hex(log_index), "transactionHash": tx_hash, "removed": False,
+        })
+
+    @staticmethod
+    def _topics_match(filter_topics, topics):
+        for position, wanted in enumerate(filter_topics):
+            if wanted is None:
+                continue
+            if position >= len(topics):
+                return False
+            options = wanted if isinstance(wanted, list) else [wanted]
+            if topics[position] not in options:
+                return False
+        return True
+
+    def _dispatch(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(self.head)
+        if method == "eth_getBlockByNumber":
+            block = int(params[0], 16)
+            if block > self.head:
+                return None
+            txs = self.transactions.get(block, []) if params[1] else []
+            return {"number": hex(block), "timestamp": hex(self.timestamp(block)), "transactions": txs}
+        if method == "eth_getLogs":
+            query = params[0]
+            lo, hi = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+            found = [
+                log for log in self.logs
+                if lo <= int(log["blockNumber"], 16) <= hi and self._topics_match(query["topics"], log["topics"])
+            ]
+            if len(found) > self.max_log_results:
+                raise ValueError(f"query returned more than {self.max_log_results} results")
+            return found
+        if method == "eth_call":
+            value = self.tokens.get(params[0]["to"], {}).get(params[0]["data"])
+            if value is None:
+                raise ValueError("execution reverted")
+            return "0x" + _word(value) if isinstance(value, int) else _abi_string(value)
+        raise ValueError(f"unsupported method {method}")
+
+    def handle(self, request):
+        batch = json.loads(request.body)
+        replies = []
+        for item in batch:
+            self.calls.append(item["method"])
+            try:
+                replies.append({"jsonrpc": "2.0", "id": item["id"], "result": self._dispatch(item["method"], item["params"])})
+            except ValueError as e:
+                replies.append({"jsonrpc": "2.0", "id": item["id"], "error": {"code": -32005, "message": str(e)}})
+        return 200, {}, json.dumps(replies)
+
+
+@pytest.fixture
+def node():
+    RpcAdapter._block_cache.clear()
+    RpcAdapter._timestamps.clear()
+    RpcAdapter._token_metadata.clear()
+    fake = FakeNode()
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(responses.POST, NODE_URL, callback=fake.handle, content_type="application/json")
+        yield fake
+
+
+def _add_transfers(node):
+    wallet = _address_topic(WALLET)
+    other = _address_topic(OTHER)
+    # ERC-20 received and sent
+    node.add_log(TOKEN, [TRANSFER_TOPIC, other, wallet], "0x" + _word(1500000), 100, 0, "0xa1")
+    node.add_log(TOKEN, [TRANSFER_TOPIC, wallet, other], "0x" + _word(500000), 700, 3, "0xa2")
+    # ERC-20 self-transfer matches two filters but is one record
+    node.add_log(TOKEN, [TRANSFER_TOPIC, wallet, wallet], "0x" + _word(1), 701, 0, "0xa3")
+    # ERC-721 received
+    node.add_log(NFT, [TRANSFER_TOPIC, other, wallet, "0x" + _word(42)], "0x", 200, 1, "0xb1")
+    # ERC-1155 single received, batch sent
+    node.add_log(MULTI, [TRANSFER_SINGLE_TOPIC, other, other, wallet], "0x" + _word(7) + _word(3), 300, 0, "0xc1")
+    batch_data = "0x" + _word(64) + _word(160) + _word(2) + _word(8) + _word(9) + _word(2) + _word(1) + _word(5)
+    node.add_log(MULTI, [TRANSFER_BATCH_TOPIC, wallet, wallet, other], batch_data, 400, 2, "0xc2")
+    # Unrelated transfer
+    node.add_log(TOKEN, [TRANSFER_TOPIC, other, other], "0x" + _word(9), 500, 0, "0xd1")
+
+
+def test_token_transfers_from_log_scan(node):
+    _add_transfers(node)
+    adapter = RpcAdapter(CHAIN, rpc_url=NODE_URL)
+
+    tokens = adapter.get_token_transfers(WALLET)
+    nfts = adapter.get_nft_transfers(WALLET)
+    multis = adapter.get_1155_transfers(WALLET)
+
+    assert [t.hash for t in tokens] == ["0xa1", "0xa2", "0xa3"]
+    assert tokens[0].total.value == "1500000"
+    assert tokens[0].token.symbol == "TST"
+    assert tokens[0].tokenDecimal == "6"
+    assert tokens[0].to_address.hash == WALLET
+    assert tokens[0].timeStamp == str(FakeNode.timestamp(100))
+    assert [(n.hash, n.tokenID, n.tokenSymbol) for n in nfts] == [("0xb1", "42", "TNFT")]
+    assert [(m.hash, m.tokenID, m.tokenValue) for m in multis] == [("0xc1", "7", "3"), ("0xc2", "8", "1"), ("0xc2", "9", "5")]
+    assert multis[1].logIndex != multis[2].logIndex
+    # The three getters shared one scan: three filters over one range, one metadata batch
+    assert node.calls.count("eth_getLogs") == 3
+    assert node.calls.count("eth_call") == 9
+
+
+def test_log_ranges_are_split_when_node_rejects_them(node):
+    _add_transfers(node)
+    node.max_log_results = 1
+    adapter = RpcAdapter(CHAIN, rpc_url=NODE_URL)
+
+    tokens = adapter.get_token_transfers(WALLET)
+
+    assert [t.hash for t in tokens] == ["0xa1", "0xa2", "0xa3"]
+    assert adapter.log_block_range < 10000
+    assert node.calls.count("eth_getLogs") > 3
+
+
+def test_native_transfers_from_block_scan(node):
+    node.head = 250
+    node.transactions = {
+        10: [{"hash": "0xt1", "from": WALLET, "to": OTHER, "value": hex(10**18), "gas": hex(21000), "gasPrice": hex(5)}],
+        11: [{"hash": "0xt2", "from": OTHER, "to": OTHER, "value": "0x1", "gas": "0x1", "gasPrice": "0x1"}],
+        240: [{"hash": "0xt3", "from": OTHER, "to": WALLET.upper().replace("0X", "0x"), "value": "0x2", "gas": "0x5208", "gasPrice": "0x1"}],
+    }
+    adapter = RpcAdapter(CHAIN, rpc_url=NODE_URL)
+
+    txs = adapter.get_transactions(WALLET)
+
+    assert [tx.hash for tx in txs] == ["0xt1", "0xt3"]
+    assert txs[0].value == str(10**18)
+    assert txs[0].gasUsed == "21000"
+    assert txs[0].blockNumber == "10"
+    assert txs[1].timeStamp == str(FakeNode.timestamp(240))
+
+
+def test_native_scan_refuses_unbounded_range(node):
+    node.head = 5000
+    adapter = RpcAdapter(CHAIN, rpc_url=NODE_URL)
+
+    with patch("rpc_adapter.RPC_MAX_NATIVE_SCAN_BLOCKS", 1000):
+        with pytest.raises(NativeScanTooWide, match="Refusing to scan 5001 blocks"):
+            adapter.get_transactions(WALLET)
+        assert adapter.get_transactions(WALLET, 4500) == []
+
+    assert node.calls.count("eth_getBlockByNumber") == 501
+
+
+def test_block_number_by_timestamp_binary_search(node):
+    adapter = RpcAdapter(CHAIN, rpc_url=NODE_URL)
+
+    assert adapter.get_block_number_by_timestamp(FakeNode.timestamp(321) + 1, "before") == 321
+    assert adapter.get_block_number_by_timestamp(FakeNode.timestamp(321) + 1, "after") == 322
+    assert adapter.get_block_number_by_timestamp(FakeNode.timestamp(500), "after") == 500
+
+
+def test_process_transactions_with_rpc_backend(node):
+    _add_transfers(node)
+    node.head = 800
+
+    with patch("extract_transaction_data.get_token_price", return_value=None):
+        transactions = process_transactions(WALLET, CHAIN, rpc_url=NODE_URL, backend="rpc")
+
+    hashes = {tx.tx_hash for tx in transactions}
+    assert {"0xa1", "0xa2", "0xb1", "0xc1", "0xc2"} <= hashes
+    assert "0xd1" not in hashes
+
+
+def test_process_transactions_fails_wallet_on_too_wide_native_scan(node):
+    _add_transfers(node)
+    node.head = 800
+
+    with patch("rpc_adapter.RPC_MAX_NATIVE_SCAN_BLOCKS", 100):
+        with pytest.raises(NativeScanTooWide):
+            process_transactions(WALLET, CHAIN, rpc_url=NODE_URL, backend="rpc")
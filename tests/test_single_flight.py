@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from explorer_adapters import EtherscanAdapter, MintchainAdapter
+from fetch_blockchain_data import fetch_data
+from models import RawTransaction
+from price_service import _price_cache, get_token_price
+from single_flight import SingleFlight
+
+
+def _slow(result, calls, delay=0.1):
+    def fn(*args, **kwargs):
+        calls.append(args)
+        time.sleep(delay)
+        return result
+    return fn
+
+
+def _run_concurrently(fn, n=8):
+    barrier = threading.Barrier(n)
+
+    def call(_):
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(call, range(n)))
+
+
+def test_single_flight_shares_one_call():
+    group = SingleFlight()
+    calls = []
+    results = _run_concurrently(lambda: group.do("k", _slow(42, calls)))
+
+    assert results == [42] * 8
+    assert len(calls) == 1
+    assert group.in_flight() == 0
+
+
+def test_single_flight_shares_exceptions_and_forgets_key():
+    group = SingleFlight()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            group.do("k", failing)
+        except ValueError as e:
+            return str(e)
+
+    assert _run_concurrently(call, n=4) == ["boom"] * 4
+    assert len(calls) == 1
+    # Nothing is cached: the next call runs again
+    assert group.do("k", lambda: "fresh") == "fresh"
+
+
+def test_single_flight_distinct_keys_run_separately():
+    group = SingleFlight()
+    calls = []
+    fn = _slow("x", calls, delay=0.05)
+    _run_concurrently(lambda: group.do(threading.get_ident(), fn, "arg"), n=4)
+
+    assert len(calls) == 4
+
+
+def _ok_response(payload):
+    response = MagicMock(status_code=200, headers={}, content=None)
+    response.json.return_value = payload
+    return response
+
+
+@patch("fetch_blockchain_data.session.get")
+def test_fetch_data_coalesces_identical_endpoints(mock_get):
+    tx = {"hash": "0x1", "timeStamp": "1", "from": "0xa", "to": "0xb", "value": "1"}
+    mock_get.side_effect = _slow(_ok_response({"status": "1", "message": "OK", "result": [tx]}), [])
+
+    results = _run_concurrently(lambda: fetch_data("https://api.test.com/same", RawTransaction))
+
+    assert mock_get.call_count == 1
+    assert all(len(r) == 1 for r in results)
+    # Each caller gets its own list
+    assert len({id(r) for r in results}) == 8
+
+
+@patch("fetch_blockchain_data.session.get")
+def test_explorer_pages_coalesce_on_first_attempt(mock_get):
+    tx = {"hash": "0x1", "timeStamp": "1", "from": "0xa", "to": "0xb", "value": "1", "blockNumber": "1"}
+    mock_get.side_effect = _slow(_ok_response({"status": "1", "message": "OK", "result": [tx]}), [])
+    adapter = MintchainAdapter("mintchain")
+
+    results = _run_concurrently(lambda: adapter.get_transactions("0x1234567890123456789012345678901234567890"))
+
+    assert mock_get.call_count == 1
+    assert all([t.hash for t in r] == ["0x1"] for r in results)
+
+
+@patch("explorer_adapters.session.get")
+def test_block_number_lookup_coalesces(mock_get):
+    EtherscanAdapter._block_cache.clear()
+    mock_get.side_effect = _slow(_ok_response({"status": "1", "message": "OK", "result": "777"}), [])
+    adapter = MintchainAdapter("mintchain")
+
+    results = _run_concurrently(lambda: adapter.get_block_number_by_timestamp(1704067200, "before"))
+
+    assert results == [777] * 8
+    assert mock_get.call_count == 1
+
+
+@patch("price_service.session.get")
+def test_coingecko_price_lookup_coalesces(mock_get):
+    _price_cache.clear()
+    mock_get.side_effect = _slow(
+        _ok_response({"market_data": {"current_price": {"usd": 2000.5}}}), []
+    )
+
+    results = _run_concurrently(lambda: get_token_price("ethereum", 1704067200))
+
+    assert results == [Decimal("2000.5")] * 8
+    assert mock_get.call_count == 1
@@ -0,0 +1,165 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from main import process_transactions
+from models import RawTransaction
+from record_store import RecordStore
+from sync_state import SyncStateStore
+
+CHAIN = "mintchain"
+WALLET_ADDRESS = "0x1234567890123456789012345678901234567890"
+END = 99999999
+
+
+def _tx(tx_hash: str, block: int) -> RawTransaction:
+    return RawTransaction.model_validate(
+        {
+            "hash": tx_hash,
+            "timeStamp": str(1700000000 + block),
+            "from": {"hash": WALLET_ADDRESS},
+            "to": {"hash": "0xother"},
+            "value": "1",
+            "gasUsed": "21000",
+            "gasPrice": "1",
+            "blockNumber": str(block),
+        }
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SyncStateStore(
+        str(tmp_path / "sync_state.db"), reorg_margin=10, records=RecordStore(str(tmp_path / "records.db"))
+    )
+
+
+def test_first_sync_starts_at_block_zero(store):
+    assert store.resume_block(CHAIN, WALLET_ADDRESS, "transactions") == 0
+
+
+def test_merge_records_high_water_mark_and_round_trips(store):
+    merged = store.merge(
+        CHAIN, WALLET_ADDRESS, "transactions", 0, END, [_tx("0x1", 100), _tx("0x2", 250)], RawTransaction
+    )
+
+    assert [tx.hash for tx in merged] == ["0x1", "0x2"]
+    assert store.last_synced_block(CHAIN, WALLET_ADDRESS, "transactions") == 250
+    # Resumes just after the mark, minus the reorg margin
+    assert store.resume_block(CHAIN, WALLET_ADDRESS, "transactions") == 241
+    reloaded = store.load_records(CHAIN, WALLET_ADDRESS.upper(), "transactions", RawTransaction)
+    assert reloaded == merged
+
+
+def test_merge_replaces_refetched_window(store):
+    store.merge(CHAIN, WALLET_ADDRESS, "transactions", 0, END, [_tx("0x1", 100), _tx("0x2", 245)], RawTransaction)
+    from_block = store.resume_block(CHAIN, WALLET_ADDRESS, "transactions")
+
+    # 0x2 was reorged out; the window now holds 0x3 and a new 0x4
+    merged = store.merge(
+        CHAIN, WALLET_ADDRESS, "transactions", from_block, END, [_tx("0x3", 245), _tx("0x4", 300)], RawTransaction
+    )
+
+    assert [tx.hash for tx in merged] == ["0x1", "0x3", "0x4"]
+    assert store.last_synced_block(CHAIN, WALLET_ADDRESS, "transactions") == 300
+
+
+def test_merge_does_not_duplicate_records_without_a_block(store):
+    def unplaced(tx_hash):
+        record = _tx(tx_hash, 0)
+        record.blockNumber = None
+        return record
+
+    store.merge(
+        CHAIN, WALLET_ADDRESS, "transactions", 0, END, [_tx("0x1", 50), _tx("0x2", 100), unplaced("0xa"), unplaced("0xb")],
+        RawTransaction,
+    )
+    from_block = store.resume_block(CHAIN, WALLET_ADDRESS, "transactions")
+
+    # Each incremental run sees 0xa again; 0xb is not returned any more
+    for _ in range(2):
+        merged = store.merge(
+            CHAIN, WALLET_ADDRESS, "transactions", from_block, END, [unplaced("0xa"), _tx("0x2", 300)], RawTransaction
+        )
+        assert sorted(tx.hash for tx in merged) == ["0x1", "0x2", "0xa", "0xb"]
+
+    stored = store.load_records(CHAIN, WALLET_ADDRESS, "transactions", RawTransaction)
+    assert sorted(tx.hash for tx in stored) == ["0x1", "0x2", "0xa", "0xb"]
+
+
+def test_merge_reads_adapter_stored_fetches_from_the_record_store(store):
+    store.records.save(CHAIN, WALLET_ADDRESS, "transactions", 0, 199, [_tx("0x1", 100)])
+    store.records.save(CHAIN, WALLET_ADDRESS, "transactions", 200, END, [_tx("0x2", 300)])
+
+    with patch.object(store.records, "save") as save:
+        merged = store.merge(
+            CHAIN, WALLET_ADDRESS, "transactions", 200, END, [_tx("0x2", 300)], RawTransaction, stored=True
+        )
+
+    # History comes from the record store, written once by the adapter
+    save.assert_not_called()
+    assert [tx.hash for tx in merged] == ["0x1", "0x2"]
+    assert store.last_synced_block(CHAIN, WALLET_ADDRESS, "transactions") == 300
+
+
+def test_old_sync_records_are_dropped_with_their_marks(tmp_path):
+    import sqlite3
+
+    db_path = str(tmp_path / "sync_state.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE sync_state (chain TEXT, wallet TEXT, endpoint TEXT, last_block INTEGER)")
+        conn.execute("CREATE TABLE sync_records (chain TEXT, wallet TEXT, endpoint TEXT, block INTEGER, payload TEXT)")
+        conn.execute("INSERT INTO sync_state VALUES (?, ?, 'transactions', 100)", (CHAIN, WALLET_ADDRESS))
+
+    store = SyncStateStore(db_path, records=RecordStore(str(tmp_path / "records.db")))
+
+    assert store.resume_block(CHAIN, WALLET_ADDRESS, "transactions") == 0
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'sync_records'").fetchone() is None
+
+
+def test_empty_fetch_keeps_stored_history(store):
+    store.merge(CHAIN, WALLET_ADDRESS, "transactions", 0, END, [_tx("0x1", 100)], RawTransaction)
+
+    merged = store.merge(CHAIN, WALLET_ADDRESS, "transactions", 91, END, [], RawTransaction)
+
+    assert [tx.hash for tx in merged] == ["0x1"]
+    assert store.last_synced_block(CHAIN, WALLET_ADDRESS, "transactions") == 100
+
+
+def test_process_transactions_incremental(store):
+    adapter = MagicMock()
+    adapter.get_transactions.return_value = [_tx("0x0", 50), _tx("0x1", 100)]
+    for name in ("get_token_transfers", "get_internal_transactions", "get_nft_transfers", "get_1155_transfers"):
+        getattr(adapter, name).return_value = []
+
+    with patch("main.ADAPTERS", {CHAIN: MagicMock(return_value=adapter)}), patch("main.sync_state", store), \
+            patch("extract_transaction_data.get_token_price", return_value=None):
+        first = process_transactions(WALLET_ADDRESS, CHAIN, incremental=True)
+        # The refetched window (from block 91) returns block 100 again plus a new record
+        adapter.get_transactions.return_value = [_tx("0x1", 100), _tx("0x2", 500)]
+        second = process_transactions(WALLET_ADDRESS, CHAIN, start_date_str="2023-11-14", incremental=True)
+
+    assert [tx.tx_hash for tx in first] == ["0x0", "0x1"]
+    # The second run resumed from the mark; the date range only filters the output
+    assert adapter.get_transactions.call_args_list[0].args == (WALLET_ADDRESS, 0, 99999999)
+    assert adapter.get_transactions.call_args_list[1].args == (WALLET_ADDRESS, 91, 99999999)
+    adapter.get_block_number_by_timestamp.assert_not_called()
+    assert [tx.tx_hash for tx in second] == ["0x0", "0x1", "0x2"]
+
+
+def test_process_transactions_incremental_rpc_first_run_starts_at_start_date(store):
+    adapter = MagicMock()
+    adapter.get_block_number_by_timestamp.return_value = 40
+    adapter.get_transactions.return_value = [_tx("0x0", 50)]
+    for name in ("get_token_transfers", "get_internal_transactions", "get_nft_transfers", "get_1155_transfers"):
+        getattr(adapter, name).return_value = []
+
+    with patch("main.RpcAdapter", MagicMock(return_value=adapter)), patch("main.sync_state", store), \
+            patch("extract_transaction_data.get_token_price", return_value=None):
+        process_transactions(WALLET_ADDRESS, CHAIN, start_date_str="2023-11-14", incremental=True, backend="rpc")
+        process_transactions(WALLET_ADDRESS, CHAIN, start_date_str="2023-11-14", incremental=True, backend="rpc")
+
+    # A never-synced wallet starts at the start date instead of genesis, later runs at the mark
+    assert adapter.get_transactions.call_args_list[0].args == (WALLET_ADDRESS, 40, 99999999)
+    assert adapter.get_transactions.call_args_list[1].args == (WALLET_ADDRESS, 41, 99999999)
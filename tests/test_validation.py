@@ -77,3 +77,32 @@ def test_invalid_raw_token_transfer():
 def test_invalid_transaction():
     with pytest.raises(ValidationError):
         Transaction.model_validate({"Date": "123"})
+
+def test_addresses_are_lowercased_and_shared():
+    base = {"timeStamp": "1234567890", "to": "0xTo", "value": "1"}
+    first = RawTransaction.model_validate({**base, "hash": "0x1", "from": {"hash": "0xAbC"}})
+    second = RawTransaction.model_validate({**base, "hash": "0x2", "from": "0xabc"})
+    assert first.from_address.hash == "0xabc"
+    assert first.from_address is second.from_address
+    assert first.to_address.hash == "0xto"
+
+def test_invalid_address_still_rejected():
+    with pytest.raises(ValidationError):
+        RawTransaction.model_validate({"hash": "0x1", "timeStamp": "1", "from": None, "to": "0xto", "value": "1"})
+
+def test_trusted_round_trip():
+    data = {
+        "hash": "0xdef",
+        "timeStamp": "1234567890",
+        "from": {"hash": "0xfrom"},
+        "to": {"hash": "0xto"},
+        "total": {"value": "500"},
+        "token": {"symbol": "TOK"},
+        "tokenDecimal": "18",
+        "contractAddress": "0xtok"
+    }
+    trx = RawTokenTransfer.model_validate(data)
+    rebuilt = RawTokenTransfer.trusted(trx.model_dump(by_alias=True))
+    assert rebuilt == trx
+    assert rebuilt.token is trx.token
+    assert rebuilt.total.value == "500"
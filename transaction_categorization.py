@@ -88,11 +88,12 @@ def categorize_transaction(transaction: AnyRawTransaction, chain: str = 'mintcha
     to_address = ""
     from_address = ""
     
+    # Record addresses are stored lowercased
     if hasattr(transaction, 'to_address') and hasattr(transaction.to_address, 'hash'):
-        to_address = transaction.to_address.hash.lower()
+        to_address = transaction.to_address.hash
     
     if hasattr(transaction, 'from_address') and hasattr(transaction.from_address, 'hash'):
-        from_address = transaction.from_address.hash.lower()
+        from_address = transaction.from_address.hash
 
     # Get the set of DeFi routers for the specified chain
     chain_routers = DEFI_ROUTERS.get(chain, set())